@@ -1,37 +1,89 @@
 import os
 import uuid
+import json
 import threading
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response
 from werkzeug.utils import secure_filename
-from twitter_bot import TwitterBot
-import chromedriver_autoinstaller
+from selector_registry import default_registry
+from driver_profiles import DRIVER_PROFILES
+from orchestrator import Orchestrator, FINISHED, FAILED, CANCELLED
+from handle_lists import ingest_file, ingest_stream, diff_handles
+from detection_hub import get_hub
+from rate_governor import get_governor
+from profile_state import get_profile_states
+from checkpoints import CheckpointStore, BotCheckpoint
+from result_buffer import last_sequence, wait_for_results
+from metrics import registry as metrics_registry
+from log_pipeline import configure_logging
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['ALLOWED_EXTENSIONS'] = {'txt'}
+app.config['MAX_BROWSER_WORKERS'] = 4  # Upper bound for parallel browser sessions per bot
+app.config['MAX_BROWSERS'] = 4  # Host-wide cap on open browser sessions across all bots
+app.config['MAX_PAGE_LOADS'] = 2  # Host-wide cap on concurrent page loads across all bots
+app.config['SHARED_DETECTION_TTL'] = 60  # Seconds a handle's timeline is reused by bots in shared detection mode
+app.config['CHECK_BUDGET'] = None  # Most profile checks per hour of one monitoring bot; None means unlimited
+app.config['CATCHUP_DEPTH'] = 100  # Most tweets scrolled through to recover tweets missed during downtime
+# Checkpoints do not store passwords; after a restart, resumed runs take them from this JSON file
+# ({"username": {"password": ..., "phone_number": ...}}) or fall back to the account's saved session
+app.config['CREDENTIALS_FILE'] = os.environ.get('TWITTER_BOT_CREDENTIALS')
+app.config['USE_RELOADER'] = True
+# Posting limits per account and action; posts over a limit wait instead of being dropped
+app.config['POST_RATE_LIMITS'] = {
+    'quote': {'burst': 5, 'per_hour': 40, 'per_day': 300},
+    'repost': {'burst': 5, 'per_hour': 40, 'per_day': 300},
+}
 
 # Create uploads directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Install ChromeDriver
-chromedriver_autoinstaller.install()
-
 # Global dictionary to hold multiple TwitterBot instances
 twitter_bots = {}
 
+def register_bot(run):
+    twitter_bots[run.bot_id] = run.bot
+
+# Owns every bot's lifecycle; bots beyond the browser cap wait in its queue
+orchestrator = Orchestrator(max_browsers=app.config['MAX_BROWSERS'],
+                            max_page_loads=app.config['MAX_PAGE_LOADS'],
+                            on_start=register_bot)
+
+# Resumable state of every run, so a restart picks bots up where they left off
+checkpoint_store = CheckpointStore()
+checkpoints = {}
+_resumed = False
+_resume_lock = threading.Lock()
+
+# Bots in shared detection mode scrape each unique handle once through this hub
+get_hub().ttl = app.config['SHARED_DETECTION_TTL']
+
+# Every bot and worker of an account draws from the same token buckets
+get_governor().limits.update(app.config['POST_RATE_LIMITS'])
+
+# Orchestrator gauges are computed when /metrics is scraped
+metrics_registry.gauge('twitter_bot_queue_depth', 'Bot runs waiting for browser slots.').set_function(
+    lambda: len(orchestrator.queue))
+metrics_registry.gauge('twitter_bot_browsers_in_use', 'Browser slots held by running bots.').set_function(
+    lambda: orchestrator.browsers_in_use)
+metrics_registry.gauge('twitter_bot_page_loads_in_use', 'Page-load slots currently held.').set_function(
+    lambda: orchestrator.page_loads.in_use)
+metrics_registry.gauge('twitter_bot_runs', 'Bot runs by state.', ('state',)).set_function(
+    lambda: {(state,): count for state, count in orchestrator.stats()['runs'].items()})
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
-def load_accounts_list(file_path):
-    accounts = []
-    with open(file_path, mode='r', encoding='utf-8') as file:
-        for line in file:
-            account = line.strip()
-            if account:
-                accounts.append(account)
-    return accounts
+def wants_json():
+    return request.accept_mimetypes.best == 'application/json'
+
+def flash_rejected_lines(handle_list, shown=5):
+    if handle_list.error_count:
+        details = '; '.join(f'line {number}: {reason}' for number, _, reason in handle_list.errors[:shown])
+        more = f' (and {handle_list.error_count - shown} more)' if handle_list.error_count > shown else ''
+        flash(f'Skipped {handle_list.error_count} invalid line(s): {details}{more}')
 
 @app.route('/')
 def index():
@@ -64,6 +116,21 @@ def upload_file():
         twitter_password = request.form.get('twitter_password')
         phone_number = request.form.get('phone_number')
         hashtags = request.form.get('hashtags')
+        try:
+            workers = int(request.form.get('workers') or 1)
+        except ValueError:
+            workers = 1
+        workers = max(1, min(workers, app.config['MAX_BROWSER_WORKERS']))
+        try:
+            post_workers = int(request.form.get('post_workers') or 0)
+        except ValueError:
+            post_workers = 0
+        driver_profile = request.form.get('driver_profile') or 'default'
+        if driver_profile not in DRIVER_PROFILES:
+            driver_profile = 'default'
+        detection_mode = request.form.get('detection_mode')
+        if detection_mode not in ('profile', 'search', 'shared'):
+            detection_mode = 'profile'
         # Optionally, add monitoring settings from form (if available)
         # enable_monitoring = request.form.get('enable_monitoring') == 'on'
         # monitor_interval = int(request.form.get('monitor_interval', 300))
@@ -84,42 +151,47 @@ def upload_file():
             flash('Missing required information')
             return redirect(url_for('index'))
         
-        # Load user IDs and hashtags from the uploaded file and form input
-        user_ids = load_accounts_list(filepath)
+        # Load user IDs (streamed, normalised and deduplicated) and hashtags from the uploaded file and form input
+        handle_list = ingest_file(filepath)
+        user_ids = handle_list.handles
         hashtag_list = [tag.strip() for tag in hashtags.split(',') if tag.strip()]
+        if not user_ids:
+            flash('No accounts found in the uploaded file')
+            flash_rejected_lines(handle_list)
+            return redirect(url_for('index'))
         
-        try:
-            # Create a new bot instance and assign the username for display
-            new_bot = TwitterBot(twitter_username, twitter_password, phone_number)
-            new_bot.username = twitter_username
-            new_bot.user_ids = user_ids
-            new_bot.hashtags = hashtag_list
-            new_bot.results = []  # Ensure results attribute exists
-            
-            # Assign a unique ID to the bot
-            new_bot.bot_id = str(uuid.uuid4())
-            
-            if enable_monitoring:
-                # Start repost_tweets in a background thread with monitoring enabled.
-                thread = threading.Thread(
-                    target=new_bot.repost_tweets,
-                    args=(user_ids, hashtag_list, True, monitor_interval, phone_number)
-                )
-                thread.daemon = True  # Ensure thread exits when the main process does.
-                thread.start()
-                twitter_bots[new_bot.bot_id] = new_bot
-                flash(f"Bot started successfully with monitoring enabled. Bot ID: {new_bot.bot_id}")
-            else:
-                # If monitoring is disabled, run synchronously.
-                results = new_bot.repost_tweets(user_ids, hashtag_list)
-                flash("Bot started successfully.")
-                twitter_bots[new_bot.bot_id] = new_bot
-        except Exception as e:
-            flash(f'Error: {str(e)}')
+        workers = min(workers, orchestrator.max_browsers)
+        # At least one session has to keep detecting
+        post_workers = max(0, min(post_workers, workers - 1))
+
+        # Assign a unique ID to the bot; it doubles as the job ID
+        bot_id = str(uuid.uuid4())
+        submit_bot(bot_id, {
+            'username': twitter_username,
+            'password': twitter_password,
+            'phone_number': phone_number,
+            'user_ids': user_ids,
+            'hashtags': hashtag_list,
+            'workers': workers,
+            'post_workers': post_workers,
+            'driver_profile': driver_profile,
+            'detection_mode': detection_mode,
+            'enable_monitoring': enable_monitoring,
+            'monitor_interval': monitor_interval,
+            'check_budget': app.config['CHECK_BUDGET'],
+        })
+        if wants_json():
+            return jsonify({'job_id': bot_id, 'status_url': url_for('job_status', job_id=bot_id),
+                            'handles': handle_list.summary()}), 202
+        flash_rejected_lines(handle_list)
+        if enable_monitoring:
+            flash(f"Bot queued with monitoring enabled. Job ID: {bot_id}")
+        else:
+            flash(f"Bot queued. Job ID: {bot_id}")
         
         # Build a list of all active bots for display
         active_bots = [
-            {"bot_id": bot.bot_id, "username": bot.username, "monitored_users": bot.user_ids}
+            {"bot_id": bot.bot_id, "username": bot.username, "monitored_users": list(bot.user_ids)}
             for bot in twitter_bots.values() if getattr(bot, "monitoring", False)
         ]
         return render_template('index.html', monitoring_active=True, active_bots=active_bots)
@@ -127,10 +199,121 @@ def upload_file():
         flash('File type not allowed. Please upload a .txt file.')
         return redirect(url_for('index'))
 
+def submit_bot(bot_id, config, state=None):
+    """
+    Queues a bot run described by `config` (the options collected by /upload). The run keeps a checkpoint
+    under that bot ID; `state` is a checkpoint loaded from disk when an earlier run is resumed.
+    """
+    checkpoint = BotCheckpoint(checkpoint_store, bot_id, config, state)
+    checkpoints[bot_id] = checkpoint
+    # Written right away, so a run still waiting in the queue survives a restart too
+    checkpoint.flush(force=True)
+
+    def create_bot():
+        # Imported here so the web tier starts without loading the Selenium bot stack
+        from twitter_bot import TwitterBot
+        # Create a new bot instance and assign the username for display; its browser starts when the run does
+        new_bot = TwitterBot(config['username'], config.get('password') or '', config.get('phone_number'),
+                             pool_size=config['workers'], driver_profile=config['driver_profile'],
+                             detection_mode=config['detection_mode'], post_workers=config['post_workers'],
+                             check_budget=config.get('check_budget'), catchup_depth=app.config['CATCHUP_DEPTH'])
+        new_bot.username = config['username']
+        # The handle list may have been updated while the run was queued
+        new_bot.user_ids = list(checkpoint.config['user_ids'])
+        new_bot.hashtags = config['hashtags']
+        new_bot.checkpoint = checkpoint
+        return new_bot
+
+    def run_bot(bot):
+        results = bot.repost_tweets(list(bot.user_ids), config['hashtags'], config['enable_monitoring'],
+                                    config['monitor_interval'], config.get('phone_number'))
+        # Only runs that finished or were stopped on purpose are forgotten; a run that ended because the
+        # browser or the login failed keeps its checkpoint and is resumed on the next start
+        if bot.phase in ('done', 'cancelled'):
+            discard_checkpoint(bot_id)
+        else:
+            app.logger.warning(f"Bot {bot_id} ended in phase '{bot.phase}', keeping its checkpoint")
+        return results
+
+    # Only enqueue here: bot creation, login and the initial pass run on the job's thread.
+    return orchestrator.submit(bot_id, create_bot, run_bot, browsers=config['workers'])
+
+def discard_checkpoint(bot_id):
+    checkpoint = checkpoints.pop(bot_id, None)
+    if checkpoint is not None:
+        checkpoint.discard()
+
+def load_credentials():
+    """
+    Returns the credentials of resumable runs by username from the CREDENTIALS_FILE, or {} without one.
+    """
+    path = app.config['CREDENTIALS_FILE']
+    if not path:
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        app.logger.error(f"Could not read credentials file {path}: {str(e)}")
+        return {}
+
+def resume_from_checkpoints():
+    """
+    Resubmits every run that has a checkpoint on disk, i.e. runs that were queued or running when the
+    process stopped. Handles they already finished and tweets detected but not yet posted are taken from
+    the checkpoint, the credentials from load_credentials().
+    """
+    credentials = load_credentials()
+    for state in checkpoint_store.load_all():
+        bot_id = state['bot_id']
+        if bot_id in checkpoints:
+            continue
+        config = dict(state['config'])
+        account = credentials.get(config['username']) or {}
+        config['password'] = account.get('password')
+        config['phone_number'] = account.get('phone_number')
+        if not config['password']:
+            app.logger.warning(f"No credentials for {config['username']}; bot {bot_id} resumes from its saved session")
+        app.logger.info(f"Resuming bot {bot_id} ({state.get('phase')}, "
+                        f"{len(state.get('completed', []))} handles done, {len(state.get('pending', []))} pending)")
+        submit_bot(bot_id, config, state)
+
+def resume_once():
+    """
+    Resumes checkpointed runs the first time it is called in this process, if no other process sharing the
+    checkpoint folder has resumed them already.
+    """
+    global _resumed
+    with _resume_lock:
+        if _resumed:
+            return
+        _resumed = True
+    if not checkpoint_store.claim():
+        app.logger.info("Checkpointed runs are resumed by another process")
+        return
+    resume_from_checkpoints()
+
+def create_app():
+    """
+    Returns the app ready to serve, resuming checkpointed runs first. WSGI servers should load the app through
+    this factory, e.g. `gunicorn "app:create_app()"`; importing the module alone starts no bots.
+    """
+    configure_logging('twitter_bot.log')
+    resume_once()
+    return app
+
 @app.route('/stop_monitoring')
 def stop_monitoring():
     bot_id = request.args.get('bot_id')
-    if bot_id and bot_id in twitter_bots:
+    run = orchestrator.runs.get(bot_id) if bot_id else None
+    if run is not None and run.bot is None:
+        # Queued, still starting or failed before its bot existed; cancel() handles each of these
+        if orchestrator.cancel(bot_id):
+            discard_checkpoint(bot_id)
+            flash(f'Bot {bot_id} cancelled before it started')
+        else:
+            flash(f'Bot {bot_id} has already finished')
+    elif bot_id and bot_id in twitter_bots:
         bot = twitter_bots[bot_id]
         if getattr(bot, "monitoring", False):
             bot.stop_monitoring()
@@ -141,17 +324,172 @@ def stop_monitoring():
         flash('No valid bot ID provided')
     return redirect(url_for('index'))
 
-@app.route('/status')
-def status():
+def bot_summaries(since=None):
     statuses = []
-    for bot in twitter_bots.values():
+    for bot in list(twitter_bots.values()):
+        results = bot.results
         statuses.append({
             'bot_id': bot.bot_id,
             'monitoring_active': bot.monitoring,
-            'result_count': len(bot.results) if hasattr(bot, 'results') else 0,
-            'latest_results': bot.results[-10:] if hasattr(bot, 'results') and bot.results else []
+            'error': bot.error,
+            'result_count': results.total,
+            'cursor': results.last_seq,
+            'latest_results': results.since(since) if since is not None else results[-10:]
         })
-    return jsonify(statuses)
+    return statuses
+
+def status_etag():
+    state = [(bot.bot_id, bot.monitoring, bot.results.last_seq) for bot in list(twitter_bots.values())]
+    return f'{last_sequence()}-{hash(tuple(state)) & 0xffffffff:x}'
+
+@app.route('/status')
+def status():
+    # Pass ?since=<cursor> to get only results newer than the last cursor seen; unchanged state answers 304
+    since = request.args.get('since', type=int)
+    etag = f'{status_etag()}-{since}'
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    response = jsonify(bot_summaries(since))
+    response.set_etag(etag)
+    return response
+
+@app.route('/status/stream')
+def status_stream():
+    # Server-sent events: one "result" event per new result (id = its sequence number), plus a "state"
+    # event whenever the set of bots or their monitoring flags change. Browsers resume via Last-Event-ID.
+    cursor = request.headers.get('Last-Event-ID', type=int)
+    if cursor is None:
+        cursor = request.args.get('since', default=last_sequence(), type=int)
+
+    def stream(cursor):
+        state = None
+        while True:
+            new_state = [(bot.bot_id, bot.monitoring) for bot in list(twitter_bots.values())]
+            if new_state != state:
+                state = new_state
+                summaries = [{'bot_id': bot_id, 'monitoring_active': active} for bot_id, active in state]
+                yield f'event: state\ndata: {json.dumps(summaries)}\n\n'
+            if not wait_for_results(cursor, timeout=15):
+                yield ': keepalive\n\n'
+                continue
+            latest = last_sequence()
+            new_results = []
+            for bot in list(twitter_bots.values()):
+                new_results.extend(dict(result, bot_id=bot.bot_id) for result in bot.results.since(cursor)
+                                   if result['seq'] <= latest)
+            new_results.sort(key=lambda result: result['seq'])
+            for result in new_results:
+                yield f'id: {result["seq"]}\nevent: result\ndata: {json.dumps(result)}\n\n'
+            # Anything newer than `latest` is sent on the next round; results of bots that are not
+            # registered yet are skipped rather than re-polled forever.
+            cursor = latest
+
+    return Response(stream(cursor), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/jobs')
+def jobs():
+    return jsonify([run.to_dict() for run in list(orchestrator.runs.values())])
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    run = orchestrator.get(job_id)
+    if run is None:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    return jsonify(run.to_dict())
+
+@app.route('/jobs/<job_id>/cancel', methods=['GET', 'POST'])
+def cancel_job(job_id):
+    run = orchestrator.get(job_id)
+    if run is None:
+        return jsonify({'error': 'Unknown job ID'}), 404
+    cancelled = orchestrator.cancel(job_id)
+    if cancelled:
+        discard_checkpoint(job_id)
+    if wants_json() or request.method == 'POST':
+        return jsonify({'job_id': job_id, 'cancelled': cancelled, 'state': run.state})
+    flash(f'Job {job_id} cancelled' if cancelled else f'Job {job_id} has already finished')
+    return redirect(url_for('index'))
+
+@app.route('/jobs/<job_id>/handles', methods=['POST'])
+def update_job_handles(job_id):
+    # Replaces a queued or running bot's handle list with an uploaded one; only the difference is applied
+    run = orchestrator.get(job_id)
+    checkpoint = checkpoints.get(job_id)
+    if run is None or checkpoint is None or run.state in (FINISHED, FAILED, CANCELLED):
+        return jsonify({'error': 'Unknown or finished job ID'}), 404
+    file = request.files.get('file')
+    if file is None or not allowed_file(file.filename):
+        return jsonify({'error': 'Upload a .txt file with one handle per line'}), 400
+    handle_list = ingest_stream(file.stream)
+    summary = handle_list.summary()
+    if not handle_list.handles:
+        return jsonify(dict(summary, error='No accounts found in the uploaded file')), 400
+
+    bot = run.bot
+    current = list(bot.user_ids) if bot is not None else checkpoint.config['user_ids']
+    added, removed = diff_handles(current, handle_list.handles)
+    if bot is not None:
+        bot.update_handles(added, removed)
+    else:
+        removed_keys = {handle.lower() for handle in removed}
+        checkpoint.update_config(user_ids=[h for h in current if h.lower() not in removed_keys] + added)
+    summary.update(added=len(added), removed=len(removed), monitored=len(current) + len(added) - len(removed))
+    if wants_json():
+        return jsonify(summary)
+    flash(f'Bot {job_id}: {len(added)} handle(s) added, {len(removed)} removed')
+    flash_rejected_lines(handle_list)
+    return redirect(url_for('index'))
+
+@app.route('/fleet')
+def fleet():
+    # Queue depth, browser and page-load slot usage of the orchestrator, plus every run's state
+    stats = orchestrator.stats()
+    stats['bots'] = [run.to_dict() for run in list(orchestrator.runs.values())]
+    return jsonify(stats)
+
+@app.route('/schedule')
+def schedule():
+    # Per-account polling schedule of a monitoring bot, soonest check first
+    bot = twitter_bots.get(request.args.get('bot_id'))
+    if bot is None:
+        return jsonify({'error': 'No valid bot ID provided'}), 404
+    scheduler = getattr(bot, 'scheduler', None)
+    return jsonify(scheduler.snapshot() if scheduler else [])
+
+@app.route('/pipeline')
+def pipeline_stats():
+    # Queue depth and stage latencies of a bot's detect/post pipeline
+    bot = twitter_bots.get(request.args.get('bot_id'))
+    if bot is None:
+        return jsonify({'error': 'No valid bot ID provided'}), 404
+    pipeline = getattr(bot, 'pipeline', None)
+    return jsonify(pipeline.stats() if pipeline else {})
+
+@app.route('/detection')
+def detection_stats():
+    # Scrapes, cache hits and published events of the shared detection hub
+    return jsonify(get_hub().stats())
+
+@app.route('/rate_limits')
+def rate_limits():
+    # Posts in the last hour/day, effective rate, pause and queued posts per account and action
+    return jsonify(get_governor().stats())
+
+@app.route('/profile_states')
+def profile_states():
+    # Accounts cached as suspended, missing or protected, with their next recheck
+    return jsonify(get_profile_states().stats())
+
+@app.route('/selectors')
+def selector_stats():
+    # Hit/miss counters of the shared selector registry, for tuning the repost/quote selectors
+    return jsonify(default_registry.stats())
+
+@app.route('/metrics')
+def metrics():
+    # Per-bot, per-phase latency histograms, outcome counters and fleet gauges in Prometheus text format
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 @app.route('/status_page')
 def status_page():
@@ -165,4 +503,8 @@ def logout_route():
     return redirect(url_for('index'))
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    configure_logging('twitter_bot.log')
+    # The reloader's watcher process only restarts the server; runs resume in the process that serves
+    if not app.config['USE_RELOADER'] or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        create_app()
+    app.run(debug=True, use_reloader=app.config['USE_RELOADER'])
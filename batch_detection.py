@@ -0,0 +1,167 @@
+"""
+batch_detection.py
+
+This module contains the BatchDetector class which detects new tweets for many monitored handles with one
+page load per group of handles instead of one profile load per handle. Handles are packed into
+`from:a OR from:b ...` searches on the Latest tab, chunked to stay under X's search query length limit.
+Each search timeline is scrolled until it reaches the oldest saved tweet id among the chunk's handles, so
+nothing newer than what every handle last saw is missed, and the new tweets are grouped by author and
+passed on to the bot's per-user posting logic.
+
+Tweet ids are snowflakes, so "newer" is decided by comparing them numerically. Handles without a saved
+tweet id only get their newest visible tweet treated as new, which sets their baseline without quoting
+their whole history.
+"""
+
+import time
+import logging
+from urllib.parse import quote
+
+from waits import timeline_settled
+from timeline import numeric_id
+from network_capture import drain as drain_network_log
+
+logger = logging.getLogger(__name__)
+
+SEARCH_URL = "https://x.com/search?q={query}&src=typed_query&f=live"
+MAX_QUERY_LENGTH = 500
+SCROLL_JS = "window.scrollBy(0, window.innerHeight * 0.9); return window.scrollY + window.innerHeight >= document.body.scrollHeight;"
+
+
+def build_search_queries(handles, max_length=MAX_QUERY_LENGTH, exclude_replies=True):
+    """
+    Packs handles into `from:` searches no longer than max_length characters.
+
+    Args:
+        handles (list): Twitter handles.
+        max_length (int): Maximum query length (before URL encoding).
+        exclude_replies (bool): Append -filter:replies, matching what the profile Posts tab shows.
+
+    Returns:
+        list: A list of (query, handles) tuples.
+    """
+    suffix = " -filter:replies" if exclude_replies else ""
+    chunks = []
+    current = []
+    length = len(suffix) + 2  # surrounding parentheses
+    for handle in handles:
+        term = f"from:{handle.lstrip('@')}"
+        extra = len(term) + (4 if current else 0)  # " OR "
+        if current and length + extra > max_length:
+            chunks.append(current)
+            current = []
+            length = len(suffix) + 2
+            extra = len(term)
+        current.append(handle)
+        length += extra
+    if current:
+        chunks.append(current)
+    queries = []
+    for chunk in chunks:
+        terms = " OR ".join(f"from:{handle.lstrip('@')}" for handle in chunk)
+        queries.append((f"({terms}){suffix}", chunk))
+    return queries
+
+
+class BatchDetector:
+    def __init__(self, bot, max_query_length=MAX_QUERY_LENGTH, max_scrolls=10, exclude_replies=True):
+        """
+        Initializes a BatchDetector for a TwitterBot (or one of its pool workers).
+
+        Args:
+            bot (TwitterBot): Bot whose driver, waits and ledger are used.
+            max_query_length (int): Maximum search query length.
+            max_scrolls (int): Maximum number of scroll steps per search timeline.
+            exclude_replies (bool): Leave replies out of the search.
+        """
+        self.bot = bot
+        self.max_query_length = max_query_length
+        self.max_scrolls = max_scrolls
+        self.exclude_replies = exclude_replies
+        self.page_loads = 0
+
+    def queries(self, handles):
+        return build_search_queries(handles, self.max_query_length, self.exclude_replies)
+
+    def collect(self, query, floor_id):
+        """
+        Loads the search timeline for a query and collects tweet records, scrolling until a tweet at or below
+        floor_id is seen (or the timeline ends or max_scrolls is reached).
+
+        Returns:
+            list: Tweet records, most recent first, without duplicates.
+        """
+        bot = self.bot
+        bot.load_page(SEARCH_URL.format(query=quote(query)))
+        self.page_loads += 1
+        bot.waits.wait_for("search_timeline", timeline_settled(), raise_on_timeout=False)
+        records = {}
+        for step in range(self.max_scrolls + 1):
+            for record in bot.get_timeline_records():
+                records.setdefault(record["id"], record)
+            ids = [numeric_id(tweet_id) for tweet_id in records]
+            ids = [tweet_id for tweet_id in ids if tweet_id is not None]
+            if floor_id is None or (ids and min(ids) <= floor_id) or step == self.max_scrolls:
+                break
+            at_end = bot.driver.execute_script(SCROLL_JS)
+            if at_end:
+                break
+            bot.waits.wait_for("search_scroll", timeline_settled(), raise_on_timeout=False)
+        if bot.network_capture:
+            # Search timelines are read from the DOM; drop their captured traffic so the log stays bounded.
+            drain_network_log(bot.driver)
+        ordered = sorted(records.values(), key=lambda r: numeric_id(r["id"]) or 0, reverse=True)
+        return ordered
+
+    def detect(self, handles):
+        """
+        Finds new tweets for the given handles through one search timeline per chunk.
+
+        Returns:
+            dict: Mapping of handle to the status URLs of its new tweets, most recent first.
+        """
+        new_tweets = {}
+        for query, chunk in self.queries(handles):
+            by_name = {handle.lstrip("@").lower(): handle for handle in chunk}
+            saved = {handle: numeric_id(self.bot.ledger.get(handle)) for handle in chunk}
+            known = [tweet_id for tweet_id in saved.values() if tweet_id is not None]
+            floor_id = min(known) if known else None
+            try:
+                records = self.collect(query, floor_id)
+            except Exception as e:
+                logger.error(f"Batch detection failed for {len(chunk)} handles: {str(e)}")
+                continue
+            for record in records:
+                handle = by_name.get((record.get("author") or "").lower())
+                if handle is None or record.get("retweet"):
+                    continue
+                tweet_id = numeric_id(record["id"])
+                saved_id = saved[handle]
+                if saved_id is None:
+                    # Unknown baseline: only the newest tweet counts as new.
+                    if handle not in new_tweets:
+                        new_tweets[handle] = [record["url"]]
+                    continue
+                if tweet_id is not None and tweet_id > saved_id:
+                    new_tweets.setdefault(handle, []).append(record["url"])
+            logger.info(f"Batch search over {len(chunk)} handles found new tweets for {sum(1 for h in chunk if h in new_tweets)}")
+        return new_tweets
+
+    def sweep(self, handles, hashtag):
+        """
+        Detects new tweets for the handles and posts them through the bot's per-user posting logic.
+
+        Returns:
+            list: Result dictionaries for the handles that had new tweets.
+        """
+        start = time.monotonic()
+        results = []
+        for handle, tweet_urls in self.detect(handles).items():
+            posted = self.bot.post_new_tweets(handle, tweet_urls, hashtag)
+            if posted:
+                message = f"Retweeted {posted} new tweet(s) for {handle}."
+                results.append({"user": handle, "status": "success", "message": message})
+            else:
+                results.append({"user": handle, "status": "failed", "message": f"Could not retweet new tweets for {handle}."})
+        logger.info(f"Batch sweep of {len(handles)} handles took {time.monotonic() - start:.1f}s and {self.page_loads} search page loads")
+        return results
@@ -0,0 +1,94 @@
+"""
+bench_driver_profiles.py
+
+Benchmarks the driver profiles defined in driver_profiles.py. For every profile a browser is started, a list of
+pages is loaded and the script reports the page load time (navigation start to load event) and the memory used
+by the browser session.
+
+Memory is the resident set size of chromedriver and all Chrome child processes when psutil is installed;
+otherwise only the page's JS heap (performance.memory) is reported.
+
+Usage:
+    python benchmarks/bench_driver_profiles.py [--profiles detect post] [--runs 3] [URL ...]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from driver_profiles import DRIVER_PROFILES
+from twitter_bot import get_driver
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_URLS = ["https://twitter.com/X", "https://twitter.com/XDevelopers"]
+
+
+def session_memory_mb(driver):
+    """
+    Returns the memory of a browser session in MB, and how it was measured.
+    """
+    if psutil is not None:
+        try:
+            root = psutil.Process(driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024), "rss"
+        except Exception:
+            pass
+    heap = driver.execute_script("return window.performance.memory ? performance.memory.usedJSHeapSize : 0;")
+    return heap / (1024 * 1024), "js-heap"
+
+
+def page_load_seconds(driver, url):
+    start = time.monotonic()
+    driver.get(url)
+    timing = driver.execute_script(
+        "var t = performance.timing; return t.loadEventEnd > 0 ? t.loadEventEnd - t.navigationStart : null;")
+    if timing:
+        return timing / 1000.0
+    return time.monotonic() - start
+
+
+def bench_profile(name, urls, runs):
+    driver = get_driver(name)
+    try:
+        loads = []
+        for _ in range(runs):
+            for url in urls:
+                loads.append(page_load_seconds(driver, url))
+        memory, method = session_memory_mb(driver)
+    finally:
+        driver.quit()
+    return {
+        "profile": name,
+        "loads": len(loads),
+        "median_load_s": statistics.median(loads),
+        "max_load_s": max(loads),
+        "memory_mb": memory,
+        "memory_method": method,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark driver profiles")
+    parser.add_argument("urls", nargs="*", default=DEFAULT_URLS)
+    parser.add_argument("--profiles", nargs="+", default=list(DRIVER_PROFILES))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'loads':>5} {'median load (s)':>16} {'max load (s)':>13} {'memory (MB)':>12}")
+    for name in args.profiles:
+        result = bench_profile(name, args.urls, args.runs)
+        print(f"{result['profile']:<10} {result['loads']:>5} {result['median_load_s']:>16.2f} "
+              f"{result['max_load_s']:>13.2f} {result['memory_mb']:>9.1f} ({result['memory_method']})")
+
+
+if __name__ == "__main__":
+    main()
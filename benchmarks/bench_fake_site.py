@@ -0,0 +1,223 @@
+"""
+bench_fake_site.py
+
+Runs the real TwitterBot code against the local fake X site (fake_site.py), so throughput changes can be
+measured without touching x.com. A bot with the chosen driver profile is pointed at the fake site (its page
+loads are rewritten to the local server), then:
+
+    1. process_user() runs once per handle (the initial pass),
+    2. for each round, every handle gets --new-per-handle new tweets and check_for_new_tweet() runs per handle,
+    3. optionally (--repost), repost_with_hashtag() runs on the top tweet of each handle.
+
+The report has tweets detected and posted per minute, the per-phase latency recorded by metrics.py
+(login is skipped; posts bypass the shared rate governor's limits, so the bot is measured rather than the
+throttle), the wait steps of the WaitEngine, and memory (browser RSS via psutil, or JS heap, plus the
+Python heap peak). Results can be saved as a baseline and later runs compared against it; a metric that is
+worse than the baseline by more than --tolerance is reported as a regression and the exit code is 1.
+
+Usage:
+    python benchmarks/bench_fake_site.py [--handles 10] [--rounds 2] [--new-per-handle 2] [--profile detect]
+                                         [--latency 0.05] [--page-failure-rate 0] [--post-failure-rate 0]
+                                         [--save-baseline | --compare] [--baseline PATH] [--tolerance 0.15]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import metrics
+from ledger import get_ledger
+from twitter_bot import TwitterBot
+from rate_governor import RateGovernor, DEFAULT_LIMITS
+from fake_site import FakeSite
+from bench_driver_profiles import session_memory_mb
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+BOT_ID = "bench"
+# Burst large enough for any run and no hourly or daily caps
+UNTHROTTLED = {action: {"burst": 10 ** 6, "per_hour": 0, "per_day": 0} for action in DEFAULT_LIMITS}
+
+# Metric name -> True if higher is better.
+COMPARED = {
+    "detected_per_min": True,
+    "posted_per_min": True,
+    "browser_memory_mb": False,
+    "python_peak_mb": False,
+}
+
+
+class BenchBot(TwitterBot):
+    """
+    TwitterBot whose page loads go to the fake site instead of x.com / twitter.com, with its own unthrottled
+    rate governor.
+    """
+    def __init__(self, site, driver_profile):
+        self.site_base = site.base_url
+        super().__init__("bench", "", "", driver_profile=driver_profile)
+        self.bot_id = BOT_ID
+        self.governor = RateGovernor(limits=UNTHROTTLED)
+
+    def load_page(self, url, driver=None):
+        parsed = urlparse(url)
+        local = self.site_base + parsed.path + (f"?{parsed.query}" if parsed.query else "")
+        super().load_page(local, driver)
+
+
+def phase_report(bot_id=BOT_ID):
+    """
+    Returns {phase: {"count", "failures", "mean_s"}} from the metrics recorded for the bot.
+    """
+    phases = {}
+    for (key_bot, phase), entry in list(metrics.PHASE_SECONDS.values.items()):
+        if key_bot != bot_id or not entry["count"]:
+            continue
+        failures = metrics.PHASE_TOTAL.values.get((bot_id, phase, "failure"), 0)
+        phases[phase] = {"count": entry["count"], "failures": failures, "mean_s": entry["sum"] / entry["count"]}
+    return phases
+
+
+def run(args):
+    handles = [f"user{n:03d}" for n in range(args.handles)]
+    site = FakeSite(handles, tweets_per_handle=args.tweets_per_handle, latency=args.latency,
+                    page_failure_rate=args.page_failure_rate, post_failure_rate=args.post_failure_rate,
+                    ui_delay_ms=args.ui_delay_ms).start()
+    workdir = tempfile.mkdtemp(prefix="bench_fake_site_")
+    tracemalloc.start()
+    bot = BenchBot(site, args.profile)
+    if not bot.ensure_driver():
+        raise SystemExit("Could not start a browser for the benchmark")
+    # Keep the benchmark's processed tweet ids out of the real posted_tweet_ids.txt.
+    bot.ledger = get_ledger(os.path.join(workdir, "posted_tweet_ids.txt"))
+    hashtag = ["#bench"]
+    published = 0
+    start = time.monotonic()
+    try:
+        for handle in handles:
+            bot.process_user(handle, hashtag)
+        for _ in range(args.rounds):
+            for handle in handles:
+                published += len(site.publish(handle, args.new_per_handle))
+            for handle in handles:
+                bot.check_for_new_tweet(handle, hashtag)
+        if args.repost:
+            for handle in handles:
+                tweets = bot.get_latest_tweets(handle, count=1)
+                if tweets:
+                    bot.repost_with_hashtag(tweets[0]["tweet"], hashtag)
+        elapsed = time.monotonic() - start
+        browser_memory, memory_method = session_memory_mb(bot.driver)
+        python_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        waits = bot.waits.report()
+    finally:
+        tracemalloc.stop()
+        bot.close()
+        bot.ledger.close()
+        site.stop()
+
+    detected = metrics.TWEETS_DETECTED.values.get((BOT_ID,), 0)
+    minutes = elapsed / 60.0
+    return {
+        "config": {key: value for key, value in vars(args).items()
+                   if key not in ("save_baseline", "compare", "baseline", "tolerance", "json")},
+        "elapsed_s": elapsed,
+        "published": published,
+        "detected": detected,
+        "recovered": metrics.TWEETS_RECOVERED.values.get((BOT_ID,), 0),
+        "posted": site.counters["posts"],
+        "detected_per_min": detected / minutes if minutes else 0.0,
+        "posted_per_min": site.counters["posts"] / minutes if minutes else 0.0,
+        "site": dict(site.counters),
+        "phases": phase_report(),
+        "waits": waits,
+        "browser_memory_mb": browser_memory,
+        "memory_method": memory_method,
+        "python_peak_mb": python_peak,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """
+    Compares a result with a baseline. Returns a list of (metric, baseline, current, change, regressed).
+    """
+    rows = []
+    for key, higher_is_better in COMPARED.items():
+        rows.append(_row(key, baseline.get(key), result.get(key), higher_is_better, tolerance))
+    for phase, stats in result["phases"].items():
+        base = baseline.get("phases", {}).get(phase)
+        if base:
+            rows.append(_row(f"{phase}.mean_s", base["mean_s"], stats["mean_s"], False, tolerance))
+    return [row for row in rows if row is not None]
+
+
+def _row(name, base, current, higher_is_better, tolerance):
+    if not base or current is None:
+        return None
+    change = (current - base) / base
+    regressed = change < -tolerance if higher_is_better else change > tolerance
+    return name, base, current, change, regressed
+
+
+def print_result(result):
+    print(f"elapsed {result['elapsed_s']:.1f}s, published {result['published']}, detected {result['detected']} "
+          f"({result['recovered']} by catch-up), posted {result['posted']}")
+    print(f"throughput: {result['detected_per_min']:.1f} detected/min, {result['posted_per_min']:.1f} posted/min")
+    print(f"site: {result['site']}")
+    print(f"memory: browser {result['browser_memory_mb']:.1f} MB ({result['memory_method']}), "
+          f"python peak {result['python_peak_mb']:.1f} MB")
+    print(f"{'phase':<14} {'count':>6} {'failures':>9} {'mean (s)':>9}")
+    for phase, stats in sorted(result["phases"].items()):
+        print(f"{phase:<14} {stats['count']:>6} {stats['failures']:>9} {stats['mean_s']:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TwitterBot against a local fake X site")
+    parser.add_argument("--handles", type=int, default=10)
+    parser.add_argument("--tweets-per-handle", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--new-per-handle", type=int, default=2)
+    parser.add_argument("--profile", default="detect")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--ui-delay-ms", type=int, default=50)
+    parser.add_argument("--page-failure-rate", type=float, default=0.0)
+    parser.add_argument("--post-failure-rate", type=float, default=0.0)
+    parser.add_argument("--repost", action="store_true", help="also run repost_with_hashtag per handle")
+    parser.add_argument("--baseline", help="baseline file (default: benchmarks/baselines/fake_site_<profile>.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--json", action="store_true", help="print the full result as JSON")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_result(result)
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"fake_site_{args.profile}.json")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved baseline to {baseline_path}")
+    elif args.compare:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(result, baseline, args.tolerance)
+        print(f"\n{'metric':<22} {'baseline':>10} {'current':>10} {'change':>8}")
+        for name, base, current, change, regressed in rows:
+            print(f"{name:<22} {base:>10.3f} {current:>10.3f} {change:>+7.0%}{'  REGRESSION' if regressed else ''}")
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+bench_import.py
+
+Measures how long `import app` takes in a fresh interpreter, which is what every cold start and every debug
+reload of the web tier pays before the first request is served. Each run imports app in a new process with
+`-X importtime`; the report has the median wall time, the modules with the highest cumulative import time and
+whether anything that belongs to a bot run was loaded at import time:
+
+    - modules that must not be imported by the web tier (twitter_bot, tkinter, chromedriver_autoinstaller);
+    - the logging pipeline having been started (its writer thread and log file belong to the first bot run).
+
+The exit code is 1 if the median is above --max-seconds or a check fails, so the benchmark can gate changes.
+Importing app starts no bots (checkpointed runs are resumed by create_app()); each import still runs in an
+empty working directory, so the folders app creates on import are not left in the repository.
+
+Usage:
+    python benchmarks/bench_import.py [--runs 5] [--max-seconds 1.5] [--top 10]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORBIDDEN_MODULES = ("twitter_bot", "tkinter", "chromedriver_autoinstaller")
+
+PROBE = """
+import sys, json
+import app
+import log_pipeline
+print(json.dumps({
+    "forbidden": [name for name in %r if name in sys.modules],
+    "logging_started": log_pipeline._listener is not None,
+}))
+""" % (FORBIDDEN_MODULES,)
+
+
+def parse_importtime(stderr):
+    """
+    Returns {module: cumulative microseconds} from `-X importtime` output.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[1].isdigit():
+            continue
+        name = parts[2].strip()
+        modules[name] = max(modules.get(name, 0), int(parts[1]))
+    return modules
+
+
+def run_once():
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.monotonic()
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], cwd=workdir, env=env,
+                                 capture_output=True, text=True)
+        elapsed = time.monotonic() - start
+    if process.returncode != 0:
+        raise SystemExit(f"import app failed:\n{process.stderr[-2000:]}")
+    probe = json.loads(process.stdout.strip().splitlines()[-1])
+    return elapsed, parse_importtime(process.stderr), probe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the web tier (app.py)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=1.5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.runs):
+        elapsed, modules, probe = run_once()
+        timings.append(elapsed)
+    median = statistics.median(timings)
+
+    print(f"import app: median {median:.3f}s, min {min(timings):.3f}s, max {max(timings):.3f}s "
+          f"over {args.runs} run(s)")
+    print(f"{'module':<48} {'cumulative (ms)':>16}")
+    for name, micros in sorted(modules.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<48} {micros / 1000:>16.1f}")
+
+    failures = []
+    if median > args.max_seconds:
+        failures.append(f"median import time {median:.3f}s is above {args.max_seconds}s")
+    if probe["forbidden"]:
+        failures.append(f"imported at startup: {', '.join(probe['forbidden'])}")
+    if probe["logging_started"]:
+        failures.append("the logging pipeline was started at import time")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+bench_logging.py
+
+Measures the per-call cost of logger.info on the calling (bot) thread for the old synchronous setup
+(logging.basicConfig with a FileHandler and a StreamHandler) and for the queue-based pipeline in
+log_pipeline.py. Console output is disabled in both cases so only file handling is compared, and the
+calls are made from several threads at once, like bot workers. --slow-disk-ms adds a delay to every
+file flush to simulate a slow or busy disk, which the bot threads pay for directly in the old setup.
+
+Usage:
+    python benchmarks/bench_logging.py [--calls 20000] [--threads 4] [--slow-disk-ms 0]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_pipeline
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def run_calls(calls, threads):
+    logger = logging.getLogger("bench")
+    per_thread = calls // threads
+    timings = []
+
+    def worker(index):
+        log_pipeline.set_log_context(bot_id="bench", handle=f"user{index}", phase="monitoring")
+        start = time.perf_counter()
+        for i in range(per_thread):
+            logger.info(f"Found tweet link: https://x.com/user{index}/status/{i}")
+        timings.append(time.perf_counter() - start)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return sum(timings) / (per_thread * threads) * 1e6
+
+
+def bench_sync(path, calls, threads):
+    reset_root()
+    logging.basicConfig(level=logging.INFO, format=log_pipeline.TEXT_FORMAT,
+                        handlers=[logging.FileHandler(path)], force=True)
+    cost = run_calls(calls, threads)
+    reset_root()
+    return cost
+
+
+def bench_queue(path, calls, threads):
+    reset_root()
+    log_pipeline.configure_logging(path, console=False)
+    cost = run_calls(calls, threads)
+    start = time.perf_counter()
+    log_pipeline.shutdown_logging()
+    drain = time.perf_counter() - start
+    reset_root()
+    return cost, drain
+
+
+def slow_disk(delay_ms):
+    """
+    Makes every handler flush sleep for delay_ms, simulating slow disk I/O.
+    """
+    original = logging.StreamHandler.flush
+
+    def flush(self):
+        time.sleep(delay_ms / 1000.0)
+        original(self)
+
+    logging.StreamHandler.flush = flush
+    return original
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-call logging cost")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--slow-disk-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    if args.slow_disk_ms:
+        slow_disk(args.slow_disk_ms)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_cost = bench_sync(os.path.join(tmp, "sync.log"), args.calls, args.threads)
+        queue_cost, drain = bench_queue(os.path.join(tmp, "queue.log"), args.calls, args.threads)
+
+    print(f"{'setup':<22} {'us per call (caller thread)':>28}")
+    print(f"{'FileHandler (before)':<22} {sync_cost:>28.2f}")
+    print(f"{'queue pipeline (after)':<22} {queue_cost:>28.2f}")
+    print(f"writer thread drained the queue {drain * 1000:.0f} ms after the last call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+fake_site.py
+
+A local stand-in for the parts of x.com the bot touches, used by the offline benchmarks. It serves:
+
+    - /<handle>: a profile page (fixtures/profile.html) whose timeline is fetched from a UserTweets GraphQL
+      endpoint and rendered client-side, like the web app. Unknown handles get the "doesn't exist" page.
+    - /i/api/graphql/fake/UserTweets: the timeline JSON, in the shape of fixtures/user_tweets.json.
+    - /<handle>/status/<id>: a tweet detail page (fixtures/tweet.html) with the repost menu, the quote
+      compose modal and the "post sent" toast.
+    - /i/api/graphql/fake/CreateTweet: accepts posts and records them.
+
+Every response can be delayed (latency plus jitter) and page loads and posts can be made to fail at a given
+rate. Tweet ids are real-looking snowflakes, so numeric id comparisons behave as on the live site;
+publish() adds new tweets to a handle's timeline while a benchmark runs.
+
+Run it on its own to look at the pages in a browser:
+
+    python benchmarks/fake_site.py --port 8000 --handles alice bob
+"""
+
+import json
+import time
+import random
+import argparse
+import datetime
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+TWITTER_EPOCH_MS = 1288834974657
+NOT_FOUND_PAGE = ("<!DOCTYPE html><html><body><main role=\"main\"><div data-testid=\"primaryColumn\">"
+                  "<div data-testid=\"emptyState\"><span>This account doesn't exist</span></div>"
+                  "</div></main></body></html>")
+ERROR_PAGE = ("<!DOCTYPE html><html><body><main role=\"main\"><div data-testid=\"primaryColumn\">"
+              "<span>Something went wrong. Try reloading.</span></div></main></body></html>")
+
+
+def snowflake(timestamp, sequence=0):
+    return str(((int(timestamp * 1000) - TWITTER_EPOCH_MS) << 22) | (sequence & 0xFFF))
+
+
+def created_at(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).strftime("%a %b %d %H:%M:%S +0000 %Y")
+
+
+class FakeSite:
+    def __init__(self, handles, tweets_per_handle=5, latency=0.05, jitter=0.5, api_latency=None,
+                 page_failure_rate=0.0, post_failure_rate=0.0, ui_delay_ms=50, pinned_every=3,
+                 retweet_every=4, seed=1):
+        """
+        Initializes a FakeSite with a timeline for each handle.
+
+        Args:
+            handles (list): Handles that exist on the site.
+            tweets_per_handle (int): Tweets on each timeline at start.
+            latency (float): Seconds added to every page response.
+            jitter (float): Random extra latency, as a fraction of the latency.
+            api_latency (float, optional): Seconds added to API responses. Defaults to latency.
+            page_failure_rate (float): Fraction of page loads answered with an error page.
+            post_failure_rate (float): Fraction of posts rejected with HTTP 503.
+            ui_delay_ms (int): Delay before the repost menu and compose modal appear after a click.
+            pinned_every (int): Every Nth handle has a pinned (older) tweet; 0 disables.
+            retweet_every (int): Every Nth handle has a retweet as its second tweet; 0 disables.
+            seed (int): Seed of the latency and failure random generator.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.api_latency = latency if api_latency is None else api_latency
+        self.page_failure_rate = page_failure_rate
+        self.post_failure_rate = post_failure_rate
+        self.ui_delay_ms = ui_delay_ms
+        self.random = random.Random(seed)
+        self.timelines = {}
+        self.pinned = {}
+        self.posts = []
+        self.counters = {"page_loads": 0, "api_calls": 0, "posts": 0, "failed_pages": 0, "failed_posts": 0}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+        start = time.time() - 86400
+        for index, handle in enumerate(handles):
+            self.timelines[handle] = []
+            for n in range(tweets_per_handle):
+                self._add(handle, start + index + n * 600, f"Tweet {n + 1} from {handle}",
+                          retweet_of=("XDevelopers" if retweet_every and index % retweet_every == 0 and n == tweets_per_handle - 2 else None))
+            if pinned_every and index % pinned_every == 0:
+                self.pinned[handle] = self._tweet(handle, start - 30 * 86400, f"Pinned tweet from {handle}")
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _tweet(self, handle, timestamp, text, retweet_of=None):
+        with self._lock:
+            self._sequence += 1
+            tweet = {"id": snowflake(timestamp, self._sequence), "author": handle, "timestamp": timestamp, "text": text}
+        if retweet_of:
+            original = self._tweet(retweet_of, timestamp - 3600, f"Original tweet from {retweet_of}")
+            tweet["retweet_of"] = original
+        return tweet
+
+    def _add(self, handle, timestamp, text, retweet_of=None):
+        tweet = self._tweet(handle, timestamp, text, retweet_of)
+        with self._lock:
+            self.timelines[handle].insert(0, tweet)
+        return tweet
+
+    def publish(self, handle, count=1):
+        """
+        Adds `count` new tweets to the top of a handle's timeline. Returns their ids, newest first.
+        """
+        now = time.time()
+        return [self._add(handle, now + n / 1000.0, f"New tweet {n + 1} from {handle} at {now:.0f}")["id"]
+                for n in range(count)][::-1]
+
+    def find(self, tweet_id):
+        with self._lock:
+            for handle, tweets in self.timelines.items():
+                for tweet in tweets + ([self.pinned[handle]] if handle in self.pinned else []):
+                    if tweet["id"] == tweet_id:
+                        return tweet
+                    if tweet.get("retweet_of", {}).get("id") == tweet_id:
+                        return tweet["retweet_of"]
+        return None
+
+    def _result(self, tweet):
+        legacy = {"id_str": tweet["id"], "created_at": created_at(tweet["timestamp"]), "full_text": tweet["text"],
+                  "conversation_id_str": tweet["id"]}
+        if "retweet_of" in tweet:
+            original = tweet["retweet_of"]
+            legacy["full_text"] = f"RT @{original['author']}: {original['text']}"
+            legacy["retweeted_status_result"] = {"result": self._result(original)}
+        user = {"__typename": "User", "core": {"screen_name": tweet["author"], "name": tweet["author"]},
+                "legacy": {"screen_name": tweet["author"], "name": tweet["author"]}}
+        return {"__typename": "Tweet", "rest_id": tweet["id"], "core": {"user_results": {"result": user}},
+                "legacy": legacy}
+
+    @staticmethod
+    def _entry(result):
+        return {"entryId": f"tweet-{result['rest_id']}", "sortIndex": result["rest_id"],
+                "content": {"entryType": "TimelineTimelineItem", "__typename": "TimelineTimelineItem",
+                            "itemContent": {"itemType": "TimelineTweet", "__typename": "TimelineTweet",
+                                            "tweet_results": {"result": result}}}}
+
+    def user_tweets(self, handle):
+        """
+        Returns the UserTweets response for a handle.
+        """
+        with self._lock:
+            tweets = list(self.timelines.get(handle, []))
+            pinned = self.pinned.get(handle)
+        entries = [self._entry(self._result(tweet)) for tweet in tweets]
+        entries.append({"entryId": f"cursor-bottom-{tweets[-1]['id'] if tweets else 0}",
+                        "content": {"entryType": "TimelineTimelineCursor", "cursorType": "Bottom", "value": "fake"}})
+        instructions = [{"type": "TimelineClearCache"}, {"type": "TimelineAddEntries", "entries": entries}]
+        if pinned:
+            instructions.append({"type": "TimelinePinEntry", "entry": self._entry(self._result(pinned))})
+        return {"data": {"user": {"result": {"__typename": "User",
+                                             "timeline_v2": {"timeline": {"instructions": instructions}}}}}}
+
+    def count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def delay(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds * (1 + self.random.uniform(0, self.jitter)))
+
+    def fails(self, rate):
+        return rate > 0 and self.random.random() < rate
+
+    def render(self, template, **values):
+        page = (FIXTURES / template).read_text(encoding="utf-8")
+        values.setdefault("ui_delay_ms", self.ui_delay_ms)
+        for key, value in values.items():
+            page = page.replace("{{" + key + "}}", str(value))
+        return page
+
+    def start(self, host="127.0.0.1", port=0):
+        """
+        Starts serving on a background thread. Port 0 picks a free port (see base_url).
+        """
+        site = self
+
+        class Handler(FakeSiteHandler):
+            pass
+        Handler.site = site
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-site", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+class FakeSiteHandler(BaseHTTPRequestHandler):
+    site = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        site = self.site
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts[:3] == ["i", "api", "graphql"] and parts[-1] == "UserTweets":
+            site.count("api_calls")
+            site.delay(site.api_latency)
+            variables = json.loads(parse_qs(url.query).get("variables", ["{}"])[0])
+            self._send(200, json.dumps(site.user_tweets(variables.get("screen_name"))), "application/json")
+            return
+        if not parts or parts[0] in ("favicon.ico", "home"):
+            self._send(404 if parts and parts[0] == "favicon.ico" else 200, "<!DOCTYPE html><html><body></body></html>")
+            return
+        site.count("page_loads")
+        site.delay(site.latency)
+        if site.fails(site.page_failure_rate):
+            site.count("failed_pages")
+            self._send(503, ERROR_PAGE)
+            return
+        handle = parts[0]
+        if len(parts) >= 3 and parts[1] == "status":
+            tweet = site.find(parts[2])
+            if tweet is None:
+                self._send(404, ERROR_PAGE)
+                return
+            stamp = datetime.datetime.fromtimestamp(tweet["timestamp"], datetime.timezone.utc).isoformat()
+            self._send(200, site.render("tweet.html", handle=tweet["author"], name=tweet["author"],
+                                        tweet_id=tweet["id"], text=tweet["text"], datetime=stamp))
+        elif handle not in site.timelines:
+            self._send(404, NOT_FOUND_PAGE)
+        else:
+            self._send(200, site.render("profile.html", handle=handle, name=handle.capitalize()))
+
+    def do_POST(self):
+        site = self.site
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if not self.path.startswith("/i/api/graphql/fake/CreateTweet"):
+            self._send(404, "{}", "application/json")
+            return
+        site.delay(site.api_latency)
+        if site.fails(site.post_failure_rate):
+            site.count("failed_posts")
+            self._send(503, '{"errors": [{"message": "Over capacity"}]}', "application/json")
+            return
+        variables = json.loads(body or b"{}").get("variables", {})
+        with site._lock:
+            site.posts.append({"text": variables.get("tweet_text"), "quoted": variables.get("attachment_url"),
+                               "at": time.time()})
+        site.count("posts")
+        self._send(200, '{"data": {"create_tweet": {}}}', "application/json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the fake X site used by the offline benchmarks")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--handles", nargs="+", default=["alice", "bob", "carol"])
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    site = FakeSite(args.handles, latency=args.latency).start(port=args.port)
+    print(f"Serving {', '.join(args.handles)} at {site.base_url} (Ctrl+C to stop)")
+    try:
+        site.thread.join()
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+catchup.py
+
+This module contains the TimelineHarvester class which recovers tweets that are below the first render of a
+profile. Normal detection only sees the first screen of the timeline (or the first timeline response), so
+after an outage or a long scheduling gap the tweets further down were skipped without a warning.
+
+When the first screen has no tweet of the user at or below the stored high-water mark, the gap may continue
+below the fold. The harvester then scrolls the profile step by step and keeps compact records (ids, URLs,
+flags; no WebElements) of every tweet it passes. It stops when it reaches the mark, when `max_tweets` tweets
+are collected, after `max_scrolls` scrolls, or when the timeline stops growing. X's timeline is virtualised
+(tweets scrolled far out of view are removed from the DOM) and nothing is kept pointing at old articles, so
+DOM memory stays bounded however deep the harvester goes. The result reports how many new tweets were
+recovered from below the first screen and whether the mark was reached.
+"""
+
+import logging
+
+from batch_detection import SCROLL_JS
+from timeline import extract_timeline, numeric_id, classify, select_new
+
+logger = logging.getLogger(__name__)
+
+LAST_STATUS_JS = """
+var times = document.querySelectorAll("article[data-testid='tweet'] a[href*='/status/'] time");
+return times.length ? times[times.length - 1].closest("a").href : null;
+"""
+
+
+def reaches_mark(records, high_water):
+    """
+    Returns True if records contain one of the user's own tweets at or below the high-water mark, i.e. the
+    records cover every tweet newer than the mark.
+    """
+    for record in records:
+        tweet_id = numeric_id(record.get("id"))
+        if classify(record) == "tweet" and tweet_id is not None and tweet_id <= high_water:
+            return True
+    return False
+
+
+def timeline_advanced(previous_last):
+    """
+    Condition: the last rendered tweet is no longer `previous_last`, i.e. older tweets were loaded.
+    """
+    def _condition(driver):
+        last = driver.execute_script(LAST_STATUS_JS)
+        return last if last and last != previous_last else False
+    return _condition
+
+
+class CatchupResult:
+    def __init__(self, records, new_records, recovered, reached_mark, scrolls, max_dom_tweets):
+        """
+        Outcome of one catch-up harvest.
+
+        Attributes:
+            records (list): Every harvested record, most recent first (pinned tweet first).
+            new_records (list): The user's own tweets newer than the mark, most recent first.
+            recovered (int): New tweets that were not in the first-screen records.
+            reached_mark (bool): False if the harvest stopped before reaching the high-water mark.
+            scrolls (int): Scroll steps taken.
+            max_dom_tweets (int): Most tweet articles rendered at once while scrolling.
+        """
+        self.records = records
+        self.new_records = new_records
+        self.recovered = recovered
+        self.reached_mark = reached_mark
+        self.scrolls = scrolls
+        self.max_dom_tweets = max_dom_tweets
+
+
+class TimelineHarvester:
+    def __init__(self, bot, max_tweets=100, max_scrolls=30, max_stalls=2):
+        """
+        Initializes a TimelineHarvester.
+
+        Args:
+            bot (TwitterBot): Bot (or worker) whose driver shows the profile.
+            max_tweets (int): Most tweets collected before giving up on reaching the mark.
+            max_scrolls (int): Most scroll steps.
+            max_stalls (int): Consecutive scrolls that load nothing before the timeline is considered ended.
+        """
+        self.bot = bot
+        self.max_tweets = max_tweets
+        self.max_scrolls = max_scrolls
+        self.max_stalls = max_stalls
+
+    def harvest(self, high_water, first_screen=()):
+        """
+        Scrolls the profile currently loaded in the bot's driver until the high-water mark is reached or a
+        limit is hit.
+
+        Args:
+            high_water (int): Numeric id of the newest tweet already processed.
+            first_screen (list): Records detection already read; tweets among them are not counted as recovered.
+
+        Returns:
+            CatchupResult: The harvest.
+        """
+        driver = self.bot.driver
+        records = {}
+        for record in first_screen:
+            records.setdefault(record["id"], {k: v for k, v in record.items() if k != "element"})
+        scrolls = stalls = max_dom_tweets = 0
+        reached = False
+        while True:
+            visible = extract_timeline(driver) or []
+            max_dom_tweets = max(max_dom_tweets, len(visible))
+            for record in visible:
+                # Only the compact record is kept; the element reference is dropped right away.
+                records.setdefault(record["id"], {k: v for k, v in record.items() if k != "element"})
+            reached = reaches_mark(records.values(), high_water)
+            if reached or len(records) >= self.max_tweets or scrolls >= self.max_scrolls:
+                break
+            last = driver.execute_script(LAST_STATUS_JS)
+            at_end = driver.execute_script(SCROLL_JS)
+            scrolls += 1
+            if self.bot.waits.wait_for("catchup_scroll", timeline_advanced(last), raise_on_timeout=False) is None:
+                stalls += 1
+                if at_end or stalls >= self.max_stalls:
+                    break
+            else:
+                stalls = 0
+
+        ordered = sorted(records.values(), key=lambda r: (not r.get("pinned"), -(numeric_id(r["id"]) or 0)))
+        new_records = select_new(ordered, high_water)
+        seen_first = {record["id"] for record in first_screen}
+        recovered = sum(1 for record in new_records if record["id"] not in seen_first)
+        return CatchupResult(ordered, new_records, recovered, reached, scrolls, max_dom_tweets)
@@ -0,0 +1,236 @@
+"""
+checkpoints.py
+
+This module persists the resumable state of each bot run, so a crash, deploy or Chrome death does not lose it.
+A checkpoint holds:
+
+    - "config": everything needed to start the bot again (account, handles, hashtags, run options) except the
+      credentials, which are never written to disk (see CREDENTIAL_KEYS);
+    - "phase": "initial pass" or "monitoring";
+    - "completed": handles the initial pass has already finished, so a restart skips them;
+    - "pending": new tweets that were detected but not yet posted, as {"handle", "tweet_urls"} dicts.
+
+Checkpoints are JSON files in the checkpoints/ folder, one per bot ID, written atomically (temp file plus
+rename) and only readable by the owner. On startup, create_app() in app.py resumes every checkpoint it finds,
+supplying the credentials again; CheckpointStore.claim() makes sure only one process sharing the folder does
+so. A checkpoint is deleted when its run finishes or is cancelled.
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = "checkpoints"
+# Config keys kept in memory only
+CREDENTIAL_KEYS = ("password", "phone_number")
+
+
+class CheckpointStore:
+    def __init__(self, directory=CHECKPOINT_DIR):
+        """
+        Initializes a CheckpointStore.
+
+        Args:
+            directory (str): Folder the per-bot checkpoint files are written to.
+        """
+        self.directory = directory
+        self._lock_file = None
+
+    def claim(self):
+        """
+        Takes an exclusive, non-blocking lock on the checkpoint folder for the life of this process. Only the
+        process holding it may resume the checkpointed runs, so several server workers sharing the folder do
+        not all start the same bots.
+
+        Returns:
+            bool: True if this process holds the lock.
+        """
+        if self._lock_file is not None:
+            return True
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            lock_file = open(os.path.join(self.directory, ".resume.lock"), "a+")
+        except Exception as e:
+            logger.error(f"Could not open the checkpoint lock: {str(e)}")
+            return False
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def path_for(self, bot_id):
+        safe_id = "".join(c for c in str(bot_id) if c.isalnum() or c in "_-") or "bot"
+        return os.path.join(self.directory, f"{safe_id}.json")
+
+    def save(self, bot_id, state):
+        """
+        Writes a bot's checkpoint atomically. Returns True on success.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path_for(bot_id)
+            tmp_path = path + ".tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(dict(state, bot_id=bot_id, saved_at=time.time()), f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving checkpoint for bot {bot_id}: {str(e)}")
+            return False
+
+    def load(self, bot_id):
+        """
+        Returns a bot's checkpoint, or None if there is none or it cannot be read.
+        """
+        path = self.path_for(bot_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {str(e)}")
+            return None
+
+    def load_all(self):
+        """
+        Returns every readable checkpoint, oldest first.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        states = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                state = self.load(name[:-len(".json")])
+                if state and state.get("config"):
+                    states.append(state)
+        return sorted(states, key=lambda state: state.get("created_at", 0))
+
+    def delete(self, bot_id):
+        try:
+            os.remove(self.path_for(bot_id))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error deleting checkpoint for bot {bot_id}: {str(e)}")
+
+
+class BotCheckpoint:
+    def __init__(self, store, bot_id, config, state=None, min_interval=2.0):
+        """
+        The checkpoint of one bot run. Progress updates are cheap; the file is rewritten at most every
+        min_interval seconds unless a write is forced (phase changes, pending-tweet changes, flush()).
+
+        Args:
+            store (CheckpointStore): Where the checkpoint is written.
+            bot_id (str): The bot (job) ID.
+            config (dict): Options needed to recreate the run. CREDENTIAL_KEYS are left out of the file.
+            state (dict, optional): A loaded checkpoint to resume from.
+            min_interval (float): Minimum seconds between unforced writes.
+        """
+        state = state or {}
+        self.store = store
+        self.bot_id = bot_id
+        self.config = config
+        self.created_at = state.get("created_at", time.time())
+        self.phase = state.get("phase", "initial pass")
+        self.completed = set(state.get("completed", []))
+        self.pending = list(state.get("pending", []))
+        self.resumed = bool(state)
+        self.min_interval = min_interval
+        self._last_write = 0.0
+        self._dirty = False
+        self._discarded = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "config": {key: value for key, value in self.config.items() if key not in CREDENTIAL_KEYS},
+                "created_at": self.created_at,
+                "phase": self.phase,
+                "completed": sorted(self.completed),
+                "pending": list(self.pending),
+            }
+
+    def _changed(self, force=False):
+        with self._lock:
+            self._dirty = True
+            if not force and time.monotonic() - self._last_write < self.min_interval:
+                return
+        self.flush()
+
+    def flush(self, force=False):
+        """
+        Writes the checkpoint if anything changed since the last write (or always, with force=True).
+        """
+        with self._write_lock:
+            with self._lock:
+                if not (self._dirty or force) or self._discarded:
+                    return
+                self._dirty = False
+                self._last_write = time.monotonic()
+            self.store.save(self.bot_id, self.to_dict())
+
+    def set_phase(self, phase):
+        with self._lock:
+            self.phase = phase
+        self._changed(force=True)
+
+    def update_config(self, **changes):
+        """
+        Changes run options recorded in the checkpoint, e.g. the handle list after an update.
+        """
+        with self._lock:
+            self.config = dict(self.config, **changes)
+        self._changed(force=True)
+
+    def mark_done(self, handle):
+        with self._lock:
+            self.completed.add(handle)
+        self._changed()
+
+    def set_pending(self, jobs):
+        """
+        Replaces the detected-but-unposted tweets with the given {"handle", "tweet_urls"} dicts.
+        """
+        with self._lock:
+            self.pending = list(jobs)
+        self._changed(force=True)
+
+    def take_pending(self):
+        """
+        Returns the pending tweets recorded by a previous process. They stay in the checkpoint until
+        set_pending() replaces them.
+        """
+        with self._lock:
+            return list(self.pending)
+
+    def discard(self):
+        """
+        Deletes the checkpoint; called when the run finishes or is cancelled.
+        """
+        with self._lock:
+            self._discarded = True
+        self.store.delete(self.bot_id)
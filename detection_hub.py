@@ -0,0 +1,178 @@
+"""
+detection_hub.py
+
+This module contains the DetectionHub class which shares new-tweet detection between bots that watch the same
+handles. Without it every bot loads every monitored profile on its own driver, so five bots watching the same
+200 handles load each profile five times per sweep.
+
+Bots subscribe to their handles and get an inbox. When a bot finds a handle due, it asks the hub to check it:
+if the hub scraped that handle less than `ttl` seconds ago the cached timeline is reused, and if another bot is
+scraping it right now the caller waits for that result instead of loading the page again. Only a real scrape
+compares the timeline against the handle's high-water mark (numeric snowflake ids; pinned tweets and retweets
+are ignored) and publishes the new tweets to the inbox of every subscribed bot, which then only posts them.
+Scrape load therefore scales with the number of unique handles, not with bots x handles.
+"""
+
+import time
+import queue
+import threading
+import logging
+
+from ledger import get_ledger
+from handle_lists import handle_key
+from timeline import numeric_id, select_new
+
+logger = logging.getLogger(__name__)
+
+
+class DetectionHub:
+    def __init__(self, ttl=60, ledger=None):
+        """
+        Initializes a DetectionHub.
+
+        Args:
+            ttl (int): Seconds a scraped timeline is reused before the handle is scraped again.
+            ledger (TweetLedger, optional): Ledger used for the initial high-water mark of a handle.
+        """
+        self.ttl = ttl
+        self.ledger = ledger or get_ledger()
+        self.cache = {}
+        self.marks = {}
+        self.inflight = {}
+        self.subscribers = {}
+        self.counters = {"scrapes": 0, "cache_hits": 0, "coalesced": 0, "failed": 0, "events": 0, "deliveries": 0}
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscriber, handles):
+        """
+        Subscribes a bot to new-tweet events for the given handles.
+
+        Returns:
+            queue.Queue: The bot's inbox, receiving (handle, [status URLs, most recent first]) tuples.
+        """
+        with self._lock:
+            entry = self.subscribers.get(subscriber)
+            if entry is None:
+                entry = self.subscribers[subscriber] = {"handles": {}, "inbox": queue.Queue()}
+            for handle in handles:
+                entry["handles"][handle_key(handle)] = handle
+            logger.info(f"{subscriber} subscribed to {len(handles)} handles, "
+                        f"{len(self._unique_handles())} unique handles watched")
+            return entry["inbox"]
+
+    def unsubscribe(self, subscriber, handles=None):
+        """
+        Unsubscribes a bot from the given handles, or from everything if handles is None.
+        """
+        with self._lock:
+            if handles is None:
+                self.subscribers.pop(subscriber, None)
+                return
+            entry = self.subscribers.get(subscriber)
+            if entry is not None:
+                for handle in handles:
+                    entry["handles"].pop(handle_key(handle), None)
+
+    def _unique_handles(self):
+        return {key for entry in self.subscribers.values() for key in entry["handles"]}
+
+    def _mark(self, key, handle):
+        if key not in self.marks:
+            self.marks[key] = numeric_id(self.ledger.get(handle))
+        return self.marks[key]
+
+    def check(self, handle, fetch):
+        """
+        Returns the latest timeline of a handle, scraping it with fetch() only if the cached one is older than
+        the TTL and no other bot is already scraping it. New tweets found by a scrape are published to every
+        subscriber of the handle.
+
+        Args:
+            handle (str): Twitter handle.
+            fetch (callable): Scrapes the handle's timeline and returns tweet records, or None on failure.
+
+        Returns:
+            list: Tweet records, or None if the scrape failed.
+        """
+        key = handle_key(handle)
+        while True:
+            with self._lock:
+                cached = self.cache.get(key)
+                if cached and time.monotonic() - cached[0] < self.ttl:
+                    self.counters["cache_hits"] += 1
+                    return cached[1]
+                pending = self.inflight.get(key)
+                if pending is None:
+                    pending = self.inflight[key] = threading.Event()
+                    break
+                self.counters["coalesced"] += 1
+            pending.wait()
+            with self._lock:
+                cached = self.cache.get(key)
+            if cached:
+                return cached[1]
+            # The other scrape failed; try ourselves.
+
+        try:
+            records = fetch()
+            if records is not None:
+                # Element references belong to the scraping bot's driver; only the data is shared.
+                records = [{k: v for k, v in record.items() if k != "element"} for record in records]
+        except Exception as e:
+            logger.error(f"Shared detection scrape of {handle} failed: {str(e)}")
+            records = None
+        with self._lock:
+            del self.inflight[key]
+            if records is None:
+                self.counters["failed"] += 1
+                pending.set()
+                return None
+            self.counters["scrapes"] += 1
+            self.cache[key] = (time.monotonic(), records)
+            new_urls = self._new_urls(key, handle, records)
+            inboxes = [entry["inbox"] for entry in self.subscribers.values() if key in entry["handles"]]
+            if new_urls:
+                self.counters["events"] += 1
+                self.counters["deliveries"] += len(inboxes)
+        pending.set()
+        if new_urls:
+            for inbox in inboxes:
+                inbox.put((handle, new_urls))
+            logger.info(f"Published {len(new_urls)} new tweet(s) of {handle} to {len(inboxes)} bot(s)")
+        return records
+
+    def _new_urls(self, key, handle, records):
+        # Called with the lock held. Advances the handle's high-water mark.
+        mark = self._mark(key, handle)
+        new = select_new(records, mark)
+        if new:
+            self.marks[key] = max(mark or 0, numeric_id(new[0]["id"]))
+        return [record["url"] for record in new]
+
+    def stats(self):
+        """
+        Returns scrape and cache counters, e.g.
+        {"unique_handles": 200, "subscribers": 5, "scrapes": 180, "cache_hits": 720, "coalesced": 12, ...}
+        """
+        with self._lock:
+            stats = dict(self.counters)
+            stats["unique_handles"] = len(self._unique_handles())
+            stats["subscribers"] = len(self.subscribers)
+            stats["subscriptions"] = sum(len(entry["handles"]) for entry in self.subscribers.values())
+            stats["ttl"] = self.ttl
+            return stats
+
+
+_default_hub = None
+_default_hub_lock = threading.Lock()
+
+
+def get_hub():
+    """
+    Returns the process-wide DetectionHub shared by all bots, creating it on first use.
+    """
+    global _default_hub
+    with _default_hub_lock:
+        if _default_hub is None:
+            _default_hub = DetectionHub()
+        return _default_hub
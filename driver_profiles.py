@@ -0,0 +1,104 @@
+"""
+driver_profiles.py
+
+This module defines named Chrome driver profiles used by get_driver(). A profile describes the Chrome options
+(headless mode, cache size, page load strategy, content settings) and the URL patterns blocked at runtime
+through the DevTools protocol. Profiles with "network_capture" enabled start Chrome with the performance log
+on, so network_capture.py can read the timeline JSON responses instead of scraping the DOM.
+
+    - "default": A headed Chrome with no extra options (the original behaviour, useful for manual login checks).
+    - "detect": Headless, images, media, fonts and analytics blocked, small cache, network capture on. For
+      profile/timeline checks.
+    - "post": Headless, media, fonts and analytics blocked but images kept, so compose/quote previews render.
+"""
+
+import logging
+
+from selenium import webdriver
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PATTERNS = ["*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*pbs.twimg.com/media/*"]
+MEDIA_PATTERNS = ["*.mp4", "*.m3u8", "*.m4s", "*.ts", "*video.twimg.com*", "*.mp3"]
+FONT_PATTERNS = ["*.woff", "*.woff2", "*.ttf", "*.otf"]
+ANALYTICS_PATTERNS = ["*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+                      "*analytics.twitter.com*", "*/jot/*", "*/1.1/jot/*"]
+
+DRIVER_PROFILES = {
+    "default": {
+        "headless": False,
+        "arguments": [],
+        "prefs": {},
+        "page_load_strategy": "normal",
+        "blocked_urls": [],
+        "network_capture": False,
+    },
+    "detect": {
+        "headless": True,
+        "arguments": ["--disable-gpu", "--disk-cache-size=1048576", "--blink-settings=imagesEnabled=false",
+                      "--mute-audio", "--disable-extensions", "--window-size=1280,2000"],
+        "prefs": {"profile.managed_default_content_settings.images": 2},
+        "page_load_strategy": "eager",
+        "blocked_urls": IMAGE_PATTERNS + MEDIA_PATTERNS + FONT_PATTERNS + ANALYTICS_PATTERNS,
+        "network_capture": True,
+    },
+    "post": {
+        "headless": True,
+        "arguments": ["--disable-gpu", "--disk-cache-size=8388608", "--mute-audio", "--disable-extensions",
+                      "--window-size=1280,1000"],
+        "prefs": {},
+        "page_load_strategy": "eager",
+        "blocked_urls": MEDIA_PATTERNS + FONT_PATTERNS + ANALYTICS_PATTERNS,
+        "network_capture": False,
+    },
+}
+
+
+def get_profile(name):
+    """
+    Returns the settings of a named driver profile, raising ValueError for unknown names.
+    """
+    try:
+        return DRIVER_PROFILES[name or "default"]
+    except KeyError:
+        raise ValueError(f"Unknown driver profile: {name}. Available profiles: {', '.join(DRIVER_PROFILES)}")
+
+
+def build_options(name):
+    """
+    Builds ChromeOptions for a named driver profile.
+
+    Args:
+        name (str): Profile name, e.g. "detect".
+
+    Returns:
+        webdriver.ChromeOptions: The configured options.
+    """
+    profile = get_profile(name)
+    options = webdriver.ChromeOptions()
+    if profile["headless"]:
+        options.add_argument("--headless=new")
+    for argument in profile["arguments"]:
+        options.add_argument(argument)
+    if profile["prefs"]:
+        options.add_experimental_option("prefs", profile["prefs"])
+    options.page_load_strategy = profile["page_load_strategy"]
+    if profile.get("network_capture"):
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def apply_runtime_settings(driver, name):
+    """
+    Applies the DevTools-level settings of a profile (blocked URLs) to a running driver.
+    Failures are logged and ignored, since blocking is an optimisation only.
+    """
+    profile = get_profile(name)
+    if not profile["blocked_urls"]:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": profile["blocked_urls"]})
+        logger.info(f"Driver profile '{name}': blocking {len(profile['blocked_urls'])} URL patterns")
+    except Exception as e:
+        logger.warning(f"Could not apply URL blocking for driver profile '{name}': {str(e)}")
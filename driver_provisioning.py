@@ -0,0 +1,131 @@
+"""
+driver_provisioning.py
+
+This module finds the ChromeDriver used by get_driver(). It used to be installed by app.py at import time, which
+ran `chrome --version`, usually a network lookup of the matching driver release and sometimes a download on
+every start and every debug reload, and failed the whole web app if any step failed.
+
+Provisioning now happens the first time a browser is launched, once per process. The driver path is cached in
+chromedriver_cache.json together with the Chrome version it was installed for. While the installed Chrome has
+the same major version and the cached driver still exists, the cached path is used without asking
+chromedriver_autoinstaller again. When Chrome is updated, or a launch fails with a version mismatch (see
+invalidate_chromedriver()), a matching driver is installed again. Without chromedriver_autoinstaller, driver
+lookup is left to Selenium.
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = "chromedriver_cache.json"
+VERSION_MISMATCH_MARKERS = ("only supports chrome version", "this version of chromedriver")
+
+_driver_path = None
+_provisioned = False
+_lock = threading.Lock()
+
+
+def chrome_major(version):
+    return version.split(".")[0] if version else None
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable ChromeDriver cache {cache_path}: {str(e)}")
+        return None
+
+
+def _save_cache(cache_path, entry):
+    try:
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logger.warning(f"Could not write ChromeDriver cache {cache_path}: {str(e)}")
+
+
+def _provision(cache_path):
+    try:
+        import chromedriver_autoinstaller
+    except ImportError:
+        logger.info("chromedriver_autoinstaller is not installed; leaving ChromeDriver lookup to Selenium")
+        return None
+    try:
+        chrome_version = chromedriver_autoinstaller.get_chrome_version()
+    except Exception as e:
+        logger.warning(f"Could not read the installed Chrome version: {str(e)}")
+        chrome_version = None
+
+    cached = _load_cache(cache_path) or {}
+    driver_path = cached.get("driver_path")
+    if (chrome_version and chrome_major(cached.get("chrome_version")) == chrome_major(chrome_version)
+            and driver_path and os.access(driver_path, os.X_OK)):
+        logger.info(f"Using cached ChromeDriver {driver_path} for Chrome {chrome_version}")
+    else:
+        start = time.monotonic()
+        try:
+            driver_path = chromedriver_autoinstaller.install()
+        except Exception as e:
+            logger.error(f"ChromeDriver install failed: {str(e)}")
+            return None
+        if not driver_path:
+            return None
+        logger.info(f"Installed ChromeDriver {driver_path} for Chrome {chrome_version} "
+                    f"in {time.monotonic() - start:.1f}s")
+        _save_cache(cache_path, {"chrome_version": chrome_version, "driver_path": driver_path,
+                                 "installed_at": time.time()})
+
+    # Like chromedriver_autoinstaller.install(), put the driver folder on PATH for anything spawning chromedriver
+    directory = os.path.dirname(driver_path)
+    if directory not in os.environ.get("PATH", "").split(os.pathsep):
+        os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+    return driver_path
+
+
+def ensure_chromedriver(cache_path=CACHE_PATH):
+    """
+    Returns the path of a ChromeDriver matching the installed Chrome, provisioning it on the first call.
+
+    Returns:
+        str: The driver path, or None to let Selenium locate a driver itself.
+    """
+    global _driver_path, _provisioned
+    with _lock:
+        if not _provisioned:
+            _driver_path = _provision(cache_path)
+            _provisioned = True
+        return _driver_path
+
+
+def invalidate_chromedriver(cache_path=CACHE_PATH):
+    """
+    Forgets the provisioned driver, so the next ensure_chromedriver() installs one again.
+    """
+    global _driver_path, _provisioned
+    with _lock:
+        _driver_path = None
+        _provisioned = False
+        try:
+            os.remove(cache_path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not remove ChromeDriver cache {cache_path}: {str(e)}")
+
+
+def is_version_mismatch(error):
+    """
+    Returns True if a driver launch error says ChromeDriver does not match the installed Chrome.
+    """
+    message = str(error).lower()
+    return any(marker in message for marker in VERSION_MISMATCH_MARKERS)
@@ -0,0 +1,155 @@
+"""
+handle_lists.py
+
+This module reads the uploaded lists of handles to monitor. Lines are streamed, never read into memory at
+once, so lists of 100k+ handles load in constant extra memory besides the handles themselves. Each line is
+normalised to a bare handle:
+
+    alice, @alice, https://x.com/alice, twitter.com/alice/status/123, mobile.twitter.com/alice?lang=en
+
+Handles are deduplicated case-insensitively (X handles are), keeping the first spelling seen. Blank lines and
+lines starting with "#" are skipped; anything else that is not a handle is rejected and reported with its
+line number. diff_handles() compares a new list with a running bot's list, so only the added and removed
+handles are applied to the bot (see TwitterBot.update_handles()).
+"""
+
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+HANDLE_RE = re.compile(r"^[A-Za-z0-9_]{1,15}$")
+PROFILE_URL_RE = re.compile(r"^(?:https?://)?(?:www\.|mobile\.)?(?:twitter|x)\.com/(?P<handle>[^/?#\s]+)",
+                            re.IGNORECASE)
+# First path segments of x.com that are app routes, not profiles
+RESERVED = {"home", "explore", "search", "i", "settings", "notifications", "messages", "compose", "intent",
+            "share", "hashtag", "login", "logout", "signup", "tos", "privacy", "account", "jobs"}
+MAX_REPORTED_ERRORS = 100
+
+
+def handle_key(handle):
+    return handle.lstrip("@").lower()
+
+
+def normalize_handle(text):
+    """
+    Returns the bare handle written on a line (a handle, @handle or profile/status URL).
+
+    Raises:
+        ValueError: with the reason if the line is not a handle.
+    """
+    value = text.strip()
+    match = PROFILE_URL_RE.match(value)
+    if match:
+        value = match.group("handle")
+    elif "/" in value or "://" in value:
+        raise ValueError("not an X profile URL")
+    if value.startswith("@"):
+        value = value[1:]
+    if not HANDLE_RE.match(value):
+        raise ValueError("not a valid handle (1-15 letters, digits or underscores)")
+    if value.lower() in RESERVED:
+        raise ValueError(f"'{value}' is an x.com page, not a handle")
+    return value
+
+
+class HandleList:
+    def __init__(self):
+        """
+        Handles read from one upload.
+
+        Attributes:
+            handles (list): Normalised, deduplicated handles in upload order.
+            keys (set): Lowercase handles, for membership tests.
+            lines (int): Lines read.
+            duplicates (int): Lines repeating an earlier handle.
+            errors (list): The first MAX_REPORTED_ERRORS rejected lines as (line number, line, reason).
+            error_count (int): Total rejected lines.
+        """
+        self.handles = []
+        self.keys = set()
+        self.lines = 0
+        self.duplicates = 0
+        self.errors = []
+        self.error_count = 0
+
+    def add_line(self, line_number, line):
+        text = line.strip()
+        if not text or text.startswith("#"):
+            return
+        try:
+            handle = normalize_handle(text)
+        except ValueError as e:
+            self.error_count += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append((line_number, text[:100], str(e)))
+            return
+        key = handle.lower()
+        if key in self.keys:
+            self.duplicates += 1
+            return
+        self.keys.add(key)
+        self.handles.append(handle)
+
+    def summary(self):
+        return {
+            "handles": len(self.handles),
+            "lines": self.lines,
+            "duplicates": self.duplicates,
+            "rejected": self.error_count,
+            "errors": [{"line": number, "text": text, "reason": reason} for number, text, reason in self.errors],
+        }
+
+
+def ingest_lines(lines):
+    """
+    Builds a HandleList from an iterable of text lines.
+    """
+    handle_list = HandleList()
+    for line_number, line in enumerate(lines, 1):
+        handle_list.lines = line_number
+        handle_list.add_line(line_number, line)
+    if handle_list.error_count:
+        logger.warning(f"Rejected {handle_list.error_count} of {handle_list.lines} lines of a handle list")
+    return handle_list
+
+
+def ingest_stream(stream):
+    """
+    Builds a HandleList from a binary stream, e.g. an uploaded file's stream.
+    """
+    def lines():
+        for number, raw in enumerate(iter(stream.readline, b"")):
+            line = raw.decode("utf-8", errors="replace")
+            yield line.lstrip("\ufeff") if number == 0 else line
+    return ingest_lines(lines())
+
+
+def ingest_file(file_path):
+    """
+    Builds a HandleList from a text file.
+    """
+    with open(file_path, mode="r", encoding="utf-8-sig", errors="replace") as file:
+        return ingest_lines(file)
+
+
+def load_accounts_list(file_path):
+    """
+    Returns the normalised, deduplicated handles of a handle list file.
+    """
+    return ingest_file(file_path).handles
+
+
+def diff_handles(current, new):
+    """
+    Compares a bot's current handles with a new list (case-insensitively).
+
+    Returns:
+        tuple(list, list): Handles of `new` missing from `current` (in new's order) and handles of `current`
+                           missing from `new` (as spelled in `current`).
+    """
+    current_keys = {handle_key(handle) for handle in current}
+    new_keys = {handle_key(handle) for handle in new}
+    added = [handle for handle in new if handle_key(handle) not in current_keys]
+    removed = [handle for handle in current if handle_key(handle) not in new_keys]
+    return added, removed
@@ -0,0 +1,231 @@
+"""
+ledger.py
+
+This module contains the TweetLedger class which keeps track of the last processed tweet id for every
+monitored user. The ledger holds an in-memory index of `handle -> tweet id`, appends every update to a
+write-ahead log next to the snapshot file and periodically folds the log back into the snapshot from a
+background thread. The snapshot keeps the original `handle: id` text format of posted_tweet_ids.txt, so
+existing files are picked up as-is and older tooling can still read them.
+"""
+
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = "posted_tweet_ids.txt"
+
+# Shared ledgers, one per snapshot path, so that every bot thread works on the same index.
+_ledgers = {}
+_ledgers_lock = threading.Lock()
+
+
+def parse_ledger_line(line):
+    """
+    Parses a single `handle: id` line.
+
+    Args:
+        line (str): A line from the snapshot or the write-ahead log.
+
+    Returns:
+        tuple(str, str): The handle and tweet id, or None if the line is malformed.
+    """
+    parts = line.strip().split(":", 1)
+    if len(parts) != 2:
+        return None
+    uid = parts[0].strip()
+    tweet_id = parts[1].strip()
+    if not uid or not tweet_id:
+        return None
+    return uid, tweet_id
+
+
+class TweetLedger:
+    def __init__(self, path=DEFAULT_LEDGER_PATH, compact_threshold=500, compact_interval=60):
+        """
+        Initializes a TweetLedger and loads the snapshot and write-ahead log from disk.
+
+        Args:
+            path (str): Path of the snapshot file (the legacy posted_tweet_ids.txt).
+            compact_threshold (int): Number of log entries after which the background thread compacts.
+            compact_interval (int): Seconds between background compaction checks.
+
+        Attributes:
+            wal_path (str): Path of the append-only write-ahead log.
+            index (dict): In-memory mapping of user IDs to their last processed tweet id.
+        """
+        self.path = path
+        self.wal_path = path + ".wal"
+        self.compact_threshold = compact_threshold
+        self.compact_interval = compact_interval
+        self.index = {}
+        self.wal_entries = 0
+        self._lock = threading.RLock()
+        self._wal_file = None
+        self._stop_event = threading.Event()
+        self._compactor = None
+        self.load()
+
+    def load(self):
+        """
+        Rebuilds the in-memory index from the snapshot followed by the write-ahead log (last entry wins).
+        """
+        with self._lock:
+            self.index = {}
+            self.wal_entries = 0
+            for file_path, is_wal in ((self.path, False), (self.wal_path, True)):
+                if not os.path.exists(file_path):
+                    continue
+                try:
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        for line in f:
+                            entry = parse_ledger_line(line)
+                            if entry:
+                                self.index[entry[0]] = entry[1]
+                                if is_wal:
+                                    self.wal_entries += 1
+                except Exception as e:
+                    logger.error(f"Error loading ledger file {file_path}: {str(e)}")
+            logger.info(f"Loaded ledger with {len(self.index)} users ({self.wal_entries} pending log entries)")
+
+    def get(self, user_id):
+        """
+        Returns the last processed tweet id for the given user, or None if the user has none.
+        """
+        with self._lock:
+            return self.index.get(user_id)
+
+    def get_ids(self, user_id):
+        """
+        Returns the logged tweet ids for the given user as a set (at most one id per user).
+        """
+        tweet_id = self.get(user_id)
+        return {tweet_id} if tweet_id else set()
+
+    def update(self, user_id, tweet_id):
+        """
+        Records a new last processed tweet id for the user. The entry is appended to the write-ahead log
+        and flushed before the in-memory index is updated, so a crash never loses an acknowledged update.
+
+        Args:
+            user_id (str): Twitter handle of the user.
+            tweet_id (str): Tweet id to store.
+        """
+        with self._lock:
+            if self.index.get(user_id) == tweet_id:
+                return
+            self._append(user_id, tweet_id)
+        self.ensure_compactor()
+
+    def advance(self, user_id, tweet_id):
+        """
+        Raises the user's high-water mark to tweet_id if it is a newer snowflake than the stored id.
+        Stored ids that are not numeric (from older versions) are always replaced.
+
+        Returns:
+            bool: True if the mark moved.
+        """
+        with self._lock:
+            current = self.index.get(user_id)
+            if current is not None and current.isdigit() and int(current) >= int(tweet_id):
+                return False
+            self._append(user_id, tweet_id)
+        self.ensure_compactor()
+        return True
+
+    def _append(self, user_id, tweet_id):
+        # Called with the lock held.
+        if self._wal_file is None:
+            self._wal_file = open(self.wal_path, "a", encoding="utf-8")
+        self._wal_file.write(f"{user_id}: {tweet_id}\n")
+        self._wal_file.flush()
+        os.fsync(self._wal_file.fileno())
+        self.index[user_id] = tweet_id
+        self.wal_entries += 1
+
+    def compact(self):
+        """
+        Writes the current index to the snapshot file (atomically, via a temporary file) and truncates
+        the write-ahead log.
+        """
+        with self._lock:
+            if self.wal_entries == 0 and os.path.exists(self.path):
+                return
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for uid, tid in self.index.items():
+                    f.write(f"{uid}: {tid}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            # Replaying the old log over the new snapshot is idempotent, so truncating last is safe.
+            if self._wal_file is not None:
+                self._wal_file.close()
+                self._wal_file = None
+            if os.path.exists(self.wal_path):
+                os.remove(self.wal_path)
+            logger.info(f"Compacted ledger {self.path}: {len(self.index)} users, {self.wal_entries} log entries folded")
+            self.wal_entries = 0
+
+    def ensure_compactor(self):
+        """
+        Starts the background compaction thread if it is not running yet.
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._stop_event.clear()
+            self._compactor = threading.Thread(target=self._compact_loop, name="ledger-compactor", daemon=True)
+            self._compactor.start()
+
+    def _compact_loop(self):
+        while not self._stop_event.wait(self.compact_interval):
+            try:
+                if self.wal_entries >= self.compact_threshold:
+                    self.compact()
+            except Exception as e:
+                logger.error(f"Error compacting ledger {self.path}: {str(e)}")
+
+    def close(self):
+        """
+        Stops the background compactor, compacts any pending log entries and closes the log file.
+        """
+        self._stop_event.set()
+        if self._compactor is not None:
+            self._compactor.join(timeout=5)
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"Error compacting ledger {self.path} on close: {str(e)}")
+
+
+def get_ledger(path=DEFAULT_LEDGER_PATH):
+    """
+    Returns the shared TweetLedger for the given snapshot path, creating it on first use.
+    """
+    key = os.path.abspath(path)
+    with _ledgers_lock:
+        ledger = _ledgers.get(key)
+        if ledger is None:
+            ledger = TweetLedger(path)
+            _ledgers[key] = ledger
+        return ledger
+
+
+def migrate_legacy_file(path=DEFAULT_LEDGER_PATH):
+    """
+    Normalises a legacy posted_tweet_ids.txt in place: malformed lines are dropped and duplicate handles
+    collapse to their last entry. The result is a valid ledger snapshot.
+
+    Returns:
+        int: Number of users in the migrated snapshot.
+    """
+    ledger = get_ledger(path)
+    with ledger._lock:
+        ledger.load()
+        ledger.wal_entries = max(ledger.wal_entries, 1)
+        ledger.compact()
+        return len(ledger.index)
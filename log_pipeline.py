@@ -0,0 +1,168 @@
+"""
+log_pipeline.py
+
+This module sets up the non-blocking logging pipeline used by the bot. Bot threads only put records on an
+in-memory queue (QueueHandler); a single QueueListener thread does all console and file I/O. The log file
+is written as JSON lines carrying the bot_id, handle and phase of the thread that logged, and is rotated by
+size (or by time, if a rotation interval is given). Noisy DEBUG lines are sampled before they are queued.
+
+Bot code sets the context of the current thread with set_log_context(bot_id=..., handle=..., phase=...).
+"""
+
+import json
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+
+CONTEXT_FIELDS = ("bot_id", "handle", "phase")
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_context = threading.local()
+_listener = None
+_configure_lock = threading.Lock()
+
+
+def set_log_context(**fields):
+    """
+    Sets (or, with None, clears) context fields for log records emitted by the current thread.
+    """
+    for key, value in fields.items():
+        if key not in CONTEXT_FIELDS:
+            raise ValueError(f"Unknown log context field: {key}")
+        setattr(_context, key, value)
+
+
+def get_log_context():
+    return {key: getattr(_context, key, None) for key in CONTEXT_FIELDS}
+
+
+class ContextFilter(logging.Filter):
+    """
+    Copies the emitting thread's context onto the record. Runs on the emitting thread, before queueing.
+    """
+    def filter(self, record):
+        for key in CONTEXT_FIELDS:
+            if not hasattr(record, key):
+                setattr(record, key, getattr(_context, key, None))
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keeps one in every `every` DEBUG records per call site; other levels always pass. Records are grouped by
+    the file and line that logged them, since the messages are formatted with f-strings before they get here.
+    """
+    def __init__(self, every=10):
+        super().__init__()
+        self.every = max(1, int(every))
+        self.counts = {}
+
+    def filter(self, record):
+        if record.levelno != logging.DEBUG or self.every == 1:
+            return True
+        key = (record.pathname, record.lineno)
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+        if len(self.counts) > 10000:
+            self.counts.clear()
+        return count % self.every == 0
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line.
+    """
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class FastQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler whose prepare() only merges the message arguments (and any traceback) on the emitting
+    thread. The stock prepare() runs a full Formatter and copies the record, which is most of its cost.
+    """
+    def prepare(self, record):
+        message = record.getMessage()
+        if record.exc_info:
+            message = message + "\n" + logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+            record.exc_text = None
+        record.msg = message
+        record.args = None
+        return record
+
+
+def configure_logging(path="twitter_bot.log", level=logging.INFO, max_bytes=10 * 1024 * 1024, backup_count=5,
+                      when=None, debug_sample_every=10, console=True):
+    """
+    Installs the queue-based pipeline on the root logger. Calling it again is a no-op.
+
+    Args:
+        path (str): Log file path (JSON lines).
+        level (int): Root log level.
+        max_bytes (int): Rotate when the file reaches this size (ignored if `when` is given).
+        backup_count (int): Number of rotated files kept.
+        when (str, optional): Time-based rotation interval for TimedRotatingFileHandler, e.g. "midnight" or "H".
+        debug_sample_every (int): Keep one in every N DEBUG records per call site.
+        console (bool): Also write human-readable lines to stderr.
+
+    Returns:
+        logging.handlers.QueueListener: The running listener.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return _listener
+        if when:
+            file_handler = logging.handlers.TimedRotatingFileHandler(path, when=when, backupCount=backup_count,
+                                                                     encoding="utf-8", delay=True)
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                                encoding="utf-8", delay=True)
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers = [file_handler]
+        if console:
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+            handlers.append(stream_handler)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = FastQueueHandler(log_queue)
+        queue_handler.addFilter(DebugSampler(debug_sample_every))
+        queue_handler.addFilter(ContextFilter())
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """
+    Flushes the queue and stops the writer thread.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
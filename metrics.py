@@ -0,0 +1,244 @@
+"""
+metrics.py
+
+This module keeps in-process counters, gauges and latency histograms and renders them in the Prometheus text
+exposition format (served by the /metrics route in app.py). It has no dependencies, so the bot does not need
+prometheus_client.
+
+TwitterBot wraps each phase (login, profile navigation, tweet extraction, find_tweet, the quote/repost flow and
+the post confirmation) with track() or the @timed() decorator, which record a per-bot, per-phase latency
+histogram sample and a success or failure count:
+
+    with track(self.bot_id, "extract") as span:
+        records = ...
+        if records is None:
+            span.fail()
+"""
+
+import math
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+STANDALONE = "standalone"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self.values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self.function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """
+        Computes the gauge at scrape time. The function returns a number (unlabelled gauge) or a dict mapping
+        label value tuples to numbers.
+        """
+        self.function = function
+
+    def render(self):
+        if self.function is not None:
+            value = self.function()
+            items = sorted(value.items()) if isinstance(value, dict) else [((), value)]
+        else:
+            with self._lock:
+                items = sorted(self.values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, dict(entry, counts=list(entry["counts"]))) for key, entry in self.values.items())
+        lines = self.header()
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, ('le', _number(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(entry['sum'])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {entry['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        A named collection of metrics. Creating a metric that already exists returns the existing one.
+        """
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, labelnames, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def render(self):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+PHASE_SECONDS = registry.histogram("twitter_bot_phase_seconds", "Latency of bot phases in seconds.",
+                                   ("bot_id", "phase"))
+PHASE_TOTAL = registry.counter("twitter_bot_phase_total", "Completed bot phases by outcome.",
+                               ("bot_id", "phase", "outcome"))
+ACTIVE_DRIVERS = registry.gauge("twitter_bot_active_drivers", "Open browser sessions across all bots.")
+TWEETS_DETECTED = registry.counter("twitter_bot_tweets_detected_total", "New tweets detected.", ("bot_id",))
+TWEETS_POSTED = registry.counter("twitter_bot_tweets_posted_total", "Tweets quoted or reposted.", ("bot_id",))
+TWEETS_RECOVERED = registry.counter("twitter_bot_tweets_recovered_total",
+                                    "New tweets found below the first screen by catch-up scrolling.", ("bot_id",))
+
+
+class Span:
+    def __init__(self):
+        self.ok = True
+
+    def fail(self):
+        self.ok = False
+
+
+@contextmanager
+def track(bot_id, phase):
+    """
+    Times the enclosed block as one `phase` of a bot. The phase counts as failed if the block raises or
+    calls span.fail().
+    """
+    span = Span()
+    start = time.monotonic()
+    try:
+        yield span
+    except BaseException:
+        span.fail()
+        raise
+    finally:
+        bot_id = bot_id or STANDALONE
+        PHASE_SECONDS.observe(time.monotonic() - start, bot_id=bot_id, phase=phase)
+        PHASE_TOTAL.inc(bot_id=bot_id, phase=phase, outcome="success" if span.ok else "failure")
+
+
+def timed(phase):
+    """
+    Decorator for TwitterBot methods: times each call as `phase`, counting falsy return values as failures.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with track(self.bot_id, phase) as span:
+                result = method(self, *args, **kwargs)
+                if not result:
+                    span.fail()
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,208 @@
+"""
+network_capture.py
+
+This module reads tweets from the timeline JSON the X web app fetches, instead of scraping the rendered
+`article` elements. The driver is started with Chrome's performance log enabled (see driver_profiles.py);
+after a profile page is requested, the UserTweets GraphQL response is located in the log, its body is
+fetched through the DevTools protocol and parsed into the same compact records timeline.py produces
+(without the "element" key). The DOM extraction in timeline.py remains the fallback.
+
+parse_timeline() is a pure function over the response JSON. tests/test_network_capture.py checks it against
+recorded responses, which can also be printed as records:
+
+    python network_capture.py benchmarks/fixtures/user_tweets.json
+"""
+
+import sys
+import json
+import time
+import logging
+import datetime
+
+logger = logging.getLogger(__name__)
+
+TIMELINE_OPERATIONS = ("/UserTweets", "/UserTweetsAndReplies", "/SearchTimeline", "/ListLatestTweetsTimeline")
+TEXT_LIMIT = 280
+
+
+def drain(driver):
+    """
+    Discards buffered performance log entries, so the next read only sees the next page's traffic.
+    """
+    try:
+        driver.get_log("performance")
+    except Exception as e:
+        logger.debug(f"Performance log not available: {str(e)}")
+
+
+def _parse_created_at(created_at):
+    if not created_at:
+        return None
+    try:
+        return datetime.datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y").isoformat()
+    except ValueError:
+        return None
+
+
+def _unwrap(result):
+    # Tweets with visibility restrictions are wrapped one level deeper.
+    if result and result.get("__typename") == "TweetWithVisibilityResults":
+        return result.get("tweet")
+    return result
+
+
+def _screen_name(tweet):
+    user = (tweet.get("core") or {}).get("user_results", {}).get("result", {})
+    return (user.get("core") or {}).get("screen_name") or (user.get("legacy") or {}).get("screen_name")
+
+
+def _record(tweet, pinned):
+    tweet = _unwrap(tweet)
+    if not tweet or "rest_id" not in tweet:
+        return None
+    legacy = tweet.get("legacy") or {}
+    retweeted = _unwrap((legacy.get("retweeted_status_result") or {}).get("result"))
+    # Like the DOM, a retweet is represented by the original tweet's URL, flagged as a retweet.
+    shown = retweeted if retweeted and "rest_id" in retweeted else tweet
+    shown_legacy = shown.get("legacy") or {}
+    author = _screen_name(shown)
+    tweet_id = shown["rest_id"]
+    note = (shown.get("note_tweet") or {}).get("note_tweet_results", {}).get("result", {}).get("text")
+    return {
+        "url": f"https://x.com/{author}/status/{tweet_id}",
+        "id": tweet_id,
+        "author": author,
+        "timestamp": _parse_created_at(shown_legacy.get("created_at")),
+        "pinned": pinned,
+        "retweet": shown is not tweet,
+        "reply": bool(shown_legacy.get("in_reply_to_status_id_str")),
+        "text": (note or shown_legacy.get("full_text") or "")[:TEXT_LIMIT],
+    }
+
+
+def _entry_tweets(entry):
+    content = entry.get("content") or {}
+    if content.get("entryType") == "TimelineTimelineItem" or "itemContent" in content:
+        item = content.get("itemContent") or {}
+        if item.get("itemType", "TimelineTweet") == "TimelineTweet":
+            yield item.get("tweet_results", {}).get("result")
+    elif content.get("entryType") == "TimelineTimelineModule" or "items" in content:
+        for module_item in content.get("items") or []:
+            item = (module_item.get("item") or {}).get("itemContent") or {}
+            if item.get("itemType", "TimelineTweet") == "TimelineTweet":
+                yield item.get("tweet_results", {}).get("result")
+
+
+def _find_instructions(payload):
+    # data.user.result.timeline_v2.timeline.instructions (or .timeline.timeline, or search/list variants)
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if isinstance(node.get("instructions"), list):
+                return node["instructions"]
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return []
+
+
+def parse_timeline(payload):
+    """
+    Parses a timeline GraphQL response into tweet records, in timeline order (pinned tweet first). The tweets
+    of a conversation module are ordered newest first like the rest of the timeline.
+
+    Args:
+        payload (dict): The decoded JSON response.
+
+    Returns:
+        list: Tweet records (see timeline.py), without the "element" key.
+    """
+    records = []
+    seen = set()
+    for instruction in _find_instructions(payload):
+        kind = instruction.get("type")
+        if kind == "TimelinePinEntry":
+            entries, pinned = [instruction.get("entry") or {}], True
+        elif kind == "TimelineAddEntries":
+            entries, pinned = instruction.get("entries") or [], False
+        else:
+            continue
+        for entry in entries:
+            if entry.get("entryId", "").startswith(("cursor-", "who-to-follow", "promoted")):
+                continue
+            entry_records = [_record(tweet, pinned) for tweet in _entry_tweets(entry)]
+            entry_records = [record for record in entry_records if record]
+            # Conversation modules list a thread oldest first; the timeline itself is newest first.
+            entry_records.sort(key=lambda record: int(record["id"]), reverse=True)
+            for record in entry_records:
+                if record["id"] not in seen:
+                    seen.add(record["id"])
+                    records.append(record)
+    # The pin entry may come after the regular entries in the instruction list; keep it first like the page.
+    records.sort(key=lambda record: not record["pinned"])
+    return records
+
+
+class NetworkTimelineReader:
+    def __init__(self, driver, operations=TIMELINE_OPERATIONS):
+        """
+        Reads timeline responses from a driver's performance log.
+
+        Args:
+            driver (webdriver.Chrome): Driver started with goog:loggingPrefs {"performance": "ALL"}.
+            operations (tuple): URL fragments identifying timeline GraphQL requests.
+        """
+        self.driver = driver
+        self.operations = operations
+
+    def read(self, timeout=10, poll=0.1):
+        """
+        Waits for a timeline response since the last drain() and returns its parsed records.
+
+        Returns:
+            list: Tweet records, or None if no timeline response could be captured (callers fall back to the DOM).
+        """
+        deadline = time.monotonic() + timeout
+        request_id = None
+        while time.monotonic() < deadline:
+            try:
+                entries = self.driver.get_log("performance")
+            except Exception as e:
+                logger.debug(f"Performance log not available: {str(e)}")
+                return None
+            for entry in entries:
+                try:
+                    message = json.loads(entry["message"])["message"]
+                except (KeyError, ValueError):
+                    continue
+                method = message.get("method")
+                params = message.get("params", {})
+                if method == "Network.responseReceived" and request_id is None:
+                    url = params.get("response", {}).get("url", "")
+                    if "/graphql/" in url and any(op + "?" in url for op in self.operations):
+                        request_id = params.get("requestId")
+                elif method == "Network.loadingFinished" and request_id and params.get("requestId") == request_id:
+                    return self._body(request_id)
+            time.sleep(poll)
+        if request_id:
+            # The finished event may have been missed; the body is usually available by now anyway.
+            return self._body(request_id)
+        return None
+
+    def _body(self, request_id):
+        try:
+            body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            records = parse_timeline(json.loads(body.get("body", "")))
+            logger.debug(f"Captured {len(records)} tweets from the timeline response")
+            return records
+        except Exception as e:
+            logger.warning(f"Could not read timeline response body: {str(e)}")
+            return None
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        with open(path, "r", encoding="utf-8") as f:
+            for record in parse_timeline(json.load(f)):
+                print(json.dumps(record))
@@ -0,0 +1,260 @@
+"""
+orchestrator.py
+
+This module contains the Orchestrator class which owns the lifecycle of every TwitterBot started by app.py.
+Instead of one unmanaged thread and browser per upload, bot runs are queued as jobs and started only when
+enough browser slots are free under a host-wide cap. Bot creation, login and the initial pass all happen on
+the job's own thread, so the web request that submitted it returns immediately; the job ID (the bot ID) can
+then be polled or cancelled. A second, smaller cap limits concurrent page loads across all
+bots; page-load slots are handed out fairly, preferring the bot with the fewest loads in flight, so a bot
+with many workers cannot starve the others of CPU.
+"""
+
+import time
+import itertools
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+STARTING = "starting"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class FairGate:
+    def __init__(self, slots):
+        """
+        A counting semaphore that grants free slots to the owner with the fewest slots in use,
+        in arrival order among equals.
+
+        Args:
+            slots (int): Number of concurrent holders.
+        """
+        self.slots = slots
+        self.in_use = 0
+        self.active = {}
+        self.waiting = []
+        self.granted = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _next_ticket(self):
+        return min(self.waiting, key=lambda ticket: (self.active.get(ticket[0], 0), ticket[1]))
+
+    @contextmanager
+    def hold(self, owner):
+        """
+        Context manager holding one slot on behalf of `owner` for the duration of the block.
+        """
+        with self._cond:
+            ticket = (owner, next(self._seq))
+            self.waiting.append(ticket)
+            while self.in_use >= self.slots or self._next_ticket() != ticket:
+                self._cond.wait()
+            self.waiting.remove(ticket)
+            self.in_use += 1
+            self.granted += 1
+            self.active[owner] = self.active.get(owner, 0) + 1
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_use -= 1
+                self.active[owner] -= 1
+                if not self.active[owner]:
+                    del self.active[owner]
+                self._cond.notify_all()
+
+
+class BotRun:
+    def __init__(self, bot_id, factory, runner, browsers):
+        """
+        One bot's run as managed by the orchestrator.
+
+        Attributes:
+            factory (callable): Creates the TwitterBot (and its browser) once slots are available.
+            runner (callable): Runs the bot, e.g. lambda bot: bot.repost_tweets(...).
+            browsers (int): Number of browser slots the run holds.
+            state (str): One of queued, starting, running, finished, failed, cancelled.
+            bot (TwitterBot): The bot, once created.
+            result: Return value of the runner.
+            error (str): Error message if the run failed.
+        """
+        self.bot_id = bot_id
+        self.factory = factory
+        self.runner = runner
+        self.browsers = browsers
+        self.state = QUEUED
+        self.bot = None
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {
+            "bot_id": self.bot_id,
+            "state": self.state,
+            "phase": getattr(self.bot, "phase", None) if self.bot is not None else self.state,
+            "result_count": len(self.bot.results) if self.bot is not None else 0,
+            "browsers": self.browsers,
+            "error": self.error or getattr(self.bot, "error", None),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class Orchestrator:
+    def __init__(self, max_browsers=4, max_page_loads=2, on_start=None):
+        """
+        Initializes an Orchestrator.
+
+        Args:
+            max_browsers (int): Host-wide cap on concurrently open browser sessions.
+            max_page_loads (int): Host-wide cap on concurrent page loads.
+            on_start (callable, optional): Called with the BotRun once its bot has been created.
+        """
+        self.max_browsers = max_browsers
+        self.browsers_in_use = 0
+        self.page_loads = FairGate(max_page_loads)
+        self.on_start = on_start
+        self.runs = {}
+        self.queue = deque()
+        self._lock = threading.Lock()
+
+    def submit(self, bot_id, factory, runner, browsers=1):
+        """
+        Queues a bot run. It starts as soon as `browsers` slots are free (runs start in submission order).
+
+        Returns:
+            BotRun: The queued run.
+        """
+        run = BotRun(bot_id, factory, runner, max(1, min(browsers, self.max_browsers)))
+        with self._lock:
+            self.runs[bot_id] = run
+            self.queue.append(run)
+        logger.info(f"Queued bot {bot_id} ({run.browsers} browser slot(s)), queue depth {len(self.queue)}")
+        self._dispatch()
+        return run
+
+    def _dispatch(self):
+        with self._lock:
+            while self.queue and self.browsers_in_use + self.queue[0].browsers <= self.max_browsers:
+                run = self.queue.popleft()
+                self.browsers_in_use += run.browsers
+                run.state = STARTING
+                thread = threading.Thread(target=self._run, args=(run,), name=f"bot-{run.bot_id}", daemon=True)
+                thread.start()
+
+    def _run(self, run):
+        run.started_at = time.time()
+        try:
+            run.bot = run.factory()
+            run.bot.bot_id = run.bot_id
+            run.bot.orchestrator = self
+            with self._lock:
+                if run.state == CANCELLED:
+                    return
+                run.state = RUNNING
+            if self.on_start:
+                self.on_start(run)
+            run.result = run.runner(run.bot)
+            if run.state != CANCELLED:
+                run.state = FINISHED
+        except Exception as e:
+            logger.error(f"Bot {run.bot_id} failed: {str(e)}")
+            run.error = str(e)
+            run.state = FAILED
+        finally:
+            if run.bot is not None:
+                run.bot.close()
+            run.finished_at = time.time()
+            with self._lock:
+                self.browsers_in_use -= run.browsers
+            run.done.set()
+            self._dispatch()
+
+    def page_load(self, bot_id):
+        """
+        Context manager holding one host-wide page-load slot for the given bot.
+        """
+        return self.page_loads.hold(bot_id)
+
+    def get(self, bot_id):
+        """
+        Returns the BotRun (job) with the given ID, or None.
+        """
+        return self.runs.get(bot_id)
+
+    def stop(self, bot_id):
+        """
+        Cancels a queued run or asks a running bot to stop monitoring.
+
+        Returns:
+            bool: True if the run was found.
+        """
+        with self._lock:
+            run = self.runs.get(bot_id)
+            if run is None:
+                return False
+            if run.state == QUEUED:
+                self.queue.remove(run)
+                run.state = CANCELLED
+                run.finished_at = time.time()
+                run.done.set()
+                return True
+        if run.bot is not None:
+            run.bot.stop_monitoring()
+        return True
+
+    def cancel(self, bot_id):
+        """
+        Cancels a job wherever it is: a queued job never starts, a job still creating its bot is dropped
+        once the bot exists, and a running bot stops its initial pass or monitoring loop.
+
+        Returns:
+            bool: True if the job was found and was not already finished.
+        """
+        with self._lock:
+            run = self.runs.get(bot_id)
+            if run is None or run.state in (FINISHED, FAILED, CANCELLED):
+                return False
+            if run.state == QUEUED:
+                self.queue.remove(run)
+                run.finished_at = time.time()
+                run.done.set()
+            run.state = CANCELLED
+        if run.bot is not None:
+            run.bot.cancel()
+        logger.info(f"Cancelled bot {bot_id}")
+        return True
+
+    def stats(self):
+        """
+        Returns queue depth and slot usage, e.g.
+        {"queue_depth": 2, "browsers_in_use": 4, "max_browsers": 4, "page_loads_in_use": 1, ...}
+        """
+        with self._lock:
+            states = {}
+            for run in self.runs.values():
+                states[run.state] = states.get(run.state, 0) + 1
+            return {
+                "queue_depth": len(self.queue),
+                "browsers_in_use": self.browsers_in_use,
+                "max_browsers": self.max_browsers,
+                "page_loads_in_use": self.page_loads.in_use,
+                "page_loads_waiting": len(self.page_loads.waiting),
+                "max_page_loads": self.page_loads.slots,
+                "page_loads_granted": self.page_loads.granted,
+                "runs": states,
+            }
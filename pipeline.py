@@ -0,0 +1,263 @@
+"""
+pipeline.py
+
+This module contains the DetectPostPipeline class which overlaps new-tweet detection and posting. In the plain
+monitoring loop a worker leaves the profile to quote each new tweet before it checks its next handle, so one
+slow compose delays detection for every other account. The pipeline splits the bot's worker sessions into two
+stages instead:
+
+    - detection workers take due handles from the PollScheduler, read the profile timeline and push one job
+      per handle with new tweets into a bounded queue;
+    - posting workers (separate logged-in sessions) drain the queue and quote the tweets.
+
+When the queue is full, detection workers block on it, so detection never runs further ahead of posting than
+the queue capacity (backpressure). Queue depth, stage latencies and the time spent blocked are reported by
+stats() and exported through metrics.py.
+"""
+
+import time
+import queue
+import threading
+import logging
+
+from metrics import registry, track, STANDALONE
+from log_pipeline import set_log_context
+from timeline import numeric_id, status_id_from_url
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = registry.gauge("twitter_bot_pipeline_queue_depth", "Post jobs waiting in the pipeline queue.",
+                             ("bot_id",))
+BACKPRESSURE_SECONDS = registry.counter("twitter_bot_pipeline_backpressure_seconds_total",
+                                        "Time detection workers spent blocked on a full post queue.", ("bot_id",))
+
+
+class PostJob:
+    def __init__(self, handle, tweet_urls):
+        """
+        New tweets of one handle waiting to be posted.
+
+        Attributes:
+            tweet_urls (list): Status URLs of the new tweets, most recent first.
+            detected_at (float): Monotonic time the tweets were detected.
+        """
+        self.handle = handle
+        self.tweet_urls = tweet_urls
+        self.detected_at = time.monotonic()
+
+    def to_dict(self):
+        return {"handle": self.handle, "tweet_urls": list(self.tweet_urls)}
+
+
+class StageStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self):
+        return {"count": self.count, "avg_s": round(self.total / self.count, 3) if self.count else None,
+                "max_s": round(self.max, 3)}
+
+
+class DetectPostPipeline:
+    def __init__(self, bot, detectors, posters, hashtag, scheduler, capacity=20, on_pending=None):
+        """
+        Initializes a DetectPostPipeline.
+
+        Args:
+            bot (TwitterBot): The bot owning the run; results are appended to its buffer.
+            detectors (list): Workers (TwitterBot sessions) used for detection.
+            posters (list): Workers used for posting.
+            hashtag (str): Hashtag text to quote with.
+            scheduler (PollScheduler): Decides which handles are due.
+            capacity (int): Maximum number of queued post jobs.
+            on_pending (callable, optional): Called with the list of unposted jobs (as dicts) whenever it changes,
+                                             e.g. to checkpoint them.
+        """
+        self.bot = bot
+        self.detectors = detectors
+        self.posters = posters
+        self.hashtag = hashtag
+        self.scheduler = scheduler
+        self.capacity = capacity
+        self.jobs = queue.Queue(maxsize=capacity)
+        self.active = []
+        self.left_over = []
+        self.on_pending = on_pending
+        self.marks = {}  # handle -> newest tweet id of each job detected but not finished yet
+        self.detect_stats = StageStats()
+        self.post_stats = StageStats()
+        self.wait_stats = StageStats()
+        self.max_depth = 0
+        self.backpressure = 0.0
+        self.running = False
+        self.should_continue = None
+        self._lock = threading.Lock()
+
+    @property
+    def bot_id(self):
+        return self.bot.bot_id or STANDALONE
+
+    def _high_water(self, handle):
+        # Highest id already queued or posted, so a handle re-checked before its job is posted is not queued twice.
+        # Only unfinished jobs count: once a job is done, the ledger holds whatever it actually posted, and tweets
+        # of a job that posted nothing are detected again on the next check.
+        with self._lock:
+            saved = numeric_id(self.bot.ledger.get(handle))
+            queued = self.marks.get(handle)
+            if not queued:
+                return saved
+            return max(max(queued), saved or 0)
+
+    def _enqueue(self, job):
+        start = time.monotonic()
+        queued = False
+        while self.running and not queued:
+            try:
+                self.jobs.put(job, timeout=0.5)
+                queued = True
+            except queue.Full:
+                continue
+        if not queued:
+            # Stopped while the queue was full; the job stays pending (and checkpointed) instead of being dropped.
+            with self._lock:
+                self.left_over.append(job)
+        blocked = time.monotonic() - start
+        if blocked > 0.01:
+            with self._lock:
+                self.backpressure += blocked
+            BACKPRESSURE_SECONDS.inc(blocked, bot_id=self.bot_id)
+        with self._lock:
+            self.max_depth = max(self.max_depth, self.jobs.qsize())
+        QUEUE_DEPTH.set(self.jobs.qsize(), bot_id=self.bot_id)
+        self._pending_changed()
+
+    def _release_mark(self, job):
+        # Called with the lock held once a job is done.
+        marks = self.marks.get(job.handle) or []
+        top = numeric_id(status_id_from_url(job.tweet_urls[0])) or 0
+        if top in marks:
+            marks.remove(top)
+        if not marks:
+            self.marks.pop(job.handle, None)
+
+    def _pending_changed(self):
+        if self.on_pending is not None:
+            self.on_pending([job.to_dict() for job in self.pending()])
+
+    def _detect_loop(self, worker):
+        while self.running:
+            due = self.scheduler.pop_due(limit=1)
+            if not due:
+                time.sleep(min(1.0, self.scheduler.seconds_until_next()) or 0.1)
+                continue
+            handle = due[0]
+            set_log_context(bot_id=self.bot.bot_id, handle=handle, phase="detecting")
+            start = time.monotonic()
+            with track(self.bot.bot_id, "detect_stage") as span:
+                tweet_urls = worker.detect_new_tweets(handle, self._high_water(handle))
+                if tweet_urls is None:
+                    span.fail()
+            with self._lock:
+                self.detect_stats.add(time.monotonic() - start)
+            if tweet_urls is None:
+                self.scheduler.record(handle, error=True)
+                continue
+            self.scheduler.record(handle, new_tweets=len(tweet_urls))
+            if tweet_urls:
+                with self._lock:
+                    self.marks.setdefault(handle, []).append(numeric_id(status_id_from_url(tweet_urls[0])) or 0)
+                self._enqueue(PostJob(handle, tweet_urls))
+
+    def _post_loop(self, worker):
+        while self.running:
+            try:
+                job = self.jobs.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            with self._lock:
+                self.active.append(job)
+            QUEUE_DEPTH.set(self.jobs.qsize(), bot_id=self.bot_id)
+            set_log_context(bot_id=self.bot.bot_id, handle=job.handle, phase="posting")
+            start = time.monotonic()
+            with self._lock:
+                self.wait_stats.add(start - job.detected_at)
+            with track(self.bot.bot_id, "post_stage") as span:
+                posted = worker.post_new_tweets(job.handle, job.tweet_urls, self.hashtag)
+                if not posted:
+                    span.fail()
+            with self._lock:
+                self.post_stats.add(time.monotonic() - start)
+                self.active.remove(job)
+                if not posted and not (self.running and self.should_continue()):
+                    # Gave up because the pipeline stopped, e.g. while waiting for the rate governor.
+                    self.left_over.append(job)
+                else:
+                    self._release_mark(job)
+            self._pending_changed()
+            if posted:
+                message = f"Retweeted {posted} new tweet(s) for {job.handle}."
+            else:
+                message = f"Could not retweet new tweets for {job.handle}."
+            logger.info(f"Monitoring: {job.handle} - {message}")
+            self.bot.results.append({"user": job.handle, "status": "success" if posted else "failed",
+                                     "message": message})
+
+    def run(self, should_continue):
+        """
+        Runs both stages until should_continue() returns False. Jobs still queued at that point, or detected but
+        not queued yet, are left pending (see pending()).
+        """
+        self.should_continue = should_continue
+        self.running = True
+        threads = [threading.Thread(target=self._detect_loop, args=(worker,), name=f"detect-{i}", daemon=True)
+                   for i, worker in enumerate(self.detectors)]
+        threads += [threading.Thread(target=self._post_loop, args=(worker,), name=f"post-{i}", daemon=True)
+                    for i, worker in enumerate(self.posters)]
+        logger.info(f"Pipeline started with {len(self.detectors)} detection and {len(self.posters)} posting "
+                    f"worker(s), queue capacity {self.capacity}")
+        for thread in threads:
+            thread.start()
+        try:
+            while should_continue():
+                time.sleep(0.5)
+        finally:
+            self.running = False
+            for thread in threads:
+                thread.join()
+        logger.info(f"Pipeline stopped: {self.stats()}")
+
+    def pending(self):
+        """
+        Returns the jobs not yet posted: the ones being posted right now, then the queued ones, then the ones
+        left over when the pipeline stopped (not queued in time, or given up while posting).
+        """
+        with self._lock:
+            active = list(self.active)
+            left_over = list(self.left_over)
+        with self.jobs.mutex:
+            return active + list(self.jobs.queue) + left_over
+
+    def stats(self):
+        """
+        Returns queue depth and per-stage latencies, e.g.
+        {"queue_depth": 3, "capacity": 20, "detect": {"count": 120, "avg_s": 2.1, ...}, "post": {...}, ...}
+        """
+        with self._lock:
+            return {
+                "queue_depth": self.jobs.qsize(),
+                "capacity": self.capacity,
+                "max_depth": self.max_depth,
+                "detectors": len(self.detectors),
+                "posters": len(self.posters),
+                "detect": self.detect_stats.to_dict(),
+                "queue_wait": self.wait_stats.to_dict(),
+                "post": self.post_stats.to_dict(),
+                "backpressure_s": round(self.backpressure, 3),
+            }
@@ -0,0 +1,208 @@
+"""
+profile_state.py
+
+This module classifies a loaded profile page as ok, suspended, not found, protected or empty. It replaces
+the check in navigate_to_user_profile that copied the whole page source (several MB on a long timeline) into
+Python on every visit just to search it for four phrases. One small script reads what is needed in the
+browser: the number of rendered tweets, whether the profile header, lock icon and empty state are present,
+and at most a few hundred characters of the empty-state or error text.
+
+Suspended, missing and protected accounts cannot be quoted. The ProfileStateCache remembers them with
+exponential backoff: the first recheck is after `base_backoff` seconds and every further dead verdict
+doubles the wait, up to `max_backoff`. Until then, navigate_to_user_profile skips the handle without loading
+the page. An ok or empty verdict clears the entry; an unknown one (the probe timed out) leaves it as it is.
+The cache is shared by all bots in the process. Suspended and missing accounts are the same for every viewer
+and are cached per handle; whether a protected account can be read depends on the logged-in account
+following it, so protected verdicts are cached per (viewer, handle).
+"""
+
+import time
+import threading
+import logging
+
+from metrics import registry
+from handle_lists import handle_key
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+SUSPENDED = "suspended"
+NOT_FOUND = "not_found"
+PROTECTED = "protected"
+EMPTY = "empty"
+UNKNOWN = "unknown"
+DEAD_STATES = (SUSPENDED, NOT_FOUND, PROTECTED)
+# Dead states that do not depend on which account is logged in
+SHARED_STATES = (SUSPENDED, NOT_FOUND)
+
+SUSPENDED_PHRASES = ("account suspended", "this account has been suspended")
+NOT_FOUND_PHRASES = ("this account doesn't exist", "user not found", "this page doesn't exist")
+PROTECTED_PHRASES = ("these posts are protected", "these tweets are protected")
+
+_PROBE_SCRIPT = """
+var column = document.querySelector('[data-testid="primaryColumn"]');
+var root = column || document.querySelector('main') || document.body;
+if (!root) { return null; }
+var empty = root.querySelector('[data-testid="emptyState"]');
+var tweets = root.querySelectorAll('article[data-testid="tweet"]').length;
+return {
+    column: !!column,
+    tweets: tweets,
+    header: !!root.querySelector('[data-testid="UserName"]'),
+    locked: !!root.querySelector('[data-testid="icon-lock"], svg[aria-label="Protected account"]'),
+    empty: empty ? (empty.textContent || "").slice(0, 300) : null,
+    text: tweets ? "" : (root.textContent || "").slice(0, 600)
+};
+"""
+
+PROFILE_STATES = registry.counter("twitter_bot_profile_states_total", "Profile visits by classified state.",
+                                  ("state",))
+PROFILE_SKIPS = registry.counter("twitter_bot_profile_skips_total",
+                                 "Profile visits skipped because the account is cached as dead.")
+
+
+def _normalize(text):
+    return (text or "").lower().replace("’", "'")
+
+
+def classify_probe(probe):
+    """
+    Returns the state of a profile from the probe script's result.
+    """
+    if not probe:
+        return UNKNOWN
+    empty = _normalize(probe.get("empty"))
+    text = empty + " " + _normalize(probe.get("text"))
+    if any(phrase in text for phrase in SUSPENDED_PHRASES):
+        return SUSPENDED
+    if any(phrase in text for phrase in NOT_FOUND_PHRASES):
+        return NOT_FOUND
+    if any(phrase in text for phrase in PROTECTED_PHRASES) or (probe.get("locked") and not probe.get("tweets")):
+        return PROTECTED
+    if probe.get("tweets"):
+        return OK
+    if probe.get("empty") is not None:
+        return EMPTY
+    return UNKNOWN
+
+
+def probe_profile(driver):
+    """
+    Runs the probe script on the loaded page and returns the profile's state.
+    """
+    try:
+        return classify_probe(driver.execute_script(_PROBE_SCRIPT))
+    except Exception as e:
+        logger.debug(f"Profile probe failed: {str(e)}")
+        return UNKNOWN
+
+
+def profile_classified():
+    """
+    Condition: the profile page has rendered enough to be classified. Returns the state.
+    """
+    def _condition(driver):
+        state = probe_profile(driver)
+        return state if state != UNKNOWN else False
+    return _condition
+
+
+class ProfileStateCache:
+    def __init__(self, base_backoff=3600, max_backoff=7 * 86400):
+        """
+        Initializes a ProfileStateCache.
+
+        Args:
+            base_backoff (float): Seconds before a dead account is checked again the first time.
+            max_backoff (float): Longest wait in seconds between rechecks.
+        """
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(handle, viewer):
+        # (shared key, key of this viewer's protected verdict)
+        key = handle_key(handle)
+        return (None, key), (handle_key(viewer) if viewer else None, key)
+
+    def record(self, handle, state, viewer=None):
+        """
+        Records the state found on a visit. Dead states (suspended, not found, protected) push the next
+        recheck out exponentially; ok and empty clear the handle. UNKNOWN says nothing about the account and
+        is only counted.
+
+        Args:
+            handle (str): The profile visited.
+            state (str): Its classified state.
+            viewer (str, optional): The logged-in account that saw it; protected verdicts only apply to it.
+        """
+        PROFILE_STATES.inc(state=state)
+        if state == UNKNOWN:
+            return
+        shared_key, viewer_key = self._keys(handle, viewer)
+        if state in SHARED_STATES:
+            key, cleared = shared_key, []
+        elif state == PROTECTED:
+            # The account exists and is not suspended; only this viewer cannot read it
+            key, cleared = viewer_key, [shared_key]
+        else:
+            key, cleared = None, [shared_key, viewer_key]
+        with self._lock:
+            for old_key in cleared:
+                if old_key != key and self.entries.pop(old_key, None) is not None:
+                    logger.info(f"{handle} is back ({state}), removed from the dead-account cache")
+            if key is None:
+                return
+            entry = self.entries.get(key) or {"strikes": 0}
+            entry["strikes"] += 1
+            entry["state"] = state
+            entry["backoff"] = min(self.max_backoff, self.base_backoff * 2 ** (entry["strikes"] - 1))
+            entry["recheck_at"] = time.time() + entry["backoff"]
+            self.entries[key] = entry
+        logger.info(f"{handle} is {state}, next check in {entry['backoff'] / 3600:.1f}h")
+
+    def skip(self, handle, viewer=None):
+        """
+        Returns the cached dead state of a handle for the given viewer if it is not due for a recheck yet,
+        else None.
+        """
+        now = time.time()
+        with self._lock:
+            for key in self._keys(handle, viewer):
+                entry = self.entries.get(key)
+                if entry is not None and now < entry["recheck_at"]:
+                    state = entry["state"]
+                    break
+            else:
+                return None
+        PROFILE_SKIPS.inc()
+        return state
+
+    def stats(self):
+        """
+        Returns the cached dead accounts, e.g. {"olduser": {"state": "suspended", "strikes": 2, "recheck_in_s": 7000}}.
+        Protected accounts are listed per viewer as "handle (viewer)".
+        """
+        now = time.time()
+        with self._lock:
+            return {(f"{key} ({viewer})" if viewer else key): {
+                        "state": entry["state"], "strikes": entry["strikes"],
+                        "recheck_in_s": max(0, round(entry["recheck_at"] - now))}
+                    for (viewer, key), entry in self.entries.items()}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_profile_states():
+    """
+    Returns the process-wide ProfileStateCache shared by all bots, creating it on first use.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ProfileStateCache()
+        return _default_cache
@@ -0,0 +1,296 @@
+"""
+rate_governor.py
+
+This module contains the RateGovernor class which limits how fast each account posts. Without it a burst of new
+tweets across many handles is quoted back to back, the account gets rate-limited or locked and posts nothing
+for hours. Every (account, action) pair has:
+
+    - a token bucket: `burst` posts can go out at once, then tokens refill at the hourly rate;
+    - hard caps on the posts of the last hour and the last day (sliding windows).
+
+A post over the limit is not dropped: acquire() blocks the posting worker until a slot is free, and waiting
+workers are served in arrival order. Upstream, new tweets keep queueing in the pipeline (and the checkpoint)
+meanwhile.
+
+When the page reports a rate limit after a post (see rate_limit_message()), the account is paused for a
+cooldown that doubles on every consecutive hit and its refill rate is halved. Each run of successful posts
+raises the rate again by a tenth, so the governor settles just under the rate X tolerates, which maximises
+sustained posts per hour. Windows are kept in memory only and start empty after a restart.
+"""
+
+import time
+import threading
+import logging
+from collections import deque
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Per-action limits of one account. "quote" is quote_tweet, "repost" is repost_with_hashtag.
+DEFAULT_LIMITS = {
+    "quote": {"burst": 5, "per_hour": 40, "per_day": 300},
+    "repost": {"burst": 5, "per_hour": 40, "per_day": 300},
+}
+COOLDOWN = 15 * 60  # X rate-limit windows are 15 minutes
+MAX_COOLDOWN = 4 * 3600
+MIN_FACTOR = 0.25
+RECOVERY_STREAK = 10  # successful posts before the rate is raised again
+
+RATE_LIMIT_MESSAGES = (
+    "rate limit",
+    "over the daily limit",
+    "you are over the limit",
+    "try again later",
+    "you can't post right now",
+    "unable to post at this time",
+)
+ALERT_SELECTOR = '[data-testid="toast"], [role="alert"]'
+_ALERT_TEXT_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0])).map(function (e) { return e.innerText || ""; }).join("\\n");
+"""
+
+RATE_WAIT_SECONDS = registry.counter("twitter_bot_rate_wait_seconds_total",
+                                     "Time posting workers waited for the rate governor.", ("account", "action"))
+RATE_LIMIT_HITS = registry.counter("twitter_bot_rate_limit_hits_total",
+                                   "Rate-limit responses seen after a post.", ("account", "action"))
+POSTS_LAST_HOUR = registry.gauge("twitter_bot_posts_last_hour", "Posts of the last hour per account and action.",
+                                 ("account", "action"))
+
+
+class RateLimitedError(Exception):
+    """
+    Raised when the page rejected a post because the account is rate-limited.
+    """
+
+
+def rate_limit_message(driver):
+    """
+    Returns the text of a rate-limit toast or alert shown on the page, or None.
+    """
+    try:
+        text = driver.execute_script(_ALERT_TEXT_SCRIPT, ALERT_SELECTOR) or ""
+    except Exception as e:
+        logger.debug(f"Could not read page alerts: {str(e)}")
+        return None
+    lowered = text.lower()
+    if any(message in lowered for message in RATE_LIMIT_MESSAGES):
+        return text.strip()
+    return None
+
+
+class ActionLimiter:
+    def __init__(self, burst, per_hour, per_day):
+        """
+        Limits of one action of one account.
+
+        Attributes:
+            tokens (float): Posts that may go out right now.
+            hour (deque): Monotonic times of the posts of the last hour.
+            day (deque): Monotonic times of the posts of the last day.
+            factor (float): Fraction of per_hour currently refilled; lowered after rate-limit hits.
+            paused_until (float): Monotonic time until which nothing is posted.
+            strikes (int): Consecutive rate-limit hits, doubling the cooldown.
+            streak (int): Successful posts since the rate was last changed.
+            waiting (deque): Tickets of the workers waiting for a slot, in arrival order.
+        """
+        self.burst = burst
+        self.per_hour = per_hour
+        self.per_day = per_day
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.hour = deque()
+        self.day = deque()
+        self.factor = 1.0
+        self.paused_until = 0.0
+        self.strikes = 0
+        self.streak = 0
+        self.waiting = deque()
+        self.posted = 0
+        self.limited = 0
+        self.waited = 0.0
+
+    @property
+    def refill_rate(self):
+        return self.per_hour * self.factor / 3600.0
+
+    def _refill(self, now):
+        self.tokens = min(float(self.burst), self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+        while self.hour and now - self.hour[0] >= 3600:
+            self.hour.popleft()
+        while self.day and now - self.day[0] >= 86400:
+            self.day.popleft()
+
+    def wait_time(self, now):
+        """
+        Returns the seconds until the next post is allowed (0 if it is allowed now).
+        """
+        self._refill(now)
+        wait = max(0.0, self.paused_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.refill_rate if self.refill_rate else 3600.0)
+        if self.per_hour and len(self.hour) >= self.per_hour:
+            wait = max(wait, self.hour[0] + 3600 - now)
+        if self.per_day and len(self.day) >= self.per_day:
+            wait = max(wait, self.day[0] + 86400 - now)
+        return wait
+
+    def consume(self, now):
+        self.tokens -= 1
+        self.hour.append(now)
+        self.day.append(now)
+        self.posted += 1
+
+    def to_dict(self, now):
+        self._refill(now)
+        return {
+            "posts_last_hour": len(self.hour),
+            "posts_last_day": len(self.day),
+            "per_hour": self.per_hour,
+            "per_day": self.per_day,
+            "effective_per_hour": round(self.per_hour * self.factor, 1),
+            "tokens": round(self.tokens, 2),
+            "paused_s": round(max(0.0, self.paused_until - now), 1),
+            "waiting": len(self.waiting),
+            "posted": self.posted,
+            "rate_limited": self.limited,
+            "waited_s": round(self.waited, 1),
+        }
+
+
+class RateGovernor:
+    def __init__(self, limits=None, cooldown=COOLDOWN, max_cooldown=MAX_COOLDOWN):
+        """
+        Initializes a RateGovernor.
+
+        Args:
+            limits (dict, optional): {action: {"burst", "per_hour", "per_day"}}. Defaults to DEFAULT_LIMITS.
+            cooldown (float): Pause in seconds after the first rate-limit hit; doubles on consecutive hits.
+            max_cooldown (float): Longest pause in seconds.
+        """
+        self.limits = {action: dict(limit) for action, limit in (limits or DEFAULT_LIMITS).items()}
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.limiters = {}
+        self._tickets = 0
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        POSTS_LAST_HOUR.set_function(self._posts_last_hour)
+
+    def _limiter(self, account, action):
+        # Called with the lock held.
+        key = (account, action)
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            limit = self.limits.get(action) or DEFAULT_LIMITS["quote"]
+            limiter = self.limiters[key] = ActionLimiter(limit["burst"], limit["per_hour"], limit["per_day"])
+        return limiter
+
+    def acquire(self, account, action, should_continue=None, max_wait=None):
+        """
+        Blocks until the account may perform the action, then takes a slot. Waiting callers are served in
+        arrival order.
+
+        Args:
+            account (str): Account (username) that posts.
+            action (str): Action type, e.g. "quote".
+            should_continue (callable, optional): Polled while waiting; returning False gives up.
+            max_wait (float, optional): Longest wait in seconds before giving up.
+
+        Returns:
+            bool: True if a slot was taken, False if the caller gave up.
+        """
+        start = time.monotonic()
+        with self._lock:
+            limiter = self._limiter(account, action)
+            self._tickets += 1
+            ticket = self._tickets
+            limiter.waiting.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = limiter.wait_time(now) if limiter.waiting[0] == ticket else 1.0
+                    if wait <= 0:
+                        limiter.consume(now)
+                        break
+                    if should_continue is not None and not should_continue():
+                        return False
+                    if max_wait is not None and now - start >= max_wait:
+                        return False
+                    if limiter.waiting[0] == ticket and now - start < 0.01:
+                        logger.info(f"{account} is over its {action} limit, post queued for {wait:.0f}s")
+                    self._changed.wait(min(wait, 1.0))
+            finally:
+                limiter.waiting.remove(ticket)
+                waited = time.monotonic() - start
+                limiter.waited += waited
+                self._changed.notify_all()
+        if waited > 0.01:
+            RATE_WAIT_SECONDS.inc(waited, account=account, action=action)
+        return True
+
+    def report_success(self, account, action):
+        """
+        Records a post that went through. Every RECOVERY_STREAK of them raises a lowered rate by a tenth.
+        """
+        with self._lock:
+            limiter = self._limiter(account, action)
+            limiter.streak += 1
+            if limiter.streak >= RECOVERY_STREAK:
+                limiter.streak = 0
+                limiter.strikes = 0
+                if limiter.factor < 1.0:
+                    limiter.factor = min(1.0, limiter.factor + 0.1)
+                    logger.info(f"{account} {action} rate raised to {limiter.per_hour * limiter.factor:.0f}/h")
+
+    def report_rate_limited(self, account, action, retry_after=None):
+        """
+        Records a rate-limit response: the account pauses the action (for retry_after seconds if known, else
+        an exponentially growing cooldown) and its refill rate is halved.
+        """
+        with self._lock:
+            limiter = self._limiter(account, action)
+            limiter.strikes += 1
+            limiter.limited += 1
+            limiter.streak = 0
+            limiter.factor = max(MIN_FACTOR, limiter.factor / 2)
+            pause = retry_after or min(self.max_cooldown, self.cooldown * 2 ** (limiter.strikes - 1))
+            limiter.paused_until = max(limiter.paused_until, time.monotonic() + pause)
+            limiter.tokens = min(limiter.tokens, 0.0)
+            self._changed.notify_all()
+        RATE_LIMIT_HITS.inc(account=account, action=action)
+        logger.warning(f"{account} was rate-limited on {action}: pausing {pause:.0f}s, "
+                       f"rate lowered to {limiter.per_hour * limiter.factor:.0f}/h")
+
+    def _posts_last_hour(self):
+        now = time.monotonic()
+        with self._lock:
+            return {key: limiter.to_dict(now)["posts_last_hour"] for key, limiter in self.limiters.items()}
+
+    def stats(self):
+        """
+        Returns the state of every (account, action), e.g.
+        {"alice": {"quote": {"posts_last_hour": 12, "effective_per_hour": 40.0, "waiting": 2, ...}}}
+        """
+        now = time.monotonic()
+        with self._lock:
+            stats = {}
+            for (account, action), limiter in self.limiters.items():
+                stats.setdefault(account, {})[action] = limiter.to_dict(now)
+            return stats
+
+
+_default_governor = None
+_default_governor_lock = threading.Lock()
+
+
+def get_governor():
+    """
+    Returns the process-wide RateGovernor shared by all bots and their workers, creating it on first use.
+    """
+    global _default_governor
+    with _default_governor_lock:
+        if _default_governor is None:
+            _default_governor = RateGovernor()
+        return _default_governor
@@ -0,0 +1,97 @@
+"""
+result_buffer.py
+
+This module contains the ResultBuffer class, a fixed-size ring buffer for a bot's results. Every result gets
+a sequence number from a process-wide counter, so one cursor covers all bots: clients ask for the results
+with a sequence number greater than the last one they saw. Appending wakes up anyone waiting in
+wait_for_results(), which the server-sent-events endpoint uses to push new results as they arrive.
+
+The buffer behaves like the list it replaces for the operations the bot uses (append, extend, len, slicing
+and iteration), so existing code keeps working.
+"""
+
+import time
+import itertools
+import threading
+from collections import deque
+
+_sequence = itertools.count(1)
+_last_seq = 0
+_new_results = threading.Condition()
+
+
+def last_sequence():
+    """
+    Returns the sequence number of the most recent result across all buffers.
+    """
+    return _last_seq
+
+
+def wait_for_results(cursor, timeout):
+    """
+    Blocks until a result newer than `cursor` exists or the timeout elapses.
+
+    Returns:
+        bool: True if newer results are available.
+    """
+    with _new_results:
+        return _new_results.wait_for(lambda: _last_seq > cursor, timeout)
+
+
+class ResultBuffer:
+    def __init__(self, maxlen=500):
+        """
+        Initializes a ResultBuffer.
+
+        Args:
+            maxlen (int): Number of results kept; older results are dropped.
+        """
+        self.maxlen = maxlen
+        self.items = deque(maxlen=maxlen)
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def append(self, result):
+        """
+        Adds a result dictionary, stamping it with "seq" and (if missing) "timestamp".
+        """
+        global _last_seq
+        result = dict(result)
+        result.setdefault("timestamp", time.strftime("%Y-%m-%d %H:%M:%S"))
+        with _new_results:
+            with self._lock:
+                result["seq"] = next(_sequence)
+                self.items.append(result)
+                self.total += 1
+            _last_seq = max(_last_seq, result["seq"])
+            _new_results.notify_all()
+
+    def extend(self, results):
+        for result in results:
+            self.append(result)
+
+    @property
+    def last_seq(self):
+        with self._lock:
+            return self.items[-1]["seq"] if self.items else 0
+
+    def since(self, cursor, limit=None):
+        """
+        Returns the buffered results with a sequence number greater than `cursor`, oldest first.
+        """
+        with self._lock:
+            newer = [item for item in self.items if item["seq"] > cursor]
+        if limit is not None:
+            newer = newer[-limit:]
+        return newer
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self.items))
+
+    def __getitem__(self, index):
+        with self._lock:
+            return list(self.items)[index]
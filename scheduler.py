@@ -0,0 +1,211 @@
+"""
+scheduler.py
+
+This module contains the PollScheduler class which decides when each monitored account is checked next.
+Accounts sit in a priority queue ordered by their next check time. After every check the account's posting
+rate is updated from what the check found, and the next check is scheduled from that rate: prolific accounts
+are checked often, quiet ones back off gradually and accounts that keep erroring back off exponentially.
+A global checks-per-hour budget caps how many checks are handed out across all accounts.
+"""
+
+import time
+import heapq
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AccountSchedule:
+    def __init__(self, handle, next_check):
+        """
+        Scheduling state of one monitored account.
+
+        Attributes:
+            next_check (float): Monotonic time of the next check.
+            last_check (float): Monotonic time of the last check, or None.
+            rate (float): Smoothed posting rate in tweets per second.
+            quiet (int): Consecutive checks without new tweets.
+            errors (int): Consecutive failed checks.
+            checks (int): Total number of checks.
+            interval (float): Interval chosen after the last check, in seconds.
+        """
+        self.handle = handle
+        self.next_check = next_check
+        self.last_check = None
+        self.rate = 0.0
+        self.quiet = 0
+        self.errors = 0
+        self.checks = 0
+        self.interval = 0.0
+
+
+class PollScheduler:
+    def __init__(self, handles, base_interval=300, min_interval=30, max_interval=3600, checks_per_hour=None,
+                 alpha=0.3, target_fraction=0.5):
+        """
+        Initializes a PollScheduler. All accounts are due immediately, so the first sweep checks everyone.
+
+        Args:
+            handles (list): Twitter handles to monitor.
+            base_interval (float): Interval in seconds used while an account's posting rate is unknown.
+            min_interval (float): Shortest interval between two checks of the same account.
+            max_interval (float): Longest interval between two checks of the same account.
+            checks_per_hour (int, optional): Global budget of checks per hour; None means unlimited.
+            alpha (float): Smoothing factor of the posting rate.
+            target_fraction (float): Fraction of the expected time between posts after which to check again.
+        """
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.checks_per_hour = checks_per_hour
+        self.alpha = alpha
+        self.target_fraction = target_fraction
+        self.accounts = {}
+        self._heap = []
+        self._lock = threading.Lock()
+        self._tokens = float(checks_per_hour) if checks_per_hour else 0.0
+        self._last_refill = time.monotonic()
+        now = time.monotonic()
+        for handle in handles:
+            self.add(handle, now)
+
+    def add(self, handle, when=None):
+        """
+        Adds an account to the schedule (due at `when`, default now). Already scheduled accounts are ignored.
+        """
+        with self._lock:
+            if handle in self.accounts:
+                return
+            account = AccountSchedule(handle, when if when is not None else time.monotonic())
+            self.accounts[handle] = account
+            heapq.heappush(self._heap, (account.next_check, handle))
+
+    def remove(self, handle):
+        """
+        Removes an account from the schedule. Its stale queue entry is skipped lazily.
+        """
+        with self._lock:
+            self.accounts.pop(handle, None)
+
+    def _refill(self, now):
+        if not self.checks_per_hour:
+            return
+        self._tokens = min(float(self.checks_per_hour),
+                           self._tokens + (now - self._last_refill) * self.checks_per_hour / 3600.0)
+        self._last_refill = now
+
+    def pop_due(self, limit=1):
+        """
+        Takes up to `limit` accounts whose check is due, within the global check budget.
+        Popped accounts leave the queue until record() schedules them again.
+
+        Returns:
+            list: Handles to check now, most overdue first.
+        """
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            self._refill(now)
+            while self._heap and len(due) < limit:
+                next_check, handle = self._heap[0]
+                account = self.accounts.get(handle)
+                if account is None or account.next_check != next_check:
+                    heapq.heappop(self._heap)  # removed or rescheduled entry
+                    continue
+                if next_check > now:
+                    break
+                if self.checks_per_hour and self._tokens < 1:
+                    break
+                heapq.heappop(self._heap)
+                if self.checks_per_hour:
+                    self._tokens -= 1
+                due.append(handle)
+        return due
+
+    def seconds_until_next(self):
+        """
+        Returns how long until the next check may run, taking the global budget into account.
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._heap:
+                next_check, handle = self._heap[0]
+                account = self.accounts.get(handle)
+                if account is None or account.next_check != next_check:
+                    heapq.heappop(self._heap)
+                    continue
+                break
+            if not self._heap:
+                return self.base_interval
+            wait = max(0.0, self._heap[0][0] - now)
+            if self.checks_per_hour:
+                self._refill(now)
+                if self._tokens < 1:
+                    wait = max(wait, (1 - self._tokens) * 3600.0 / self.checks_per_hour)
+            return wait
+
+    def record(self, handle, new_tweets=0, error=False):
+        """
+        Records the outcome of a check and schedules the account's next check.
+
+        Args:
+            handle (str): The checked account.
+            new_tweets (int): Number of new tweets the check found.
+            error (bool): True if the check failed (navigation error, no timeline, ...).
+
+        Returns:
+            float: The interval in seconds until the account's next check.
+        """
+        now = time.monotonic()
+        with self._lock:
+            account = self.accounts.get(handle)
+            if account is None:
+                return None
+            account.checks += 1
+            if error:
+                account.errors += 1
+                interval = self.base_interval * (2 ** min(account.errors, 6))
+            else:
+                account.errors = 0
+                if account.last_check is not None:
+                    elapsed = max(now - account.last_check, 1.0)
+                    observed = new_tweets / elapsed
+                    account.rate = self.alpha * observed + (1 - self.alpha) * account.rate
+                elif new_tweets:
+                    account.rate = new_tweets / self.base_interval
+                account.last_check = now
+                if new_tweets:
+                    account.quiet = 0
+                else:
+                    account.quiet += 1
+                if account.rate > 0:
+                    interval = self.target_fraction / account.rate
+                else:
+                    interval = self.base_interval
+                # Quiet streaks drift further out even if the smoothed rate is still high.
+                interval *= 1.25 ** min(account.quiet, 10)
+            interval = max(self.min_interval, min(self.max_interval, interval))
+            account.interval = interval
+            account.next_check = now + interval
+            heapq.heappush(self._heap, (account.next_check, handle))
+            return interval
+
+    def snapshot(self):
+        """
+        Returns the schedule queue for inspection, soonest first, e.g.
+        [{"handle": "ElonMusk", "due_in": 42.0, "interval": 120.0, "posts_per_hour": 3.1, "quiet": 0, "errors": 0}, ...]
+        """
+        now = time.monotonic()
+        with self._lock:
+            rows = [{
+                "handle": a.handle,
+                "due_in": round(max(0.0, a.next_check - now), 1),
+                "interval": round(a.interval, 1),
+                "posts_per_hour": round(a.rate * 3600, 2),
+                "quiet": a.quiet,
+                "errors": a.errors,
+                "checks": a.checks,
+            } for a in self.accounts.values()]
+        rows.sort(key=lambda row: row["due_in"])
+        return rows
@@ -0,0 +1,214 @@
+"""
+selector_registry.py
+
+This module contains the SelectorRegistry class which resolves UI targets of the repost/quote flow (retweet
+button, Quote option, text input, tweet button) from lists of candidate selectors. Candidates starting with
+"//" are XPath, everything else is CSS, matching the lists that used to live inline in repost_with_hashtag.
+
+The registry remembers which candidate last matched for each target and tries it first. All candidates are
+evaluated in priority order inside one execute_script call, so a lookup is a single round-trip instead of a
+find_elements plus is_displayed call per candidate. The per-candidate loop is kept as a fallback. Hit/miss
+counters are kept per target so the learned order can be inspected and tuned.
+"""
+
+import threading
+import logging
+
+from selenium.webdriver.common.by import By
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TARGETS = {
+    "retweet_button": [
+        '[data-testid="retweet"]',
+        '[aria-label="Retweet"]',
+        '[aria-label*="retweet"]',
+        '//div[@aria-label="Retweet"]',
+        '//div[contains(@aria-label, "Retweet")]',
+    ],
+    "quote_option": [
+        'a[href="/compose/post"]',
+        "//span[text()='Quote']",
+        "//span[contains(text(), 'Quote')]",
+        "//div[contains(text(), 'Quote')]",
+        '[data-testid="retweetConfirm"]',
+        "//div[contains(@role, 'menuitem')]//span[contains(text(), 'Quote')]",
+        "//div[@role='menuitem'][contains(., 'Quote')]",
+    ],
+    "tweet_input": [
+        'div[aria-label="Post text"]',
+        '[data-testid="tweetTextarea_0"]',
+        '[data-testid="tweetTextInput"]',
+        '[contenteditable="true"]',
+        '//div[@contenteditable="true"]',
+        '//div[@role="textbox"]',
+    ],
+    "tweet_button": [
+        '[data-testid="tweetButton"]',
+        '[data-testid="tweetButtonInline"]',
+        '//span[text()="Tweet"]',
+        '//div[@data-testid="tweetButtonInline"]',
+        '//div[contains(@role, "button")][.//span[contains(text(), "Tweet")]]',
+    ],
+}
+
+RESOLVE_JS = """
+var selectors = arguments[0], root = arguments[1] || document, requireEnabled = arguments[2];
+function visible(el) {
+    return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+}
+function enabled(el) {
+    return !el.disabled && el.getAttribute("aria-disabled") !== "true";
+}
+for (var i = 0; i < selectors.length; i++) {
+    var sel = selectors[i], nodes = [];
+    try {
+        if (sel.indexOf("//") === 0 || sel.indexOf(".//") === 0) {
+            var res = document.evaluate(sel, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var j = 0; j < res.snapshotLength; j++) { nodes.push(res.snapshotItem(j)); }
+        } else {
+            nodes = root.querySelectorAll(sel);
+        }
+    } catch (e) { continue; }
+    for (var k = 0; k < nodes.length; k++) {
+        if (visible(nodes[k]) && (!requireEnabled || enabled(nodes[k]))) { return [nodes[k], i]; }
+    }
+}
+return null;
+"""
+
+
+class TargetStats:
+    def __init__(self, candidates):
+        """
+        Resolution state for one UI target.
+
+        Attributes:
+            candidates (list): Candidate selectors in their configured order.
+            learned (str): The selector that matched last, tried first on the next lookup.
+            hits (int): Lookups satisfied by the learned selector.
+            misses (int): Lookups where the learned selector failed (or none was learned yet) but another matched.
+            failures (int): Lookups where no candidate matched.
+            fallbacks (int): Lookups that had to use the per-candidate loop.
+            matches (dict): Number of matches per selector.
+        """
+        self.candidates = list(candidates)
+        self.learned = None
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.fallbacks = 0
+        self.matches = {}
+
+    def ordered(self):
+        if self.learned is None:
+            return list(self.candidates)
+        return [self.learned] + [c for c in self.candidates if c != self.learned]
+
+    def to_dict(self):
+        return {
+            "learned": self.learned,
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+            "fallbacks": self.fallbacks,
+            "matches": dict(self.matches),
+        }
+
+
+class SelectorRegistry:
+    def __init__(self, targets=None):
+        """
+        Initializes a SelectorRegistry.
+
+        Args:
+            targets (dict, optional): Mapping of target names to candidate selector lists.
+                                      Defaults to DEFAULT_TARGETS.
+        """
+        self.targets = {}
+        self._lock = threading.Lock()
+        for name, candidates in (targets or DEFAULT_TARGETS).items():
+            self.register(name, candidates)
+
+    def register(self, name, candidates):
+        """
+        Registers (or replaces) the candidate selectors for a UI target.
+        """
+        with self._lock:
+            self.targets[name] = TargetStats(candidates)
+
+    def _record(self, stats, selector):
+        with self._lock:
+            if selector is None:
+                stats.failures += 1
+                return
+            if selector == stats.learned:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+                stats.learned = selector
+            stats.matches[selector] = stats.matches.get(selector, 0) + 1
+
+    def resolve(self, driver, name, root=None, require_enabled=False):
+        """
+        Finds the first visible element for a UI target, trying the learned selector first.
+
+        Args:
+            driver (webdriver.Chrome): Selenium WebDriver instance.
+            name (str): Registered target name, e.g. "retweet_button".
+            root (WebElement, optional): Element to search within instead of the whole document.
+            require_enabled (bool): Only accept elements that are also enabled.
+
+        Returns:
+            WebElement: The matching element, or None if no candidate matched.
+        """
+        stats = self.targets[name]
+        with self._lock:
+            ordered = stats.ordered()
+        if root is not None:
+            # Scope absolute XPath candidates to the root element.
+            ordered = ["." + s if s.startswith("//") else s for s in ordered]
+        try:
+            found = driver.execute_script(RESOLVE_JS, ordered, root, require_enabled)
+        except Exception as e:
+            logger.warning(f"Combined selector lookup for {name} failed, trying selectors one by one: {str(e)}")
+            with self._lock:
+                stats.fallbacks += 1
+            found = self._resolve_each(driver, name, ordered, root, require_enabled)
+        if not found:
+            self._record(stats, None)
+            return None
+        element, index = found
+        selector = ordered[index]
+        if root is not None and selector.startswith(".//"):
+            selector = selector[1:]
+        self._record(stats, selector)
+        logger.info(f"Found {name} with selector: {selector}")
+        return element
+
+    def _resolve_each(self, driver, name, ordered, root, require_enabled):
+        scope = root if root is not None else driver
+        for index, selector in enumerate(ordered):
+            try:
+                if selector.startswith("//") or selector.startswith(".//"):
+                    elements = scope.find_elements(By.XPATH, selector)
+                else:
+                    elements = scope.find_elements(By.CSS_SELECTOR, selector)
+                for element in elements:
+                    if element.is_displayed() and (not require_enabled or element.is_enabled()):
+                        return element, index
+            except Exception as e:
+                logger.warning(f"Error finding {name} with selector {selector}: {str(e)}")
+        return None
+
+    def stats(self):
+        """
+        Returns the per-target hit/miss counters, e.g.
+        { "retweet_button": {"learned": '[data-testid="retweet"]', "hits": 41, "misses": 1, ...}, ... }
+        """
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self.targets.items()}
+
+
+# Registry shared by every bot: X serves the same markup to all accounts, so what one bot learns helps all.
+default_registry = SelectorRegistry()
@@ -0,0 +1,150 @@
+"""
+sessions.py
+
+This module contains the SessionStore class which persists authenticated X sessions between runs. After a
+successful login the browser's cookies are saved per account; when a bot starts, the cookies are restored
+into the new browser and validated with a single page load of the home timeline. Only if the saved session
+is missing, expired or rejected does the bot go through the full login flow in actions.login. A session is
+only deleted when the validation load actually lands on the login flow; a timeout keeps it for the next start.
+"""
+
+import os
+import json
+import time
+import logging
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+logger = logging.getLogger(__name__)
+
+SESSION_DIR = "sessions"
+BASE_URL = "https://x.com"
+HOME_URL = "https://x.com/home"
+LOGGED_IN_SELECTOR = '[data-testid="SideNav_AccountSwitcher_Button"], [data-testid="AppTabBar_Home_Link"]'
+LOGIN_URL_MARKERS = ("/login", "/i/flow/login", "/account/access", "/logout")
+
+
+class SessionStore:
+    def __init__(self, directory=SESSION_DIR, max_age_days=30):
+        """
+        Initializes a SessionStore.
+
+        Args:
+            directory (str): Folder the per-account session files are written to.
+            max_age_days (int): Saved sessions older than this are ignored.
+        """
+        self.directory = directory
+        self.max_age = max_age_days * 24 * 3600
+
+    def path_for(self, username):
+        safe_name = "".join(c for c in username.lower() if c.isalnum() or c in "_-") or "account"
+        return os.path.join(self.directory, f"{safe_name}.json")
+
+    def save(self, driver, username):
+        """
+        Saves the cookies of a logged-in driver for the given account. The file is only readable by the owner.
+
+        Returns:
+            bool: True if the session was saved.
+        """
+        try:
+            cookies = driver.get_cookies()
+            if not cookies:
+                return False
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path_for(username)
+            tmp_path = path + ".tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"saved_at": time.time(), "cookies": cookies}, f)
+            os.replace(tmp_path, path)
+            logger.info(f"Saved session for {username} ({len(cookies)} cookies)")
+            return True
+        except Exception as e:
+            logger.error(f"Error saving session for {username}: {str(e)}")
+            return False
+
+    def load(self, username):
+        """
+        Returns the saved, unexpired cookies for the account, or None.
+        """
+        path = self.path_for(username)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Unreadable session file for {username}: {str(e)}")
+            return None
+        if time.time() - data.get("saved_at", 0) > self.max_age:
+            logger.info(f"Saved session for {username} is older than {self.max_age // 86400} days, ignoring it")
+            return None
+        now = time.time()
+        cookies = [c for c in data.get("cookies", []) if not c.get("expiry") or c["expiry"] > now]
+        return cookies or None
+
+    def restore(self, driver, username, timeout=10):
+        """
+        Restores the saved session of an account into the driver and validates it.
+
+        Returns:
+            bool: True if the browser is now logged in and the login flow can be skipped.
+        """
+        cookies = self.load(username)
+        if not cookies:
+            return False
+        try:
+            # Cookies can only be set for the domain the browser is currently on.
+            driver.get(BASE_URL)
+            for cookie in cookies:
+                cookie = {k: v for k, v in cookie.items() if k in ("name", "value", "domain", "path", "expiry", "secure", "httpOnly", "sameSite")}
+                try:
+                    driver.add_cookie(cookie)
+                except Exception as e:
+                    logger.debug(f"Skipping cookie {cookie.get('name')}: {str(e)}")
+        except Exception as e:
+            logger.warning(f"Error restoring session for {username}: {str(e)}")
+            return False
+        valid = self.validate(driver, timeout)
+        if valid:
+            logger.info(f"Restored saved session for {username}")
+            return True
+        if valid is None:
+            # A slow or failed page load says nothing about the cookies; keep them for the next start.
+            logger.info(f"Could not validate the saved session for {username}, logging in instead")
+            return False
+        logger.info(f"Saved session for {username} has expired, a full login is needed")
+        self.clear(username)
+        return False
+
+    def validate(self, driver, timeout=10):
+        """
+        Checks cheaply whether the driver is logged in: load the home timeline once and look for the
+        logged-in navigation instead of being redirected to the login flow.
+
+        Returns:
+            bool: True if logged in, False if the login flow was shown, or None if neither was seen in time.
+        """
+        try:
+            driver.get(HOME_URL)
+            WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+                lambda d: any(marker in d.current_url for marker in LOGIN_URL_MARKERS)
+                or d.find_elements(By.CSS_SELECTOR, LOGGED_IN_SELECTOR))
+        except TimeoutException:
+            logger.warning(f"Session validation timed out after {timeout}s")
+            return None
+        except Exception as e:
+            logger.warning(f"Error validating session: {str(e)}")
+            return None
+        return not any(marker in driver.current_url for marker in LOGIN_URL_MARKERS)
+
+    def clear(self, username):
+        """
+        Deletes the saved session of an account.
+        """
+        path = self.path_for(username)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,87 @@
+"""
+Checks the normalisation, validation and diffing of uploaded handle lists.
+"""
+
+import io
+
+import pytest
+
+from handle_lists import normalize_handle, ingest_lines, ingest_stream, diff_handles, MAX_REPORTED_ERRORS
+
+
+@pytest.mark.parametrize("line", [
+    "alice",
+    "@alice",
+    "  alice  ",
+    "https://x.com/alice",
+    "http://twitter.com/alice",
+    "x.com/alice",
+    "www.x.com/alice/",
+    "twitter.com/alice/status/1846500000000000000",
+    "mobile.twitter.com/alice?lang=en",
+    "https://X.com/alice#top",
+])
+def test_normalize_handle_forms(line):
+    assert normalize_handle(line) == "alice"
+
+
+def test_normalize_handle_keeps_spelling():
+    assert normalize_handle("https://x.com/Alice_01") == "Alice_01"
+
+
+@pytest.mark.parametrize("line, reason", [
+    ("https://example.com/alice", "not an X profile URL"),
+    ("alice/bob", "not an X profile URL"),
+    ("a" * 16, "not a valid handle"),
+    ("al ice", "not a valid handle"),
+    ("@", "not a valid handle"),
+    ("x.com/home", "is an x.com page"),
+    ("https://x.com/i/flow/login", "is an x.com page"),
+    ("Explore", "is an x.com page"),
+])
+def test_normalize_handle_rejects(line, reason):
+    with pytest.raises(ValueError, match=reason):
+        normalize_handle(line)
+
+
+def test_ingest_lines_dedupes_and_reports_line_numbers():
+    handle_list = ingest_lines([
+        "# accounts to watch\n",
+        "alice\n",
+        "\n",
+        "@ALICE\n",
+        "https://x.com/bob\n",
+        "x.com/settings\n",
+        "not a handle\n",
+        "carol\n",
+    ])
+    assert handle_list.handles == ["alice", "bob", "carol"]
+    assert handle_list.lines == 8
+    assert handle_list.duplicates == 1
+    assert handle_list.error_count == 2
+    assert [(number, text) for number, text, _ in handle_list.errors] == [(6, "x.com/settings"), (7, "not a handle")]
+    summary = handle_list.summary()
+    assert summary["handles"] == 3 and summary["rejected"] == 2
+    assert summary["errors"][0]["line"] == 6
+
+
+def test_ingest_lines_caps_reported_errors():
+    handle_list = ingest_lines(["bad/line\n"] * (MAX_REPORTED_ERRORS + 5))
+    assert handle_list.error_count == MAX_REPORTED_ERRORS + 5
+    assert len(handle_list.errors) == MAX_REPORTED_ERRORS
+
+
+def test_ingest_stream_strips_bom():
+    handle_list = ingest_stream(io.BytesIO("﻿alice\r\nbob\n".encode("utf-8")))
+    assert handle_list.handles == ["alice", "bob"]
+    assert handle_list.error_count == 0
+
+
+def test_diff_handles():
+    added, removed = diff_handles(["Alice", "bob", "carol"], ["alice", "@dave", "Bob", "erin"])
+    assert added == ["@dave", "erin"]
+    assert removed == ["carol"]
+
+
+def test_diff_handles_unchanged():
+    assert diff_handles(["alice"], ["ALICE"]) == ([], [])
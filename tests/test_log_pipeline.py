@@ -0,0 +1,48 @@
+"""
+Checks that DebugSampler thins out DEBUG records per call site.
+"""
+
+import logging
+
+from log_pipeline import DebugSampler
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def sampled_logger(every):
+    logger = logging.getLogger(f"test_log_pipeline.{every}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    handler = Collect()
+    handler.addFilter(DebugSampler(every))
+    logger.handlers = [handler]
+    return logger, handler
+
+
+def test_formatted_messages_from_one_call_site_are_sampled():
+    logger, handler = sampled_logger(10)
+    for i in range(100):
+        logger.debug(f"Found tweet link: https://x.com/user/status/{i}")
+    assert len(handler.records) == 10
+
+
+def test_call_sites_are_sampled_separately():
+    logger, handler = sampled_logger(10)
+    for i in range(20):
+        logger.debug(f"first {i}")
+        logger.debug(f"second {i}")
+    assert [record.getMessage() for record in handler.records] == ["first 0", "second 0", "first 10", "second 10"]
+
+
+def test_other_levels_always_pass():
+    logger, handler = sampled_logger(10)
+    for i in range(20):
+        logger.info(f"info {i}")
+    assert len(handler.records) == 20
@@ -0,0 +1,102 @@
+"""
+Checks parse_timeline() against the recorded UserTweets response in benchmarks/fixtures/user_tweets.json.
+"""
+
+import os
+import json
+
+import pytest
+
+from network_capture import parse_timeline
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures",
+                       "user_tweets.json")
+
+PINNED_ID = "1790000000000000000"
+NEWEST_ID = "1846500000000000000"
+RETWEET_ORIGINAL_ID = "1846012345678901248"
+VISIBILITY_ID = "1846300000000000002"
+THREAD_START_ID = "1846123456789012480"
+THREAD_REPLY_ID = "1846123999999012864"
+PROMOTED_ID = "1846600000000000000"
+
+
+@pytest.fixture(scope="module")
+def records():
+    with open(FIXTURE, "r", encoding="utf-8") as f:
+        return parse_timeline(json.load(f))
+
+
+def by_id(records):
+    return {record["id"]: record for record in records}
+
+
+def test_pinned_tweet_comes_first(records):
+    # The pin instruction follows the regular entries in the response
+    assert records[0]["id"] == PINNED_ID
+    assert records[0]["pinned"] is True
+    assert all(not record["pinned"] for record in records[1:])
+
+
+def test_timeline_order(records):
+    assert [record["id"] for record in records] == [
+        PINNED_ID, NEWEST_ID, RETWEET_ORIGINAL_ID, VISIBILITY_ID, THREAD_REPLY_ID, THREAD_START_ID,
+    ]
+
+
+def test_retweet_is_flagged_with_the_original_tweet(records):
+    record = by_id(records)[RETWEET_ORIGINAL_ID]
+    assert record["retweet"] is True
+    assert record["author"] == "XDevelopers"
+    assert record["url"] == f"https://x.com/XDevelopers/status/{RETWEET_ORIGINAL_ID}"
+    assert record["text"] == "Original tweet that was retweeted"
+    assert "1846400000000000001" not in by_id(records)
+
+
+def test_tweet_with_visibility_results_is_unwrapped(records):
+    record = by_id(records)[VISIBILITY_ID]
+    assert record["author"] == "example"
+    assert record["retweet"] is False
+    assert record["text"] == "Tweet with visibility results"
+
+
+def test_reply_flag(records):
+    tweets = by_id(records)
+    assert tweets[THREAD_REPLY_ID]["reply"] is True
+    assert tweets[THREAD_START_ID]["reply"] is False
+    assert tweets[NEWEST_ID]["reply"] is False
+
+
+def test_cursor_promoted_and_who_to_follow_entries_are_skipped(records):
+    assert PROMOTED_ID not in by_id(records)
+    assert len(records) == 6
+    assert all(record["author"] != "advertiser" for record in records)
+
+
+def test_records_have_the_dom_record_keys(records):
+    record = by_id(records)[NEWEST_ID]
+    assert record == {
+        "url": f"https://x.com/example/status/{NEWEST_ID}",
+        "id": NEWEST_ID,
+        "author": "example",
+        "timestamp": "2024-10-16T18:02:11+00:00",
+        "pinned": False,
+        "retweet": False,
+        "reply": False,
+        "text": "Newest tweet #launch",
+    }
+
+
+def test_conversation_module_is_ordered_newest_first(records):
+    ids = [record["id"] for record in records]
+    assert ids.index(THREAD_REPLY_ID) < ids.index(THREAD_START_ID)
+
+
+def test_select_new_keeps_newer_thread_replies(records):
+    # timeline.py imports Selenium for its DOM fallback
+    pytest.importorskip("selenium")
+    from timeline import select_new
+
+    new = [record["id"] for record in select_new(records, int(THREAD_START_ID))]
+    assert new == [NEWEST_ID, VISIBILITY_ID, THREAD_REPLY_ID]
+    assert [record["id"] for record in select_new(records, None)] == [NEWEST_ID]
@@ -0,0 +1,194 @@
+"""
+timeline.py
+
+This module extracts tweets from a rendered timeline. extract_timeline() pulls every visible tweet in a single
+execute_script round-trip and returns compact records; records_from_elements() is the slower per-element
+fallback that walks WebElements the way the bot originally did.
+
+A record is a dictionary with the keys:
+    - "url": Status URL of the tweet.
+    - "id": Tweet id (the numeric part of the status URL).
+    - "author": Handle taken from the status URL.
+    - "timestamp": ISO timestamp from the tweet's <time> element, or None.
+    - "pinned", "retweet", "reply": Flags derived from the tweet's social context.
+    - "text": Tweet text, truncated to TEXT_LIMIT characters.
+    - "element": The tweet WebElement.
+"""
+
+import logging
+
+from selenium.webdriver.common.by import By
+
+logger = logging.getLogger(__name__)
+
+TEXT_LIMIT = 280
+
+EXTRACT_TIMELINE_JS = """
+var limit = arguments[0], textLimit = arguments[1];
+var articles = document.querySelectorAll("article[data-testid='tweet']");
+var out = [];
+for (var i = 0; i < articles.length && (limit === null || out.length < limit); i++) {
+    var art = articles[i];
+    var time = art.querySelector("a[href*='/status/'] time");
+    var link = time ? time.closest("a") : art.querySelector("a[href*='/status/']");
+    if (!link) { continue; }
+    var url = link.href;
+    var parts = url.split("/status/");
+    var author = parts[0].split("/").pop();
+    var id = parts[1].split("?")[0].split("/")[0];
+    var context = art.querySelector("[data-testid='socialContext']");
+    var contextText = context ? context.textContent.toLowerCase() : "";
+    var textNode = art.querySelector("[data-testid='tweetText']");
+    var reply = false;
+    var divs = art.querySelectorAll("div");
+    for (var j = 0; j < divs.length && j < 60; j++) {
+        if (divs[j].childElementCount < 3 && divs[j].textContent.indexOf("Replying to") === 0) { reply = true; break; }
+    }
+    out.push({
+        url: url,
+        id: id,
+        author: author,
+        timestamp: time ? time.getAttribute("datetime") : null,
+        pinned: contextText.indexOf("pinned") !== -1,
+        retweet: contextText.indexOf("repost") !== -1 || contextText.indexOf("retweet") !== -1,
+        reply: reply,
+        text: textNode ? textNode.innerText.slice(0, textLimit) : "",
+        element: art
+    });
+}
+return out;
+"""
+
+FIND_TWEET_JS = """
+var id = arguments[0];
+var links = document.querySelectorAll("article[data-testid='tweet'] a[href*='/status/" + id + "']");
+for (var i = 0; i < links.length; i++) {
+    var tail = links[i].href.split("/status/")[1].split("?")[0].split("/")[0];
+    if (tail === id) { return links[i].closest("article"); }
+}
+return null;
+"""
+
+
+def status_id_from_url(tweet_url):
+    """
+    Returns the tweet id from a status URL such as https://x.com/user/status/123?s=20.
+    """
+    return tweet_url.split("/status/")[-1].split("?")[0].split("/")[0]
+
+
+def numeric_id(tweet_id):
+    """
+    Returns a tweet id as an int (tweet ids are snowflakes, so larger means newer), or None if it is not numeric.
+    """
+    try:
+        return int(tweet_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(record):
+    """
+    Returns "pinned", "retweet" or "tweet" for a timeline record.
+    """
+    if record.get("pinned"):
+        return "pinned"
+    if record.get("retweet"):
+        return "retweet"
+    return "tweet"
+
+
+def select_new(records, high_water, limit=None):
+    """
+    Returns the user's own tweets newer than the high-water mark, most recent first. Pinned tweets and retweets
+    are skipped. Every record is compared with the mark instead of stopping at the first older one, since
+    conversation modules list a thread oldest first and a newer reply can follow an older tweet. Without a
+    mark only the newest tweet is returned, which sets the baseline.
+
+    Args:
+        records (list): Timeline records, most recent first (a pinned tweet may come first).
+        high_water (int): Numeric id of the newest tweet already processed, or None.
+        limit (int, optional): Maximum number of tweets returned.
+
+    Returns:
+        list: The new records.
+    """
+    new = []
+    for record in records:
+        if classify(record) != "tweet":
+            continue
+        tweet_id = numeric_id(record.get("id"))
+        if tweet_id is None:
+            continue
+        if high_water is None or tweet_id > high_water:
+            new.append((tweet_id, record))
+    new.sort(key=lambda item: item[0], reverse=True)
+    if high_water is None:
+        limit = 1
+    return [record for _, record in new[:limit]]
+
+
+def extract_timeline(driver, limit=None):
+    """
+    Extracts all visible tweets on the current page in a single JavaScript call.
+
+    Args:
+        driver (webdriver.Chrome): Selenium WebDriver instance.
+        limit (int, optional): Maximum number of records to return.
+
+    Returns:
+        list: A list of tweet records, or None if the script failed (callers should fall back).
+    """
+    try:
+        records = driver.execute_script(EXTRACT_TIMELINE_JS, limit, TEXT_LIMIT)
+        if records is None:
+            return None
+        logger.debug(f"Extracted {len(records)} tweets in one round-trip")
+        return records
+    except Exception as e:
+        logger.warning(f"Single round-trip timeline extraction failed: {str(e)}")
+        return None
+
+
+def records_from_elements(tweet_elements, limit=None):
+    """
+    Builds tweet records by walking tweet WebElements one by one (one round-trip per lookup).
+    "url", "id", "author", "element" and the pinned/retweet flags (read from the social context, as the
+    script does) are filled in; "reply" defaults to False.
+    """
+    records = []
+    for tweet in tweet_elements:
+        if limit is not None and len(records) >= limit:
+            break
+        try:
+            link_element = tweet.find_element(By.XPATH, './/a[contains(@href, "/status/")]')
+            tweet_url = link_element.get_attribute("href")
+        except Exception as e:
+            logger.error(f"Error extracting tweet URL: {str(e)}")
+            continue
+        try:
+            contexts = tweet.find_elements(By.CSS_SELECTOR, "[data-testid='socialContext']")
+            context = contexts[0].text.lower() if contexts else ""
+        except Exception as e:
+            logger.warning(f"Error reading tweet social context: {str(e)}")
+            context = ""
+        records.append({
+            "url": tweet_url,
+            "id": status_id_from_url(tweet_url),
+            "author": tweet_url.split("/status/")[0].rstrip("/").split("/")[-1],
+            "timestamp": None,
+            "pinned": "pinned" in context,
+            "retweet": "repost" in context or "retweet" in context,
+            "reply": False,
+            "text": "",
+            "element": tweet,
+        })
+    return records
+
+
+def find_tweet_element(driver, tweet_url):
+    """
+    Returns the tweet article on the current page whose status link matches tweet_url, in one round-trip.
+    Returns None if no such tweet is rendered, and raises if the script itself fails.
+    """
+    return driver.execute_script(FIND_TWEET_JS, status_id_from_url(tweet_url))
@@ -8,119 +8,291 @@ Each tweet is uniquely identified by its URL (or extracted tweet id) to prevent
 """
 
 import json
+import copy
+import queue
 import time
+import threading
 import logging
-import os
 import datetime
-import tkinter.messagebox as messagebox
 from actions import login, logout
+from ledger import get_ledger
+from log_pipeline import configure_logging, set_log_context
+from sessions import SessionStore
+from driver_profiles import build_options, apply_runtime_settings, get_profile
+from driver_provisioning import ensure_chromedriver, invalidate_chromedriver, is_version_mismatch
+from waits import (WaitEngine, timeline_rendered, timeline_settled, tweet_detail_rendered, repost_menu_open,
+                   compose_modal_open, post_button_enabled, post_confirmed)
+from selector_registry import default_registry
+from worker_pool import WorkerPool
+from result_buffer import ResultBuffer
+from metrics import track, timed, ACTIVE_DRIVERS, TWEETS_DETECTED, TWEETS_POSTED, TWEETS_RECOVERED, STANDALONE
+from catchup import TimelineHarvester, reaches_mark
+from handle_lists import handle_key
+from scheduler import PollScheduler
+from batch_detection import BatchDetector, build_search_queries, MAX_QUERY_LENGTH
+from detection_hub import get_hub
+from pipeline import DetectPostPipeline
+from profile_state import get_profile_states, profile_classified, DEAD_STATES, UNKNOWN
+from rate_governor import get_governor, rate_limit_message, RateLimitedError
+from network_capture import NetworkTimelineReader, drain as drain_network_log
+from timeline import (extract_timeline, records_from_elements, find_tweet_element, status_id_from_url, numeric_id,
+                      classify, select_new)
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("twitter_bot.log"),
-        logging.StreamHandler()
-    ]
-)
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+
 logger = logging.getLogger(__name__)
 
-def get_driver():
+# Outcomes of check_for_new_tweet(), kept in last_check_status for the PollScheduler
+CHECK_POSTED = "posted"    # at least one new tweet was retweeted
+CHECK_QUIET = "quiet"      # the profile was read but nothing was retweeted
+CHECK_FAILED = "failed"    # the profile could not be read
+
+# Most missed tweets of one handle posted by the initial pass; newer ones stay above the mark for monitoring
+INITIAL_CATCHUP_POSTS = 5
+
+def get_driver(profile="default"):
     """
-    Initializes and returns a Selenium WebDriver using Selenium Manager.
+    Initializes and returns a Selenium WebDriver. The ChromeDriver is provisioned on the first call (see
+    driver_provisioning.py); without one, Selenium Manager locates it.
+    
+    Args:
+        profile (str, optional): Name of a driver profile from driver_profiles.py ("default", "detect", "post").
     
     Returns:
         webdriver.Chrome: An instance of the Chrome WebDriver.
     """
-    service = Service()  # Uses Selenium Manager
-    options = webdriver.ChromeOptions()
+    driver_path = ensure_chromedriver()
+    service = Service(driver_path) if driver_path else Service()
+    options = build_options(profile)
     driver = webdriver.Chrome(service=service, options=options)
+    apply_runtime_settings(driver, profile)
     return driver
 
 class TwitterBot:
-    def __init__(self, username, password,phone_number):
+    def __init__(self, username, password,phone_number, pool_size=1, driver_profile="default", worker_profile=None,
+                 check_budget=None, detection_mode="profile", max_query_length=MAX_QUERY_LENGTH, post_workers=0,
+                 post_queue_size=20, catchup_depth=100):
         """
-        Initializes a TwitterBot instance.
+        Initializes a TwitterBot instance. The browser is not started here but on first use (ensure_driver()),
+        so bots can be created cheaply, e.g. while a web request is being handled.
         
         Args:
             username (str): Twitter username.
             password (str): Twitter password.
+            pool_size (int, optional): Number of browser sessions used to process handles in parallel.
+            driver_profile (str, optional): Driver profile of the bot's own browser (see driver_profiles.py).
+            worker_profile (str, optional): Driver profile of the extra worker browsers. Defaults to driver_profile.
+            check_budget (int, optional): Global cap on profile checks per hour in monitoring mode.
+            detection_mode (str, optional): "profile" checks each profile page; "search" detects new tweets for
+                                            many handles at once through combined `from:` searches; "shared"
+                                            checks profiles through the DetectionHub shared with other bots.
+            max_query_length (int, optional): Query length limit used to chunk handles in "search" mode.
+            post_workers (int, optional): Number of pool sessions dedicated to posting in "profile" monitoring.
+                                          When set (and the pool has sessions left for detection), detection and
+                                          posting run as separate pipeline stages.
+            post_queue_size (int, optional): Capacity of the pipeline's post queue.
+            catchup_depth (int, optional): Most tweets scrolled through to reach a user's high-water mark when the
+                                           first screen does not (see catchup.py); 0 disables catch-up.
         
         Attributes:
             driver (webdriver.Chrome): Selenium WebDriver instance.
-            results (list): List to store operation results.
+            results (ResultBuffer): Bounded, sequence-numbered buffer of operation results.
             monitoring (bool): Flag for monitoring mode.
             processed_tweets_map (dict): In-memory mapping of user IDs to processed tweet IDs.
+            ledger (TweetLedger): Shared ledger of the last processed tweet id per user.
+            waits (WaitEngine): Condition-driven waits with per-step adaptive timeouts.
+            selectors (SelectorRegistry): Learned selector resolution for the repost/quote UI flow.
+            sessions (SessionStore): Saved login sessions, restored when the driver is set up.
+            session_restored (bool): True if the driver was logged in from a saved session.
+            network_capture (bool): True if timelines are read from captured network responses (see network_capture.py).
+            scheduler (PollScheduler): Per-account polling schedule, created when monitoring starts.
+            caught_up (dict): Per handle, the ids of the last first screen known to connect to the high-water
+                              mark and the newest new tweet found below it (see catch_up()); shared with the
+                              worker clones.
+            last_check_status (str): Outcome of the last check_for_new_tweet() (CHECK_POSTED, CHECK_QUIET or
+                                     CHECK_FAILED).
+            pipeline (DetectPostPipeline): The detect/post pipeline while it runs, or None.
+            checkpoint (BotCheckpoint): Durable progress of the run (set by app.py), or None.
+            governor (RateGovernor): Per-account posting rate limits, shared by all bots and workers.
+            profile_states (ProfileStateCache): Suspended and missing accounts shared by all bots, and the protected
+                                                ones this account cannot read.
+            bot_id (str): Identifier assigned by app.py.
+            orchestrator (Orchestrator): Fleet orchestrator gating page loads, or None when run standalone.
+            phase (str): Current phase of repost_tweets, reported by the job endpoints.
+            cancelled (bool): Set by cancel(); stops the initial pass and monitoring.
+            owner (TwitterBot): The bot itself; worker clones keep pointing at the bot that spawned them, whose
+                                monitoring and cancelled flags are the ones stop_monitoring() and cancel() set.
+            error (str): Last driver or login error, reported by the job endpoints.
+            user_ids (list): Handles the bot monitors; changed while running by update_handles().
+            handles_version (int): Incremented by every update_handles() call.
         """
+        # Bot threads only enqueue log records, one writer thread does the file I/O (no-op if already set up)
+        configure_logging("twitter_bot.log")
         self.username = username
         self.password = password
         self.phone_number = phone_number
         self.driver = None
-        self.results = []
+        self.results = ResultBuffer()
         self.monitoring = True
         self.processed_tweets_map = {}  # e.g., { "ElonMusk": {"12345", "67890"}, ... }
-        self.setup_driver()
+        self.ledger = get_ledger()
+        self.waits = None
+        self.selectors = default_registry
+        self.pool_size = pool_size
+        self.driver_profile = driver_profile
+        self.worker_profile = worker_profile or driver_profile
+        self.sessions = SessionStore()
+        self.session_restored = False
+        self.network_capture = False
+        self.check_budget = check_budget
+        self.detection_mode = detection_mode
+        self.max_query_length = max_query_length
+        self.post_workers = post_workers
+        self.post_queue_size = post_queue_size
+        self.catchup_depth = catchup_depth
+        self.caught_up = {}
+        self.scheduler = None
+        self.pipeline = None
+        self.checkpoint = None
+        self.governor = get_governor()
+        self.profile_states = get_profile_states()
+        self.last_check_new_tweets = 0
+        self.last_check_status = None
+        self.bot_id = None
+        self.orchestrator = None
+        self.phase = "created"
+        self.cancelled = False
+        self.owner = self
+        self.error = None
+        self.user_ids = []
+        self.handles_version = 0
+        self._handles_lock = threading.Lock()
+
+    def ensure_driver(self):
+        """
+        Starts the browser if it is not running yet. Returns True if the bot has a driver.
+        """
+        if self.driver is None:
+            self.setup_driver()
+        return self.driver is not None
 
     def setup_driver(self):
         try:
-            self.driver = get_driver()
+            try:
+                self.driver = get_driver(self.driver_profile)
+            except Exception as e:
+                if not is_version_mismatch(e):
+                    raise
+                logger.warning(f"ChromeDriver does not match Chrome, provisioning it again: {str(e)}")
+                invalidate_chromedriver()
+                self.driver = get_driver(self.driver_profile)
+            ACTIVE_DRIVERS.inc()
+            self.waits = WaitEngine(self.driver)
+            self.network_capture = get_profile(self.driver_profile).get("network_capture", False)
+            self.session_restored = self.sessions.restore(self.driver, self.username)
         except Exception as e:
-            logger.error("Error setting up driver: " + str(e))
-            messagebox.showerror("Driver Error", str(e))
+            self.report_error("Driver error", str(e))
+
+    def spawn_worker(self, index):
+        """
+        Creates a worker clone of this bot with its own WebDriver for the worker pool. The clone shares the
+        credentials, ledger, selector registry and processed_tweets_map but keeps its own results.
+
+        Args:
+            index (int): Worker number, used for logging.
+
+        Returns:
+            TwitterBot: The worker (its driver is None if the browser could not be started).
+        """
+        worker = copy.copy(self)
+        worker.driver = None
+        worker.waits = None
+        worker.session_restored = False
+        worker.results = []
+        worker.worker_index = index
+        worker.driver_profile = self.worker_profile
+        worker.setup_driver()
+        logger.info(f"Spawned browser worker {index} for {self.username}")
+        return worker
+
+    def close(self):
+        """
+        Quits this bot's browser session.
+        """
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logger.warning(f"Error closing driver: {str(e)}")
+            ACTIVE_DRIVERS.dec()
+            self.driver = None
 
+    @timed("login")
     def perform_login(self,phone):
         try:
-            logger.info('here')
+            if self.session_restored:
+                logger.info(f"Using saved session for {self.username}, skipping login")
+                return True
             logger.info(self.phone_number)
-            login(self.driver, self.username, self.password, self.phone_number)
+            logged_in = login(self.driver, self.username, self.password, self.phone_number)
             
-            # if login_succes:
+            if logged_in:
+                self.sessions.save(self.driver, self.username)
 
             logger.info("Login successful")
             return True
             # else:
             #     self.perform_login()
         except Exception as e:
-            logger.error("Login failed: " + str(e))
-            messagebox.showerror("Login Error", f"Login failed: {str(e)}")
+            self.report_error("Login failed", str(e))
             return False
 
+    def report_error(self, title, message):
+        """
+        Logs an error and keeps it on the bot for the job endpoints. Safe to call from any worker thread.
+        """
+        logger.error(f"{title}: {message}")
+        self.error = f"{title}: {message}"
+
+    def load_page(self, url, driver=None):
+        """
+        Loads a URL, holding one of the orchestrator's host-wide page-load slots while the page loads.
+        """
+        driver = driver or self.driver
+        if self.orchestrator is None:
+            driver.get(url)
+            return
+        with self.orchestrator.page_load(self.bot_id):
+            driver.get(url)
+
+    @timed("navigate")
     def navigate_to_user_profile(self, user_id):
+        """
+        Loads a user's profile and classifies it (see profile_state.py). Accounts cached as suspended, missing or
+        protected are skipped without loading the page until they are due for a recheck.
+
+        Returns:
+            bool: True if the profile can be read (ok, empty or not classified in time), False otherwise.
+        """
         try:
+            cached = self.profile_states.skip(user_id, viewer=self.username)
+            if cached:
+                logger.debug(f"Skipping {user_id}: cached as {cached}")
+                return False
             logger.info(f"Navigating to user profile: {user_id}")
-            self.driver.get(f"https://twitter.com/{user_id}")
-            wait = WebDriverWait(self.driver, 20)
-            try:
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '[data-testid="primaryColumn"]')))
-            except TimeoutException:
-                logger.warning("Primary column not found, trying alternative selectors")
-                try:
-                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '[data-testid="UserName"]')))
-                except TimeoutException:
-                    logger.warning("User name not found for " + user_id)
-            page_source = self.driver.page_source.lower()
-            error_messages = [
-                "this account doesn't exist",
-                "user not found",
-                "hmm...this page doesn't exist",
-                "account suspended"
-            ]
-            for error in error_messages:
-                if error in page_source:
-                    logger.warning(f"User {user_id} does not exist or is suspended")
-                    self.results.append({"status": "warning", "user": user_id, "message": "User does not exist or is suspended"})
-                    return False
-            time.sleep(5)
-            logger.info(f"Successfully navigated to {user_id}'s profile")
+            self.load_page(f"https://twitter.com/{user_id}")
+            state = self.waits.wait_for("profile_ready", profile_classified(), raise_on_timeout=False) or UNKNOWN
+            self.profile_states.record(user_id, state, viewer=self.username)
+            if state in DEAD_STATES:
+                logger.warning(f"User {user_id} is {state.replace('_', ' ')}")
+                self.results.append({"status": "warning", "user": user_id,
+                                     "message": f"User is {state.replace('_', ' ')}"})
+                return False
+            logger.info(f"Successfully navigated to {user_id}'s profile ({state})")
             return True
         except Exception as e:
             logger.error(f"Error navigating to user profile {user_id}: {str(e)}")
@@ -138,13 +310,18 @@ class TwitterBot:
         Returns:
             list: A list of dictionaries with keys:
                   - "tweet": The tweet WebElement.
-                  - "unique_id": A unique identifier (extracted from aria-labelledby if available).
+                  - "unique_id": The tweet id (or, on the per-element fallback, the aria-labelledby id).
+                  - "record": The full timeline record, when the single round-trip extraction succeeded.
                   Returns an empty list on error.
         """
         try:
             if not self.navigate_to_user_profile(user_id):
                 return []
-            time.sleep(3)
+            self.waits.wait_for("timeline", timeline_settled(), raise_on_timeout=False)
+            records = extract_timeline(self.driver, count)
+            if records is not None:
+                logger.info(f"Found {len(records)} tweets in timeline for user {user_id}")
+                return [{"tweet": r["element"], "unique_id": r["id"], "record": r} for r in records]
             container = self.driver.find_element(By.CSS_SELECTOR, '[aria-labelledby^="accessible-list-"]')
             tweets = container.find_elements(By.CSS_SELECTOR, 'article[data-testid="tweet"]')
             logger.info(f"Found {len(tweets)} tweets in accessible list for user {user_id}")
@@ -162,6 +339,53 @@ class TwitterBot:
             logger.error(f"Error finding tweets in accessible list for {user_id}: {str(e)}")
             return []
 
+    def get_timeline_records(self, tweet_elements=None, limit=None):
+        """
+        Extracts tweet records (see timeline.py) for the tweets visible on the current page with a single
+        execute_script call, falling back to walking tweet_elements one by one if the script fails.
+
+        Args:
+            tweet_elements (list, optional): Already located tweet WebElements used by the fallback.
+            limit (int, optional): Maximum number of records to return.
+
+        Returns:
+            list: A list of tweet record dictionaries.
+        """
+        records = extract_timeline(self.driver, limit)
+        if records is not None:
+            return records
+        logger.warning("Falling back to per-element tweet extraction")
+        if tweet_elements is None:
+            tweet_elements = self.driver.find_elements(By.CSS_SELECTOR, "article[data-testid='tweet']")
+        return records_from_elements(tweet_elements, limit)
+
+    def get_profile_records(self, user_id, limit=None):
+        """
+        Navigates to a user's profile and returns its tweet records, most recent first (pinned tweet first).
+        The records are parsed from the captured UserTweets response when the driver profile has network
+        capture enabled; otherwise, or if no response is captured in time, they are extracted from the DOM.
+
+        Returns:
+            list: Tweet records (network records have no "element" key), or None if navigation failed.
+        """
+        if self.network_capture:
+            drain_network_log(self.driver)
+        if not self.navigate_to_user_profile(user_id):
+            return None
+        with track(self.bot_id, "extract"):
+            if self.network_capture:
+                start = time.monotonic()
+                records = NetworkTimelineReader(self.driver).read(timeout=self.waits.timeout_for("timeline_response"))
+                self.waits.record("timeline_response", time.monotonic() - start, timed_out=records is None)
+                if records is not None:
+                    logger.info(f"Read {len(records)} tweets for {user_id} from the timeline response")
+                    return records[:limit] if limit else records
+                logger.warning(f"No timeline response captured for {user_id}, falling back to the DOM")
+            tweet_elements = self.waits.wait_for("timeline", timeline_rendered())
+            if not tweet_elements:
+                return []
+            return self.get_timeline_records(tweet_elements, limit)
+
     def get_tweet_id(self, tweet_element):
         try:
             tweet_id = tweet_element.get_attribute("aria-labelledby")
@@ -193,45 +417,28 @@ class TwitterBot:
 
     def get_logged_tweet_ids(self, user_id):
         """
-        Reads the posted_tweet_ids.txt file and returns a set of tweet IDs for the given user.
+        Returns the set of logged tweet IDs for the given user from the shared ledger.
         (In our updated design, we store only one tweet id per user.)
         """
-        logged_ids = set()
         try:
-            if os.path.exists("posted_tweet_ids.txt"):
-                with open("posted_tweet_ids.txt", "r", encoding="utf-8") as f:
-                    for line in f:
-                        parts = line.strip().split(":", 1)
-                        if len(parts) == 2:
-                            uid = parts[0].strip()
-                            tweet_id = parts[1].strip()
-                            if uid == user_id:
-                                logged_ids.add(tweet_id)
+            return self.ledger.get_ids(user_id)
         except Exception as e:
             logger.error(f"Error reading logged tweet ids for {user_id}: {str(e)}")
-        return logged_ids
+            return set()
 
     def update_logged_tweet_id(self, user_id, tweet_url):
         """
-        Updates the posted_tweet_ids.txt file so that for the given user, only the tweet id extracted from tweet_url is saved.
+        Raises the user's high-water mark to the tweet id extracted from tweet_url, if that tweet is newer.
+        The update is appended to the ledger's write-ahead log instead of rewriting posted_tweet_ids.txt.
         """
         try:
-            tweet_id = tweet_url.split('/status/')[-1].split('?')[0]
-            existing = {}
-            if os.path.exists("posted_tweet_ids.txt"):
-                with open("posted_tweet_ids.txt", "r", encoding="utf-8") as f:
-                    for line in f:
-                        parts = line.strip().split(":", 1)
-                        if len(parts) == 2:
-                            existing[parts[0].strip()] = parts[1].strip()
-            existing[user_id] = tweet_id
-            with open("posted_tweet_ids.txt", "w", encoding="utf-8") as f:
-                for uid, tid in existing.items():
-                    f.write(f"{uid}: {tid}\n")
-            logger.info(f"Updated logged tweet id for {user_id}: {tweet_id}")
+            tweet_id = status_id_from_url(tweet_url)
+            if self.ledger.advance(user_id, tweet_id):
+                logger.info(f"Updated logged tweet id for {user_id}: {tweet_id}")
         except Exception as e:
             logger.error(f"Error updating logged tweet id for {user_id}: {str(e)}")
     
+    @timed("find_tweet")
     def find_tweet(self,driver, tweet_url):
         """
         Finds a tweet specified by URL.
@@ -244,8 +451,14 @@ class TwitterBot:
         - Required tweet from the page if no error encountered else None.
         """
         try:
-            driver.get(tweet_url)
-            time.sleep(5)  # Let the page load
+            self.load_page(tweet_url, driver)
+            self.waits.wait_for("tweet_detail", tweet_detail_rendered(tweet_url))
+            try:
+                tweet = find_tweet_element(driver, tweet_url)
+                if tweet is not None:
+                    return tweet
+            except Exception as e:
+                logger.warning(f"Script lookup of tweet failed, walking links instead: {str(e)}")
             # Find all the tweets (article elements) on the page
             tweets = driver.find_elements(By.CSS_SELECTOR, "article[data-testid='tweet']")
             for tweet in tweets:
@@ -258,7 +471,37 @@ class TwitterBot:
             print(f"Error while finding tweet: {str(e)}")
             return None
 
-    def quote_tweet(self, driver, tweet_url, quote_text, folder_path=None, image_index=None):
+    def acquire_post_slot(self, action):
+        """
+        Waits until the rate governor lets this account perform the action. Returns False if the bot was
+        cancelled or its monitoring stopped while waiting.
+        """
+        owner = self.owner
+        if self.governor.acquire(self.username, action,
+                                 should_continue=lambda: owner.monitoring and not owner.cancelled):
+            return True
+        logger.info(f"Gave up waiting for a {action} slot for {self.username}")
+        return False
+
+    def quote_tweet(self, driver, tweet_url, quote_text, folder_path=None, image_index=None, attempts=3):
+        """
+        Quotes a tweet specified by URL once the rate governor allows it. A post rejected by a rate limit is
+        retried (up to `attempts` times in all) when the governor's cooldown is over.
+
+        Returns:
+        - True if quote successful, False otherwise.
+        """
+        for attempt in range(attempts):
+            if not self.acquire_post_slot("quote"):
+                return False
+            try:
+                return self.quote_once(driver, tweet_url, quote_text, folder_path, image_index)
+            except RateLimitedError:
+                logger.warning(f"Quote of {tweet_url} rate-limited (attempt {attempt + 1} of {attempts})")
+        return False
+
+    @timed("quote")
+    def quote_once(self, driver, tweet_url, quote_text, folder_path=None, image_index=None):
         """
         Quotes a tweet specified by URL.
 
@@ -269,22 +512,24 @@ class TwitterBot:
 
         Returns:
         - True if quote successful, False otherwise.
+
+        Raises:
+        - RateLimitedError: if the page rejected the post with a rate-limit message.
         """
         try:        
             tweet = self.find_tweet(driver, tweet_url)
 
-            repost_button = tweet.find_element(By.CSS_SELECTOR, '[data-testid="retweet"]')
+            repost_button = self.selectors.resolve(driver, "retweet_button", root=tweet)
             repost_button.click()
-            time.sleep(1)
+            self.waits.wait_for("repost_menu", repost_menu_open())
 
-            confirm_repost = driver.find_element(By.CSS_SELECTOR, 'a[href="/compose/post"]')
+            confirm_repost = self.selectors.resolve(driver, "quote_option")
             confirm_repost.click()
-            time.sleep(2)
+            self.waits.wait_for("compose_modal", compose_modal_open())
 
             # Click on the Tweet button to open the tweet modal
-            tweet_box = driver.find_element(By.CSS_SELECTOR, 'div[aria-label="Post text"]')
+            tweet_box = self.selectors.resolve(driver, "tweet_input")
             tweet_box.click()
-            time.sleep(1)
 
             # Type the tweet message
             tweet_box.send_keys(quote_text+' ') #adding space to avoid hashtag window
@@ -304,19 +549,22 @@ class TwitterBot:
             #         time.sleep(3)
 
             # Post the tweet
-            tweet_button = driver.find_element(By.XPATH, '//button[@data-testid="tweetButton"]')
+            tweet_button = self.waits.wait_for("post_button", post_button_enabled())
             tweet_button.click()
 
-            # Allow time for the tweet to post
-            time.sleep(5)
+            # Wait for the "post sent" toast (or the modal closing) instead of a fixed delay
+            self.confirm_post("quote")
 
 
             return True
 
+        except RateLimitedError:
+            raise
         except Exception as e:
             print(f"Error while quoting tweet: {str(e)}")
             return False
 
+    @timed("repost")
     def repost_with_hashtag(self, tweet_element, hashtags):
         """
         Reposts (quote tweets) a given tweet with the provided hashtag(s) as the entire comment.
@@ -330,6 +578,8 @@ class TwitterBot:
         Returns:
             bool: True if reposting was successful; False otherwise.
         """
+        if not self.acquire_post_slot("repost"):
+            return False
         try:
             logger.info("Starting repost process with hashtag")
             clickable_elements = tweet_element.find_elements(By.TAG_NAME, 'a')
@@ -338,38 +588,15 @@ class TwitterBot:
                     href = element.get_attribute('href')
                     if href and '/status/' in href:
                         logger.info(f"Found tweet link: {href}")
-                        self.driver.get(href)
+                        self.load_page(href)
                         logger.info("Navigated to tweet detail page")
-                        time.sleep(3)
+                        self.waits.wait_for("tweet_detail", tweet_detail_rendered(href), raise_on_timeout=False)
                         break
                 except Exception as e:
                     logger.warning(f"Error checking link: {str(e)}")
                     continue
 
-            retweet_button = None
-            retweet_selectors = [
-                '[data-testid="retweet"]',
-                '[aria-label="Retweet"]',
-                '[aria-label*="retweet"]',
-                '//div[@aria-label="Retweet"]',
-                '//div[contains(@aria-label, "Retweet")]'
-            ]
-            for selector in retweet_selectors:
-                try:
-                    if selector.startswith("//"):
-                        buttons = self.driver.find_elements(By.XPATH, selector)
-                    else:
-                        buttons = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if buttons:
-                        for button in buttons:
-                            if button.is_displayed():
-                                retweet_button = button
-                                logger.info(f"Found retweet button with selector: {selector}")
-                                break
-                    if retweet_button:
-                        break
-                except Exception as e:
-                    logger.warning(f"Error finding retweet button with selector {selector}: {str(e)}")
+            retweet_button = self.selectors.resolve(self.driver, "retweet_button")
             if not retweet_button:
                 logger.error("Could not find retweet button")
                 return False
@@ -390,32 +617,8 @@ class TwitterBot:
                         logger.error(f"JavaScript click for tweet button failed: {str(js_e)}")
                         return False
 
-            time.sleep(2)
-            quote_option = None
-            quote_selectors = [
-                "//span[text()='Quote']",
-                "//span[contains(text(), 'Quote')]",
-                "//div[contains(text(), 'Quote')]",
-                '[data-testid="retweetConfirm"]',
-                "//div[contains(@role, 'menuitem')]//span[contains(text(), 'Quote')]",
-                "//div[@role='menuitem'][contains(., 'Quote')]"
-            ]
-            for selector in quote_selectors:
-                try:
-                    if selector.startswith("//"):
-                        elements = self.driver.find_elements(By.XPATH, selector)
-                    else:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        for element in elements:
-                            if element.is_displayed():
-                                quote_option = element
-                                logger.info(f"Found quote option with selector: {selector}")
-                                break
-                    if quote_option:
-                        break
-                except Exception as e:
-                    logger.warning(f"Error finding quote option with selector {selector}: {str(e)}")
+            self.waits.wait_for("repost_menu", repost_menu_open(), raise_on_timeout=False)
+            quote_option = self.selectors.resolve(self.driver, "quote_option")
             if not quote_option:
                 logger.error("Could not find Quote Tweet option")
                 return False
@@ -431,32 +634,9 @@ class TwitterBot:
                     logger.error(f"JavaScript click for Quote option failed: {str(js_e)}")
                     return False
 
-            time.sleep(2)
+            self.waits.wait_for("compose_modal", compose_modal_open(), raise_on_timeout=False)
             hashtag_text = " ".join(hashtags)
-            tweet_input = None
-            tweet_input_selectors = [
-                '[data-testid="tweetTextarea_0"]',
-                '[data-testid="tweetTextInput"]',
-                '[contenteditable="true"]',
-                '//div[@contenteditable="true"]',
-                '//div[@role="textbox"]'
-            ]
-            for selector in tweet_input_selectors:
-                try:
-                    if selector.startswith("//"):
-                        elements = self.driver.find_elements(By.XPATH, selector)
-                    else:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        for element in elements:
-                            if element.is_displayed():
-                                tweet_input = element
-                                logger.info(f"Found tweet input with selector: {selector}")
-                                break
-                    if tweet_input:
-                        break
-                except Exception as e:
-                    logger.warning(f"Error finding tweet input with selector {selector}: {str(e)}")
+            tweet_input = self.selectors.resolve(self.driver, "tweet_input")
             if not tweet_input:
                 logger.error("Could not find tweet input field")
                 return False
@@ -469,31 +649,7 @@ class TwitterBot:
                 logger.error(f"Error setting tweet input via JavaScript: {str(e)}")
                 return False
 
-            time.sleep(1)
-            tweet_button = None
-            tweet_button_selectors = [
-                '[data-testid="tweetButton"]',
-                '[data-testid="tweetButtonInline"]',
-                '//span[text()="Tweet"]',
-                '//div[@data-testid="tweetButtonInline"]',
-                '//div[contains(@role, "button")][.//span[contains(text(), "Tweet")]]'
-            ]
-            for selector in tweet_button_selectors:
-                try:
-                    if selector.startswith("//"):
-                        elements = self.driver.find_elements(By.XPATH, selector)
-                    else:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        for element in elements:
-                            if element.is_displayed() and element.is_enabled():
-                                tweet_button = element
-                                logger.info(f"Found tweet button with selector: {selector}")
-                                break
-                    if tweet_button:
-                        break
-                except Exception as e:
-                    logger.warning(f"Error finding tweet button with selector {selector}: {str(e)}")
+            tweet_button = self.selectors.resolve(self.driver, "tweet_button", require_enabled=True)
             if not tweet_button:
                 logger.error("Could not find tweet button")
                 return False
@@ -509,183 +665,226 @@ class TwitterBot:
                     logger.error(f"JavaScript click for tweet button failed: {str(js_e)}")
                     return False
 
-            time.sleep(5)
+            self.confirm_post("repost")
             logger.info("Successfully reposted tweet with hashtag")
             return True
         except Exception as e:
             logger.error(f"Error reposting tweet: {str(e)}")
             return False
 
-    def check_for_new_tweet(self, user_id, hashtag):
-        """
-        Checks the user's tweets in descending order (most recent first). For each tweet, if the tweet ID is not
-        equal to the saved tweet ID for that user (loaded from file), it retweets the tweet and logs it.
-        The process stops once a tweet is encountered that is already processed.
-        Finally, it updates the saved tweet id to only the top (most recent) tweet id.
-        
-        Returns:
-            tuple(bool, str): True and a message if at least one new tweet was retweeted; otherwise False.
+    def confirm_post(self, action):
         """
-        try:
-            new_top_tweet_id= None
-             # Navigate to the user's profile
-            if not self.navigate_to_user_profile(user_id):
-                return False, f"Could not navigate to {user_id}'s profile."
-            time.sleep(3)
-
-            # Wait until tweet elements are loaded using a robust CSS selector
-            wait = WebDriverWait(self.driver, 20)
-            tweet_elements = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article[data-testid='tweet']")))
-            
-            if not tweet_elements:
-                logger.info(f"No tweets found for {user_id} in check_for_new_tweet")
-                return False, "No tweets found"
-            
-            # Get the top tweet's URL and id (most recent tweet)
-            try:
-                top_link = tweet_elements[0].find_element(By.XPATH, './/a[contains(@href, "/status/")]')
-                top_tweet_url = top_link.get_attribute("href")
-            except Exception as e:
-                logger.error(f"Error extracting top tweet URL for {user_id}: {str(e)}")
-                return False, "Error extracting tweet URL"
-            
-            # Extract tweet URLs from these tweet elements
-            tweet_urls = []
-            for tweet in tweet_elements:
-                try:
-                    # Look for an anchor element whose href contains "/status/"
-                    link_element = tweet.find_element(By.XPATH, './/a[contains(@href, "/status/")]')
-                    tweet_url = link_element.get_attribute("href")
-                    tweet_urls.append(tweet_url)
-                except Exception as e:
-                    logger.error(f"Error extracting tweet URL for {user_id}: {str(e)}")
-            if not tweet_urls:
-                return False, f"No tweet URLs found for {user_id}"
-            
-            
-            new_tweets_retweeted = 0
-            # Iterate through tweet elements in order
-
-            for tweet in tweet_urls:
-                try:
-                    # Check if the top tweet id is already processed
-                    # If tweet id is present and the post is not pinned
-                    top_tweet_id = tweet.split("/status/")[-1].split('?')[0]
-                    saved_ids = self.get_logged_tweet_ids(user_id)
-                    saved_tweet_id = next(iter(saved_ids), None)
-
-                    if saved_tweet_id == top_tweet_id:
-                        logger.info(f"No new tweet for {user_id}: top tweet id {top_tweet_id} already processed")
-                        break
-                    
-                    # Navigate to the tweet's detail page
-                    self.driver.get(tweet)
+        Waits for the "post sent" toast (or the modal closing). A missed confirmation is counted as a failed
+        post_confirm phase but not as a failed post, so the tweet is not quoted twice. The outcome is reported
+        to the rate governor.
 
-                    # # Wait for the tweet detail element to be present
-                    # tweet_detail = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "article[data-testid='tweet']")))
+        Raises:
+            RateLimitedError: if the page shows a rate-limit message instead.
+        """
+        with track(self.bot_id, "post_confirm") as span:
+            if self.waits.wait_for("post_confirm", post_confirmed(), raise_on_timeout=False) is None:
+                span.fail()
+        message = rate_limit_message(self.driver)
+        if message:
+            self.governor.report_rate_limited(self.username, action)
+            raise RateLimitedError(message)
+        self.governor.report_success(self.username, action)
+
+    def post_new_tweets(self, user_id, tweet_urls, hashtag):
+        """
+        Quote-tweets each of the given new tweets (most recent first) and, if any succeeded, saves the first
+        successfully retweeted tweet as the user's top tweet id.
 
-                    # # Retweet the tweet with comment using the provided hashtag
-                    # retweeted = self.repost_with_hashtag(tweet_detail, [hashtag])
+        Args:
+            user_id (str): Twitter handle the tweets belong to.
+            tweet_urls (list): Status URLs of the new tweets, most recent first.
+            hashtag (str): Hashtag text to quote with.
 
-                    retweeted = self.quote_tweet(driver=self.driver,tweet_url=tweet,quote_text=" ".join(hashtag))
+        Returns:
+            int: Number of tweets retweeted.
+        """
+        new_top_tweet_id = None
+        new_tweets_retweeted = 0
+        if tweet_urls:
+            TWEETS_DETECTED.inc(len(tweet_urls), bot_id=self.bot_id or STANDALONE)
+        for tweet in tweet_urls:
+            try:
+                top_tweet_id = status_id_from_url(tweet)
+                retweeted = self.quote_tweet(driver=self.driver,tweet_url=tweet,quote_text=" ".join(hashtag))
 
-                    logger.info(f"new retweet count  {new_tweets_retweeted}")
+                logger.info(f"new retweet count  {new_tweets_retweeted}")
 
+                # update the posted tweet ids
+                if retweeted and new_tweets_retweeted==0:
+                    logger.info(f"Successfully retweeted new tweet for {user_id}: {top_tweet_id} as top ID")
 
-                    # update the posted tweet ids
-                    if retweeted and new_tweets_retweeted==0:
-                
-                        logger.info(f"Successfully retweeted new tweet for {user_id}: {top_tweet_id} as top ID")
-                        
+                    if user_id not in self.processed_tweets_map:
+                        self.processed_tweets_map[user_id] = set()
+                    else:
+                        self.processed_tweets_map[user_id].clear()
+
+                    self.processed_tweets_map[user_id].add(top_tweet_id)
+                    new_top_tweet_id=tweet
+                    new_tweets_retweeted += 1
+                elif retweeted:
+                    new_tweets_retweeted += 1
+                    logger.info(f"Successfully retweeted new tweet for {user_id}: {top_tweet_id}")
+            except Exception as e:
+                logger.error(f"Error retweeting {tweet} for {user_id}: {str(e)}")
+                continue
 
-                        if user_id not in self.processed_tweets_map:
-                            self.processed_tweets_map[user_id] = set()
-                        else:
-                            self.processed_tweets_map[user_id].clear()
+        if new_tweets_retweeted > 0:
+            TWEETS_POSTED.inc(new_tweets_retweeted, bot_id=self.bot_id or STANDALONE)
+            logger.info(f"tweet  id updated {user_id}")
+            # After processing, update the log with only the top tweet's id.
+            self.update_logged_tweet_id(user_id, new_top_tweet_id)
+        return new_tweets_retweeted
 
-                        self.processed_tweets_map[user_id].add(top_tweet_id)
-                        # self.log_retweeted_tweet(user_id, tweet)
-                        new_top_tweet_id=tweet
-                        new_tweets_retweeted += 1
+    def catch_up(self, user_id, records, high_water):
+        """
+        Scrolls the user's profile (still loaded in the driver) for older tweets when records contain nothing at
+        or below the high-water mark, so tweets posted during downtime are not missed. Returns the records to
+        select new tweets from.
+
+        A first screen of retweets has no own tweet at or below the mark however recent the mark is, so after a
+        check the first screen's ids are remembered in caught_up, with the newest new tweet that was only
+        found below it. The next check skips the harvest if its first screen shares a tweet with the
+        remembered one and the mark has passed that tweet: everything newer is on the screen, and everything
+        below was covered before.
+        """
+        if not self.catchup_depth or high_water is None or not records:
+            return records
+        key = handle_key(user_id)
+        screen = {record["id"] for record in records if not record.get("pinned")}
+        previous_screen, below = self.caught_up.get(key) or (set(), None)
+        if reaches_mark(records, high_water) or (not previous_screen.isdisjoint(screen)
+                                                 and (below is None or below <= high_water)):
+            self.caught_up[key] = (screen, None)
+            return records
+        with track(self.bot_id, "catch_up"):
+            result = TimelineHarvester(self, max_tweets=self.catchup_depth).harvest(high_water, records)
+        # Even a harvest that stopped early went as deep as it will go, so it is not repeated on the next check
+        # unless tweets it found below the screen are still above the mark then
+        below = [numeric_id(record["id"]) for record in result.new_records if record["id"] not in screen]
+        self.caught_up[key] = (screen, max(below) if below else None)
+        if result.recovered:
+            TWEETS_RECOVERED.inc(result.recovered, bot_id=self.bot_id or STANDALONE)
+            logger.info(f"Catch-up recovered {result.recovered} tweet(s) below the fold for {user_id} "
+                        f"({result.scrolls} scrolls, at most {result.max_dom_tweets} tweets in the DOM)")
+            self.results.append({"status": "success", "user": user_id,
+                                 "message": f"Recovered {result.recovered} missed tweet(s)"})
+        if not result.reached_mark:
+            logger.warning(f"Catch-up for {user_id} stopped after {len(result.records)} tweets without reaching "
+                           f"tweet {high_water}; older missed tweets are skipped")
+            self.results.append({"status": "warning", "user": user_id,
+                                 "message": f"Catch-up stopped at depth {len(result.records)}; older missed tweets skipped"})
+        return result.records
+
+    def new_tweet_urls(self, user_id, records, high_water=None):
+        """
+        Returns the status URLs of the tweets in records newer than the high-water mark (by default the user's
+        saved tweet id), most recent first. If the records do not reach the mark, older tweets are harvested
+        from the profile first (catch_up()).
+        """
+        if high_water is None:
+            high_water = numeric_id(self.ledger.get(user_id))
+        records = self.catch_up(user_id, records, high_water)
+        new_tweet_urls = [record["url"] for record in select_new(records, high_water)]
+        if not new_tweet_urls:
+            logger.info(f"No new tweet for {user_id}: nothing newer than {high_water}")
+        return new_tweet_urls
+
+    def detect_new_tweets(self, user_id, high_water=None):
+        """
+        Detection half of check_for_new_tweet: reads the user's timeline and returns the new tweets' status URLs
+        without posting them.
 
-                           
-                  
+        Returns:
+            list: Status URLs, most recent first, or None if the profile could not be read.
+        """
+        try:
+            records = self.get_profile_records(user_id)
+            if records is None:
+                return None
+            return self.new_tweet_urls(user_id, records, high_water)
+        except Exception as e:
+            logger.error(f"Error detecting new tweets for {user_id}: {str(e)}")
+            return None
 
-                    elif retweeted:
-                        new_tweets_retweeted += 1
+    def check_for_new_tweet(self, user_id, hashtag):
+        """
+        Checks the user's tweets against the user's high-water mark (the saved tweet id): pinned tweets and
+        retweets are skipped, and every tweet whose snowflake id is newer than the mark is new. The new tweets are retweeted and the mark is raised to the most
+        recent one retweeted. Without a saved id only the newest tweet is treated as new.
+        
+        The outcome is also kept in last_check_status.
 
-                        logger.info(f"Successfully retweeted new tweet for {user_id}: {top_tweet_id}")
-                    
-                    
-                    # link_element = tweet.find_element(By.XPATH, './/a[contains(@href, "/status/")]')
-                    # tweet_url = link_element.get_attribute("href")
-                except Exception as e:
-                    logger.error(f"Error extracting tweet URL for {user_id}: {str(e)}")
-                    continue
+        Returns:
+            tuple(bool, str): True and a message if at least one new tweet was retweeted; otherwise False.
+        """
+        self.last_check_status = CHECK_FAILED
+        try:
+            # Navigate to the user's profile and read its timeline (most recent first)
+            records = self.get_profile_records(user_id)
+            if records is None:
+                return False, f"Could not navigate to {user_id}'s profile."
 
-        
+            self.last_check_status = CHECK_QUIET
+            if not records:
+                logger.info(f"No tweets found for {user_id} in check_for_new_tweet")
+                return False, "No tweets found"
+            
+            new_tweet_urls = self.new_tweet_urls(user_id, records)
 
+            new_tweets_retweeted = self.post_new_tweets(user_id, new_tweet_urls, hashtag)
             if new_tweets_retweeted > 0:
-                logger.info(f"tweet  id updated {user_id}")
-                # After processing, update the log with only the top tweet's id.
-                self.update_logged_tweet_id(user_id, new_top_tweet_id)
-
-                new_tweets_retweeted=0
+                self.last_check_new_tweets = new_tweets_retweeted
+                self.last_check_status = CHECK_POSTED
                 return True, f"Retweeted {new_tweets_retweeted} new tweet(s) for {user_id}."
             else:
                 return False, f"No new tweets to retweet for {user_id}."
         except Exception as e:
+            self.last_check_status = CHECK_FAILED
             logger.error(f"Error in check_for_new_tweet for {user_id}: {str(e)}")
             return False, f"Error: {str(e)}"
 
     def process_user(self, user_id, hashtag):
         """
-        Processes a single Twitter user by navigating to the user's profile, extracting the top 3 tweet elements,
-        and retweeting only those tweets that have not been processed before. It does so by checking the saved
-        tweet IDs from file (via get_logged_tweet_ids). When a new tweet is retweeted, its tweet ID is logged.
-        Only the top tweet id (the most recent tweet) is kept in the file.
+        Processes a single Twitter user by navigating to the user's profile, taking the top 2 of the user's own
+        tweets (pinned tweets and retweets are skipped) and retweeting those newer than the user's high-water
+        mark (the saved tweet id). When a tweet is retweeted, the mark is raised to the top tweet's id.
+        If the user has a mark, the tweets newer than it are found instead, scrolling for tweets below the first
+        screen when needed (catch-up after downtime). The oldest INITIAL_CATCHUP_POSTS of them are retweeted
+        through post_new_tweets(), which raises the mark only to a tweet actually posted, so the newer ones
+        are left for monitoring instead of holding up the initial pass.
         
         Returns:
             tuple(bool, str): A success flag and a message.
         """
         try:
-            if not self.navigate_to_user_profile(user_id):
+            records = self.get_profile_records(user_id)
+            if records is None:
                 return False, f"Could not navigate to {user_id}'s profile."
-            time.sleep(3)
-
-            wait = WebDriverWait(self.driver, 20)
-            tweets = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article[data-testid='tweet']")))
 
-            tweet_elements = tweets[:2]
-            if not tweet_elements:
+            high_water = numeric_id(self.ledger.get(user_id))
+            if high_water is not None and self.catchup_depth:
+                return self.catch_up_user(user_id, records, high_water, hashtag)
+            tweet_urls = [record["url"] for record in records if classify(record) == "tweet"][:2]
+            if not tweet_urls:
                 logger.warning(f"No tweets found for {user_id}")
                 return False, f"No tweets found for {user_id}"
             
-            logged_ids = self.get_logged_tweet_ids(user_id)
             successful_retweets = 0
 
-            tweet_urls = []
-            for tweet in tweet_elements:
-                try:
-                    link_element = tweet.find_element(By.XPATH, './/a[contains(@href, "/status/")]')
-                    tweet_url = link_element.get_attribute("href")
-                    tweet_urls.append(tweet_url)
-                except Exception as e:
-                    logger.error(f"Error extracting tweet URL for {user_id}: {str(e)}")
-        
-            if not tweet_urls:
-                return False, f"No tweet URLs found for {user_id}"
-            
             for i, tweet_url in enumerate(tweet_urls):
                 try:
-                    tweet_id = tweet_url.split("/status/")[-1].split('?')[0]
-                    if tweet_id in logged_ids:
+                    tweet_id = status_id_from_url(tweet_url)
+                    if high_water is not None and (numeric_id(tweet_id) or 0) <= high_water:
                         logger.info(f"Tweet {tweet_id} for {user_id} already processed, skipping.")
                         continue
 
                     logger.info(f"Processing tweet {i+1} for {user_id}: {tweet_url}")
-                    self.driver.get(tweet_url)
-                    time.sleep(3)
+                    TWEETS_DETECTED.inc(bot_id=self.bot_id or STANDALONE)
 
                     # tweet_detail = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "article[data-testid='tweet']")))
                     # retweeted = self.repost_with_hashtag(tweet_detail, [hashtag])
@@ -696,12 +895,10 @@ class TwitterBot:
                         successful_retweets += 1
                     else:
                         logger.warning(f"Failed to retweet tweet for {user_id}: {tweet_id}")
-                    self.driver.get(f"https://twitter.com/{user_id}")
-
-                    time.sleep(5)
                 except Exception as e:
                     logger.error(f"Error processing a tweet for {user_id}: {str(e)}")
             if successful_retweets > 0:
+                TWEETS_POSTED.inc(successful_retweets, bot_id=self.bot_id or STANDALONE)
                 # Update the logged tweet id to only the top (most recent) tweet id
                 self.update_logged_tweet_id(user_id, tweet_urls[0])
                 return True, f"Successfully retweeted {successful_retweets} tweets for {user_id}."
@@ -711,52 +908,309 @@ class TwitterBot:
             logger.error(f"Error processing user {user_id}: {str(e)}")
             return False, f"Error processing user {user_id}: {str(e)}"
 
+    def catch_up_user(self, user_id, records, high_water, hashtag):
+        """
+        Initial pass for a user with a high-water mark: retweets the oldest INITIAL_CATCHUP_POSTS tweets newer
+        than the mark. Tweets newer than those stay above the mark, so monitoring (or the next run) posts them.
+
+        Returns:
+            tuple(bool, str): A success flag and a message.
+        """
+        tweet_urls = self.new_tweet_urls(user_id, records, high_water)
+        if not tweet_urls:
+            return False, f"No new tweets retweeted for {user_id}"
+        batch = tweet_urls[-INITIAL_CATCHUP_POSTS:]
+        if len(batch) < len(tweet_urls):
+            logger.info(f"{user_id} has {len(tweet_urls)} new tweets; retweeting the oldest {len(batch)} now, "
+                        f"the rest are left to monitoring")
+        posted = self.post_new_tweets(user_id, batch, hashtag)
+        if posted > 0:
+            return True, f"Successfully retweeted {posted} tweets for {user_id}."
+        return False, f"No new tweets retweeted for {user_id}"
+
     def repost_tweets(self, user_ids, hashtags, start_monitoring=False, monitor_interval=300, phone=None):
         """
         Processes a list of user IDs by logging in, navigating to each user's profile, and retweeting up to
         3 tweets initially (only those which have not been processed before). Then, if monitoring is enabled,
-        the bot periodically logs in, checks for new tweets using check_for_new_tweet (retweeting all new tweets
-        until a known tweet is encountered), logs out, and repeats after the fixed interval.
+        the bot checks accounts for new tweets using check_for_new_tweet (retweeting all new tweets until a
+        known tweet is encountered) whenever the PollScheduler says they are due. monitor_interval is the
+        check interval used until an account's posting rate is known.
         
+        If the bot has a checkpoint from an earlier process, handles the initial pass already finished are
+        skipped (the whole pass if monitoring had started) and tweets detected but not yet posted are posted
+        before monitoring resumes.
+
         Returns:
             list: A list of dictionaries with the result for each user.
         """
-        results = []
         hashtag = hashtags[0] if hashtags else ""
+        checkpoint = self.checkpoint
+        with self._handles_lock:
+            self.user_ids = list(user_ids)
         
+        # The browser starts here, on the job's thread, not when the bot is created
+        self.set_phase("starting browser")
+        if not self.ensure_driver():
+            self.set_phase("browser failed")
+            return []
+
         # Initial retweeting phase
+        self.set_phase("logging in")
         if not self.perform_login(phone):
-            messagebox.showerror("Login Error", "Unable to log in, aborting operation.")
+            self.set_phase("login failed")
+            self.report_error("Login failed", "Unable to log in, aborting operation.")
             return []
-        for user_id in user_ids:
-            try:
-                success, message = self.process_user(user_id, hashtag)
-                results.append({"user": user_id, "status": "success" if success else "failed", "message": message})
-            except Exception as e:
-                logger.error(f"Error processing user {user_id}: {str(e)}")
-                results.append({"user": user_id, "status": "error", "message": str(e)})
-        
+        self.set_phase("starting workers")
+        pool = WorkerPool(self, self.pool_size)
+        pool.start(phone)
+
+        def process(worker, user_id):
+            set_log_context(bot_id=self.bot_id, handle=user_id, phase=self.phase)
+            success, message = worker.process_user(user_id, hashtag)
+            if checkpoint is not None:
+                checkpoint.mark_done(user_id)
+            return {"user": user_id, "status": "success" if success else "failed", "message": message}
+
+        todo = user_ids
+        if checkpoint is not None:
+            if checkpoint.phase == "monitoring":
+                todo = []
+            else:
+                todo = [user_id for user_id in user_ids if user_id not in checkpoint.completed]
+            if len(todo) < len(user_ids):
+                logger.info(f"Resuming from checkpoint: {len(user_ids) - len(todo)} of {len(user_ids)} handles already done")
+        self.set_phase("initial pass")
+        results = pool.run(todo, process, should_continue=lambda: not self.cancelled)
+        self.results.extend(results)
+        if checkpoint is not None:
+            checkpoint.flush()
         
         # Monitoring phase
-        if start_monitoring:
+        if start_monitoring and not self.cancelled:
+            self.set_phase("monitoring")
             self.monitoring = True
+            if checkpoint is not None:
+                checkpoint.set_phase("monitoring")
+                self.post_pending(pool, hashtag)
             logger.info("Starting monitoring mode...")
-            while self.monitoring:
-                time.sleep(1)
-                
-                for user_id in user_ids:
-                    retweeted, msg = self.check_for_new_tweet(user_id, hashtag)
-                    logger.info(f"Monitoring: {user_id} - {msg}")
-                
+            # Handles added or removed during the initial pass are picked up here
+            if self.detection_mode == "search":
+                with self._handles_lock:
+                    user_ids = list(self.user_ids)
+                self.monitor_by_search(pool, user_ids, hashtag, monitor_interval)
+            elif self.detection_mode == "shared":
+                self.monitor_shared(pool, hashtag, monitor_interval)
+            else:
+                self.monitor_profiles(pool, hashtag, monitor_interval)
             logger.info("Monitoring mode stopped.")
         else:
             self.monitoring = False
+        pool.close()
+        self.set_phase("cancelled" if self.cancelled else "done")
         
         if all(r["status"] == "success" for r in results):
-            messagebox.showinfo("Retweet Bot", "Successfully retweeted latest tweets for all users!")
+            logger.info("Successfully retweeted latest tweets for all users!")
         else:
-            messagebox.showerror("Retweet Bot", "Some tweets could not be retweeted. Check log for details.")
+            logger.warning("Some tweets could not be retweeted. Check log for details.")
         return results
 
+    def post_pending(self, pool, hashtag):
+        """
+        Posts the tweets a previous process detected but did not post, as recorded in the checkpoint.
+        """
+        jobs = self.checkpoint.take_pending()
+        if not jobs:
+            return
+        logger.info(f"Posting {len(jobs)} pending job(s) from the checkpoint")
+
+        def post(worker, job):
+            set_log_context(bot_id=self.bot_id, handle=job["handle"], phase=self.phase)
+            posted = worker.post_new_tweets(job["handle"], job["tweet_urls"], hashtag)
+            message = f"Retweeted {posted} pending tweet(s) for {job['handle']}." if posted else \
+                f"Could not retweet pending tweets for {job['handle']}."
+            return {"user": job["handle"], "status": "success" if posted else "failed", "message": message}
+
+        self.results.extend(pool.run(jobs, post))
+        self.checkpoint.set_pending([])
+
+    def monitor_profiles(self, pool, hashtag, monitor_interval):
+        """
+        Monitoring loop that checks each account's profile whenever the PollScheduler says it is due. With
+        post_workers set, detection and posting run on separate sessions as a DetectPostPipeline instead.
+        """
+        self.start_scheduler(monitor_interval)
+        if self.post_workers and len(pool.workers) > self.post_workers:
+            split = len(pool.workers) - self.post_workers
+            self.pipeline = DetectPostPipeline(self, pool.workers[:split], pool.workers[split:], hashtag,
+                                               self.scheduler, capacity=self.post_queue_size,
+                                               on_pending=self.checkpoint.set_pending if self.checkpoint else None)
+            self.pipeline.run(lambda: self.monitoring)
+            pool.merge_worker_results()
+            return
+        if self.post_workers:
+            logger.warning(f"Only {len(pool.workers)} session(s) available, posting stays interleaved with detection")
+
+        def monitor(worker, user_id):
+            set_log_context(bot_id=self.bot_id, handle=user_id, phase=self.phase)
+            retweeted, msg = worker.check_for_new_tweet(user_id, hashtag)
+            logger.info(f"Monitoring: {user_id} - {msg}")
+            if retweeted:
+                self.scheduler.record(user_id, new_tweets=worker.last_check_new_tweets)
+            else:
+                self.scheduler.record(user_id, error=worker.last_check_status == CHECK_FAILED)
+            return {"user": user_id, "status": "success" if retweeted else "failed", "message": msg}
+
+        while self.monitoring:
+            due = self.scheduler.pop_due(limit=len(pool.workers))
+            if not due:
+                # Sleep in short steps so stop_monitoring takes effect quickly.
+                time.sleep(min(1.0, self.scheduler.seconds_until_next()) or 0.1)
+                continue
+            for result in pool.run(due, monitor):
+                if result["status"] == "error":
+                    self.scheduler.record(result["user"], error=True)
+
+    def monitor_by_search(self, pool, user_ids, hashtag, monitor_interval):
+        """
+        Monitoring loop for batched detection: every monitor_interval seconds, each chunk of handles is
+        checked through one `from:` search timeline (see batch_detection.py) and new tweets are posted.
+        """
+        version = self.handles_version
+        chunks = [chunk for _, chunk in build_search_queries(user_ids, self.max_query_length)]
+        logger.info(f"Batched detection: {len(user_ids)} handles in {len(chunks)} search queries")
+
+        def sweep(worker, chunk):
+            set_log_context(bot_id=self.bot_id, handle=None, phase=self.phase)
+            results = BatchDetector(worker, max_query_length=self.max_query_length).sweep(chunk, hashtag)
+            for result in results:
+                logger.info(f"Monitoring: {result['user']} - {result['message']}")
+            return {"user": f"{len(chunk)} handles", "status": "success", "message": f"{len(results)} handle(s) with new tweets"}
+
+        while self.monitoring:
+            if version != self.handles_version:
+                with self._handles_lock:
+                    version = self.handles_version
+                    chunks = [chunk for _, chunk in build_search_queries(self.user_ids, self.max_query_length)]
+                logger.info(f"Handle list changed: {len(chunks)} search queries")
+            started = time.monotonic()
+            pool.run(chunks, sweep, should_continue=lambda: self.monitoring)
+            while self.monitoring and time.monotonic() - started < monitor_interval:
+                time.sleep(1)
+
+    def monitor_shared(self, pool, hashtag, monitor_interval):
+        """
+        Monitoring loop for shared detection: due handles are checked through the process-wide DetectionHub,
+        which scrapes each handle once for all bots watching it and publishes new tweets to every subscriber's
+        inbox. This bot posts whatever arrives in its inbox.
+        """
+        hub = get_hub()
+        inbox = self.start_scheduler(monitor_interval, subscribe=lambda user_ids: hub.subscribe(self.bot_id, user_ids))
+
+        def detect(worker, user_id):
+            set_log_context(bot_id=self.bot_id, handle=user_id, phase=self.phase)
+            records = hub.check(user_id, lambda: worker.get_profile_records(user_id))
+            self.scheduler.record(user_id, error=records is None)
+            return {"user": user_id, "status": "success" if records is not None else "failed", "message": "checked"}
+
+        def post(worker, event):
+            user_id, tweet_urls = event
+            set_log_context(bot_id=self.bot_id, handle=user_id, phase=self.phase)
+            posted = worker.post_new_tweets(user_id, tweet_urls, hashtag)
+            if posted:
+                message = f"Retweeted {posted} new tweet(s) for {user_id}."
+                self.scheduler.record(user_id, new_tweets=posted)
+            else:
+                message = f"Could not retweet new tweets for {user_id}."
+            logger.info(f"Monitoring: {user_id} - {message}")
+            return {"user": user_id, "status": "success" if posted else "failed", "message": message}
+
+        try:
+            while self.monitoring:
+                events = []
+                while True:
+                    try:
+                        events.append(inbox.get_nowait())
+                    except queue.Empty:
+                        break
+                if events:
+                    if self.checkpoint is not None:
+                        self.checkpoint.set_pending([{"handle": h, "tweet_urls": urls} for h, urls in events])
+                    self.results.extend(pool.run(events, post, should_continue=lambda: self.monitoring))
+                    if self.checkpoint is not None:
+                        self.checkpoint.set_pending([])
+                    continue
+                due = self.scheduler.pop_due(limit=len(pool.workers))
+                if not due:
+                    time.sleep(min(1.0, self.scheduler.seconds_until_next()) or 0.1)
+                    continue
+                pool.run(due, detect)
+        finally:
+            hub.unsubscribe(self.bot_id)
+
+    def start_scheduler(self, monitor_interval, subscribe=None):
+        """
+        Creates the monitoring PollScheduler from the current handle list. The list is read and the scheduler
+        set while holding the handle lock, so an update_handles() call either lands in the list the scheduler
+        is built from or is applied to the scheduler itself.
+
+        Args:
+            monitor_interval (int): Base polling interval in seconds.
+            subscribe (callable, optional): Called with the handles under the same lock (shared detection).
+
+        Returns:
+            The return value of subscribe, or None.
+        """
+        with self._handles_lock:
+            user_ids = list(self.user_ids)
+            subscribed = subscribe(user_ids) if subscribe is not None else None
+            self.scheduler = PollScheduler(user_ids, base_interval=monitor_interval,
+                                           checks_per_hour=self.check_budget)
+        return subscribed
+
+    def update_handles(self, added, removed):
+        """
+        Applies a change of the handle list to the running bot without restarting it: removed handles are no
+        longer checked and added ones are checked from the next scheduling round (or, before monitoring has
+        started, once it does). Handles the bot already processed keep their high-water marks.
+
+        Args:
+            added (list): Handles to start monitoring.
+            removed (list): Handles to stop monitoring, as spelled in user_ids.
+        """
+        with self._handles_lock:
+            removed_keys = {handle.lower() for handle in removed}
+            self.user_ids = [handle for handle in self.user_ids if handle.lower() not in removed_keys] + list(added)
+            self.handles_version += 1
+            scheduler = self.scheduler
+            user_ids = list(self.user_ids)
+        if scheduler is not None:
+            for handle in removed:
+                scheduler.remove(handle)
+            for handle in added:
+                scheduler.add(handle)
+        if self.detection_mode == "shared" and scheduler is not None and self.monitoring:
+            hub = get_hub()
+            if removed:
+                hub.unsubscribe(self.bot_id, removed)
+            if added:
+                hub.subscribe(self.bot_id, added)
+        if self.checkpoint is not None:
+            self.checkpoint.update_config(user_ids=user_ids)
+        logger.info(f"Handle list updated: {len(added)} added, {len(removed)} removed, {len(user_ids)} monitored")
+
+    def set_phase(self, phase):
+        """
+        Records the current phase of the run, for the job endpoints and the log context of this thread.
+        """
+        self.phase = phase
+        set_log_context(bot_id=self.bot_id, handle=None, phase=phase)
+
     def stop_monitoring(self):
+        self.monitoring = False
+
+    def cancel(self):
+        """
+        Cancels the current run: the initial pass stops before its next handle and monitoring ends.
+        """
+        self.cancelled = True
         self.monitoring = False
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+waits.py
+
+This module contains the WaitEngine class which replaces fixed time.sleep calls with waits on concrete DOM
+conditions (timeline rendered, compose modal open, post toast shown, ...). Every named step keeps its own
+adaptive timeout, learned from the latencies observed for that step, and a record of how long it waited.
+"""
+
+import time
+import threading
+import logging
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+
+logger = logging.getLogger(__name__)
+
+TWEET_SELECTOR = "article[data-testid='tweet']"
+COMPOSE_INPUT_SELECTOR = 'div[aria-label="Post text"], [data-testid="tweetTextarea_0"]'
+REPOST_MENU_SELECTOR = '[role="menu"], [data-testid="Dropdown"], [data-testid="retweetConfirm"]'
+TOAST_SELECTOR = '[data-testid="toast"]'
+EMPTY_TIMELINE_SELECTOR = '[data-testid="emptyState"]'
+
+
+def timeline_rendered():
+    """
+    Condition: at least one tweet article is rendered. Returns the list of tweet elements.
+    """
+    return EC.presence_of_all_elements_located((By.CSS_SELECTOR, TWEET_SELECTOR))
+
+
+def timeline_settled():
+    """
+    Condition: the profile timeline has rendered tweets or an empty state.
+    """
+    def _condition(driver):
+        tweets = driver.find_elements(By.CSS_SELECTOR, TWEET_SELECTOR)
+        if tweets:
+            return tweets
+        return bool(driver.find_elements(By.CSS_SELECTOR, EMPTY_TIMELINE_SELECTOR))
+    return _condition
+
+
+def tweet_detail_rendered(tweet_url):
+    """
+    Condition: a tweet article linking to the given status URL is rendered.
+    """
+    status_id = tweet_url.split("/status/")[-1].split("?")[0].split("/")[0]
+    return EC.presence_of_element_located(
+        (By.CSS_SELECTOR, f"{TWEET_SELECTOR} a[href*='/status/{status_id}']"))
+
+
+def repost_menu_open():
+    """
+    Condition: the repost / quote dropdown is open.
+    """
+    return EC.visibility_of_element_located((By.CSS_SELECTOR, REPOST_MENU_SELECTOR))
+
+
+def compose_modal_open():
+    """
+    Condition: the compose modal text box is visible.
+    """
+    return EC.visibility_of_element_located((By.CSS_SELECTOR, COMPOSE_INPUT_SELECTOR))
+
+
+def post_button_enabled():
+    """
+    Condition: the compose modal's post button is visible and enabled.
+    """
+    return EC.element_to_be_clickable((By.CSS_SELECTOR, '[data-testid="tweetButton"]'))
+
+
+def post_confirmed():
+    """
+    Condition: the "post sent" toast is shown, or the compose modal has closed.
+    """
+    def _condition(driver):
+        try:
+            if driver.find_elements(By.CSS_SELECTOR, TOAST_SELECTOR):
+                return True
+            return not any(e.is_displayed() for e in driver.find_elements(By.CSS_SELECTOR, COMPOSE_INPUT_SELECTOR))
+        except StaleElementReferenceException:
+            return False
+    return _condition
+
+
+class StepStats:
+    def __init__(self):
+        """
+        Latency statistics for one named wait step.
+
+        Attributes:
+            count (int): Number of successful waits.
+            timeouts (int): Number of waits that timed out.
+            avg (float): Smoothed latency in seconds.
+            dev (float): Smoothed mean deviation of the latency in seconds.
+            last (float): Latency of the last wait in seconds.
+            total (float): Total seconds spent waiting on this step.
+            backoff (float): Multiplier applied after timeouts, reset on the next success.
+        """
+        self.count = 0
+        self.timeouts = 0
+        self.avg = None
+        self.dev = 0.0
+        self.last = 0.0
+        self.total = 0.0
+        self.backoff = 1.0
+
+    def to_dict(self, timeout):
+        return {
+            "count": self.count,
+            "timeouts": self.timeouts,
+            "avg": round(self.avg, 3) if self.avg is not None else None,
+            "last": round(self.last, 3),
+            "total": round(self.total, 3),
+            "timeout": round(timeout, 3),
+        }
+
+
+class WaitEngine:
+    # Smoothing factors and deviation multiplier, in the style of TCP's retransmission timer.
+    ALPHA = 0.125
+    BETA = 0.25
+    K = 4
+
+    def __init__(self, driver, default_timeout=20, min_timeout=2, max_timeout=30, poll_frequency=0.1, warmup=3):
+        """
+        Initializes a WaitEngine for a WebDriver.
+
+        Args:
+            driver (webdriver.Chrome): Selenium WebDriver instance.
+            default_timeout (float): Timeout used until a step has enough samples.
+            min_timeout (float): Lower bound of a learned timeout.
+            max_timeout (float): Upper bound of a learned timeout.
+            poll_frequency (float): Seconds between condition checks.
+            warmup (int): Number of samples needed before the learned timeout is used.
+        """
+        self.driver = driver
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.poll_frequency = poll_frequency
+        self.warmup = warmup
+        self.steps = {}
+        self._lock = threading.Lock()
+
+    def _step(self, step):
+        stats = self.steps.get(step)
+        if stats is None:
+            stats = StepStats()
+            self.steps[step] = stats
+        return stats
+
+    def timeout_for(self, step):
+        """
+        Returns the current adaptive timeout (in seconds) for the given step.
+        """
+        with self._lock:
+            stats = self._step(step)
+            if stats.count < self.warmup or stats.avg is None:
+                timeout = self.default_timeout
+            else:
+                timeout = stats.avg + self.K * stats.dev
+            timeout = max(self.min_timeout, min(self.max_timeout, timeout * stats.backoff))
+            return timeout
+
+    def record(self, step, elapsed, timed_out=False):
+        """
+        Records one observed wait for a step and updates its learned latency.
+        """
+        with self._lock:
+            stats = self._step(step)
+            stats.last = elapsed
+            stats.total += elapsed
+            if timed_out:
+                stats.timeouts += 1
+                stats.backoff = min(stats.backoff * 2, 8.0)
+                return
+            stats.count += 1
+            stats.backoff = 1.0
+            if stats.avg is None:
+                stats.avg = elapsed
+                stats.dev = elapsed / 2
+            else:
+                stats.dev = (1 - self.BETA) * stats.dev + self.BETA * abs(elapsed - stats.avg)
+                stats.avg = (1 - self.ALPHA) * stats.avg + self.ALPHA * elapsed
+
+    def wait_for(self, step, condition, timeout=None, raise_on_timeout=True):
+        """
+        Waits until the condition is met, recording how long the step took.
+
+        Args:
+            step (str): Name of the step, used for the adaptive timeout and statistics.
+            condition (callable): A Selenium expected condition taking the driver.
+            timeout (float, optional): Fixed timeout overriding the learned one.
+            raise_on_timeout (bool): If False, a timeout is logged and None is returned.
+
+        Returns:
+            The condition's return value (e.g. the located element or elements).
+        """
+        limit = timeout if timeout is not None else self.timeout_for(step)
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(self.driver, limit, poll_frequency=self.poll_frequency).until(condition)
+        except TimeoutException:
+            elapsed = time.monotonic() - start
+            self.record(step, elapsed, timed_out=True)
+            logger.warning(f"Wait step '{step}' timed out after {elapsed:.2f}s")
+            if raise_on_timeout:
+                raise
+            return None
+        elapsed = time.monotonic() - start
+        self.record(step, elapsed)
+        logger.debug(f"Wait step '{step}' satisfied after {elapsed:.2f}s (timeout {limit:.1f}s)")
+        return result
+
+    def report(self):
+        """
+        Returns a dictionary of per-step wait statistics, e.g.
+        { "timeline": {"count": 12, "timeouts": 0, "avg": 1.4, "last": 1.1, "total": 17.2, "timeout": 4.3}, ... }
+        """
+        report = {}
+        for step in list(self.steps):
+            timeout = self.timeout_for(step)
+            with self._lock:
+                report[step] = self.steps[step].to_dict(timeout)
+        return report
@@ -0,0 +1,118 @@
+"""
+worker_pool.py
+
+This module contains the WorkerPool class which runs one TwitterBot pass over many handles on several
+logged-in browser sessions at once. Worker 0 is the bot itself (using its own driver); the remaining workers
+are clones of the bot with their own WebDriver. Handles are handed out from a shared queue, so a slow
+profile only holds up the worker that drew it, and each worker's results are merged back into the bot.
+"""
+
+import queue
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    def __init__(self, bot, size=1):
+        """
+        Initializes a WorkerPool for a TwitterBot.
+
+        Args:
+            bot (TwitterBot): The bot owning the pool. Its driver is used by worker 0.
+            size (int): Total number of browser sessions, including the bot's own.
+
+        Attributes:
+            workers (list): The bot followed by its logged-in clones.
+        """
+        self.bot = bot
+        self.size = max(1, int(size))
+        self.workers = [bot]
+        self._lock = threading.Lock()
+
+    def start(self, phone=None):
+        """
+        Launches and logs in the extra worker sessions in parallel. Workers that fail to start are dropped,
+        so the pool degrades to fewer sessions instead of failing the run.
+
+        Returns:
+            int: Number of usable workers.
+        """
+        extra = self.size - len(self.workers)
+        if extra <= 0:
+            return len(self.workers)
+
+        def launch(index):
+            worker = self.bot.spawn_worker(index)
+            if worker.driver is None or not worker.perform_login(phone):
+                worker.close()
+                return None
+            return worker
+
+        with ThreadPoolExecutor(max_workers=extra) as executor:
+            for worker in executor.map(launch, range(len(self.workers), self.size)):
+                if worker is not None:
+                    self.workers.append(worker)
+        logger.info(f"Worker pool started with {len(self.workers)} of {self.size} sessions")
+        return len(self.workers)
+
+    def run(self, user_ids, task, should_continue=None):
+        """
+        Runs task(worker, user_id) for every handle, spreading the handles across the workers.
+
+        Args:
+            user_ids (list): Twitter handles to process.
+            task (callable): Function taking a worker (TwitterBot) and a handle, returning a result dict.
+            should_continue (callable, optional): Checked before each handle; returning False stops the pass.
+
+        Returns:
+            list: The task results in the order of user_ids (handles skipped after a stop are omitted).
+        """
+        pending = queue.Queue()
+        for index, user_id in enumerate(user_ids):
+            pending.put((index, user_id))
+        collected = [[] for _ in self.workers]
+
+        def drain(slot):
+            worker = self.workers[slot]
+            while should_continue is None or should_continue():
+                try:
+                    index, user_id = pending.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    result = task(worker, user_id)
+                except Exception as e:
+                    logger.error(f"Worker {slot} failed on {user_id}: {str(e)}")
+                    result = {"user": user_id, "status": "error", "message": str(e)}
+                collected[slot].append((index, result))
+
+        if len(self.workers) == 1:
+            drain(0)
+        else:
+            with ThreadPoolExecutor(max_workers=len(self.workers)) as executor:
+                list(executor.map(drain, range(len(self.workers))))
+
+        self.merge_worker_results()
+        merged = sorted((item for items in collected for item in items), key=lambda item: item[0])
+        return [result for _, result in merged]
+
+    def merge_worker_results(self):
+        """
+        Moves the results recorded by the cloned workers (e.g. navigation warnings) into the bot's results.
+        """
+        with self._lock:
+            for worker in self.workers[1:]:
+                if worker.results:
+                    self.bot.results.extend(worker.results)
+                    worker.results = []
+
+    def close(self):
+        """
+        Quits the cloned workers' browsers. The bot's own driver is left to the bot.
+        """
+        for worker in self.workers[1:]:
+            worker.close()
+        self.workers = [self.bot]